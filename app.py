@@ -15,6 +15,13 @@ from src.routes.reviews import router as reviews_router
 from src.routes.sessions import router as sessions_router
 from src.routes.notifications import router as notifications_router
 from src.routes.reports import router as reports_router
+from src.routes.sync import router as sync_router
+from src.services.connection_events import connection_event_writer
+from src.services.notification_outbox import outbox_worker
+from src.services.realtime import broker
+from src.services.message_search import ensure_search_index
+from src.services.message_archive import message_archiver
+from src.services.booking import ensure_booking_index
 
 
 
@@ -28,7 +35,19 @@ app = FastAPI(
 def startup_event():
     print("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    ensure_search_index(engine)
+    ensure_booking_index(engine)
     print("Tables created successfully!")
+    outbox_worker.start()
+    broker.start()
+    message_archiver.start()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    connection_event_writer.stop()
+    outbox_worker.stop()
+    broker.stop()
+    message_archiver.stop()
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -44,6 +63,7 @@ app.include_router(reviews_router)
 app.include_router(sessions_router)
 app.include_router(notifications_router)
 app.include_router(reports_router)
+app.include_router(sync_router)
 
 @app.get("/")
 def root():
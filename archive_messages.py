@@ -0,0 +1,47 @@
+"""
+Message Archiver
+Moves messages older than MESSAGE_ARCHIVE_AFTER_DAYS out of the messages
+table into compressed per-conversation segments. The API process does the
+same every MESSAGE_ARCHIVE_INTERVAL_SECONDS; set that to 0 and run this
+instead to keep archival out of the web workers.
+
+Usage: python archive_messages.py [--days N] [--every SECONDS]
+Without --every it makes one pass and exits.
+"""
+
+import sys
+import os
+import time
+import argparse
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.config.database import SessionLocal
+import src.models  # Register all models
+from src.services.message_archive import MESSAGE_ARCHIVE_AFTER_DAYS, archive_once
+
+
+def archive(days: int):
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        stats = archive_once(db, older_than_days=days)
+    finally:
+        db.close()
+    print(
+        f"✅ Archived {stats['messages']} messages from {stats['conversations']} conversations "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive old messages")
+    parser.add_argument("--days", type=int, default=MESSAGE_ARCHIVE_AFTER_DAYS, help="Archive messages older than N days")
+    parser.add_argument("--every", type=float, default=0, help="Repeat every N seconds")
+    args = parser.parse_args()
+
+    archive(args.days)
+    while args.every:
+        time.sleep(args.every)
+        archive(args.days)
@@ -0,0 +1,27 @@
+"""
+Inbox Last Message Backfill
+Fills conversations.last_message_id and last_message_at from each
+conversation's newest message, for conversations created before the inbox
+kept them. Without it those conversations show no last message, sort by
+creation time, and are never archived. Run once after deploying the
+denormalized inbox. Safe to re-run: only empty rows are touched.
+"""
+
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.config.database import Base, engine, SessionLocal
+import src.models  # Register all models
+from src.services.read_state import backfill_last_messages
+
+if __name__ == "__main__":
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        count = backfill_last_messages(db)
+        print(f"✅ Backfilled the last message of {count} conversations")
+    finally:
+        db.close()
@@ -0,0 +1,27 @@
+"""
+Read Watermark Backfill
+Seeds each conversation's per-participant read watermarks from the legacy
+messages.is_read flag (the highest message a participant did not send that
+is marked read), then recomputes both unread counters from the watermarks.
+Run once after deploying read watermarks. Safe to re-run: watermarks only
+move forward.
+"""
+
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.config.database import Base, engine, SessionLocal
+import src.models  # Register all models
+from src.services.read_state import backfill_read_watermarks
+
+if __name__ == "__main__":
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        count = backfill_read_watermarks(db)
+        print(f"✅ Backfilled read watermarks for {count} conversations")
+    finally:
+        db.close()
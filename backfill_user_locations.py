@@ -0,0 +1,26 @@
+"""
+User Location Backfill
+Fills latitude, longitude and geo_cell for existing users from their
+location_city / location_country via the offline gazetteer, so they show
+up in near= mentor search. New and edited profiles are resolved on write;
+run this once after deploying geo search. Safe to re-run.
+"""
+
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.config.database import Base, engine, SessionLocal
+import src.models  # Register all models
+from src.services.geo import backfill_locations
+
+if __name__ == "__main__":
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        resolved, unresolved = backfill_locations(db)
+        print(f"✅ Resolved {resolved} users; {unresolved} cities not in the gazetteer")
+    finally:
+        db.close()
@@ -0,0 +1,85 @@
+"""
+Skill Suggestions Benchmark
+Compares the in-memory autocomplete index against the old ilike('%query%') lookup.
+Runs on a throwaway SQLite database, so it never touches DATABASE_URL.
+
+Usage: python bench_skill_suggestions.py [num_skills]
+"""
+
+import os
+import sys
+import random
+import string
+import tempfile
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+db_file = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{db_file}"
+
+from src.config.database import Base, engine, SessionLocal
+import src.models  # Register all models
+from src.models.skill import Skill
+from src.services.skill_index import SkillAutocompleteIndex
+
+CATEGORIES = ["programming", "data", "writing", "design", "marketing", "music", "languages"]
+QUERIES = ["py", "data", "ma", "design", "j", "learning", "writ", "zz"]
+
+
+def random_name() -> str:
+    words = random.randint(1, 3)
+    return " ".join(
+        "".join(random.choices(string.ascii_lowercase, k=random.randint(3, 9)))
+        for _ in range(words)
+    )
+
+
+def seed(db, num_skills: int):
+    names = set()
+    while len(names) < num_skills:
+        names.add(random_name())
+    db.bulk_save_objects([
+        Skill(name=name, category=random.choice(CATEGORIES), description="bench", is_deleted=False)
+        for name in names
+    ])
+    db.commit()
+
+
+def timed(fn, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds * 1_000_000
+
+
+def run(num_skills: int, rounds: int = 200):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    seed(db, num_skills)
+
+    index = SkillAutocompleteIndex()
+    start = time.perf_counter()
+    index.rebuild(db)
+    print(f"📦 Index built over {num_skills} skills in {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+    print(f"{'query':<10}{'ilike (µs)':>14}{'index (µs)':>14}{'speedup':>10}")
+    for query in QUERIES:
+        def old():
+            return (
+                db.query(Skill)
+                .filter(Skill.name.ilike(f"%{query}%"), Skill.is_deleted == False)
+                .limit(10)
+                .all()
+            )
+
+        old_us = timed(old, rounds)
+        new_us = timed(lambda: index.search(query, 10), rounds)
+        print(f"{query:<10}{old_us:>14.1f}{new_us:>14.1f}{old_us / new_us:>9.0f}x")
+
+    db.close()
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,51 @@
+"""
+Notification Outbox Drainer
+Delivers queued notification_outbox rows into notifications. The API
+process runs NOTIFICATION_OUTBOX_WORKERS threads doing the same; set that
+to 0 and run this instead to move delivery out of the web workers.
+
+Usage: python drain_notification_outbox.py [--every SECONDS]
+Without --every it drains the current backlog and exits.
+"""
+
+import sys
+import os
+import time
+import argparse
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.config.database import SessionLocal
+import src.models  # Register all models
+from src.services.notification_outbox import outbox_worker
+
+
+def drain():
+    start = time.perf_counter()
+    total = 0
+    db = SessionLocal()
+    try:
+        while True:
+            consumed = outbox_worker.drain_once(db)
+            total += consumed
+            if consumed < outbox_worker.batch_size:
+                break
+        metrics = outbox_worker.metrics(db)
+    finally:
+        db.close()
+    print(
+        f"✅ Consumed {total} outbox rows ({metrics['coalesced']} coalesced) in {time.perf_counter() - start:.2f}s; "
+        f"backlog {metrics['backlog']}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drain the notification outbox")
+    parser.add_argument("--every", type=float, default=0, help="Repeat every N seconds")
+    args = parser.parse_args()
+
+    drain()
+    while args.every:
+        time.sleep(args.every)
+        drain()
@@ -0,0 +1,47 @@
+"""
+Skill Catalog Import
+Bulk-loads skills from a CSV (name,category,description) or NDJSON file.
+Same rules as POST /skills/import: names are normalized like create_skill,
+existing names are skipped and soft-deleted ones are reactivated.
+
+Usage: python import_skills.py skills.csv [--format csv|ndjson]
+"""
+
+import sys
+import os
+import argparse
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.config.database import SessionLocal
+import src.models  # Register all models
+from src.services.skill_import import import_skills, parse_rows, detect_format
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import skills")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "ndjson"])
+    args = parser.parse_args()
+
+    fmt = args.format or detect_format(args.path, None)
+    db = SessionLocal()
+    try:
+        with open(args.path, encoding="utf-8-sig", newline="") as f:
+            report = import_skills(db, parse_rows(f, fmt))
+    finally:
+        db.close()
+
+    for row in report["rows"]:
+        if row["status"] in ("duplicate", "invalid"):
+            print(f"   ⚠ row {row['row']}: {row['status']} - {row['error']}")
+
+    print(
+        f"\n✅ Created {report['created']}, reactivated {report['reactivated']}, "
+        f"existing {report['exists']}, duplicate {report['duplicate']}, invalid {report['invalid']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Related Skills Job
+Recomputes the top-N co-occurring skills (cosine over users' held and
+followed skills) behind GET /skills/{id}/related.
+
+Usage: python rebuild_related_skills.py [--every SECONDS] [--top N]
+Run it from cron, or with --every to keep it looping.
+"""
+
+import sys
+import os
+import time
+import argparse
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.config.database import SessionLocal
+import src.models  # Register all models
+from src.services.related_skills import rebuild_related_skills, RELATED_TOP_N
+
+
+def run_once(top_n: int):
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        count = rebuild_related_skills(db, top_n=top_n)
+    finally:
+        db.close()
+    print(f"✅ Stored {count} related-skill pairs in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild related skills")
+    parser.add_argument("--every", type=int, default=0, help="Repeat every N seconds")
+    parser.add_argument("--top", type=int, default=RELATED_TOP_N)
+    args = parser.parse_args()
+
+    run_once(args.top)
+    while args.every:
+        time.sleep(args.every)
+        run_once(args.top)
@@ -0,0 +1,24 @@
+"""
+Skill Stats Backfill
+Recomputes the skill_stats counters from skill_follows and user_skills.
+Run once after creating the table, or whenever the counters look off.
+"""
+
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.config.database import Base, engine, SessionLocal
+import src.models  # Register all models
+from src.services.skill_stats import rebuild_skill_stats
+
+if __name__ == "__main__":
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        count = rebuild_skill_stats(db)
+        print(f"✅ Rebuilt stats for {count} skills")
+    finally:
+        db.close()
@@ -7,11 +7,17 @@ from .connection import Connection, ConnectionStatus
 from .profile_view import ProfileView
 from .conversation import Conversation
 from .message import Message
+from .message_archive import MessageArchiveSegment
 from .review import Review
 from .session import Session
+from .session_slot import SessionSlot
 from .notification import Notification
+from .notification_outbox import NotificationOutbox
 from .saved_user import SavedUser
 from .skill_follow import SkillFollow
 from .report import Report
+from .catalog_version import CatalogVersion
+from .skill_stats import SkillStats
+from .related_skill import RelatedSkill
 
-__all__ = ["User", "UserPortfolio", "Skill", "UserSkill", "ConnectionEvent", "Connection", "ConnectionStatus", "ProfileView", "Conversation", "Message", "Review", "Session", "Notification", "SavedUser", "SkillFollow", "Report"]
+__all__ = ["User", "UserPortfolio", "Skill", "UserSkill", "ConnectionEvent", "Connection", "ConnectionStatus", "ProfileView", "Conversation", "Message", "MessageArchiveSegment", "Review", "Session", "SessionSlot", "Notification", "NotificationOutbox", "SavedUser", "SkillFollow", "Report", "CatalogVersion", "SkillStats", "RelatedSkill"]
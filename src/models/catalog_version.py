@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from src.config.database import Base
+from datetime import datetime
+
+class CatalogVersion(Base):
+    __tablename__ = "catalog_versions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, nullable=False) # e.g. 'skills'
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, Enum, Index
 from src.config.database import Base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -21,3 +21,11 @@ class Connection(Base):
 
     requester = relationship("User", foreign_keys=[requester_id], backref="sent_connections")
     recipient = relationship("User", foreign_keys=[recipient_id], backref="received_connections")
+
+    # Listings filter on one side plus status and page by id
+    __table_args__ = (
+        Index("ix_connections_recipient_status_id", "recipient_id", "status", "id"),
+        Index("ix_connections_requester_status_id", "requester_id", "status", "id"),
+        Index("ix_connections_recipient_updated", "recipient_id", "updated_at"),
+        Index("ix_connections_requester_updated", "requester_id", "updated_at"),
+    )
@@ -7,8 +7,10 @@ class ConnectionEvent(Base):
     __tablename__ = "connection_events"
 
     id = Column(Integer, primary_key=True, index=True)
-    from_user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    to_user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    skill_id = Column(Integer, ForeignKey("skills.id"), nullable=False)
+    from_user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    to_user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    # Connections are not tied to a skill, so only skill-scoped events carry one
+    skill_id = Column(Integer, ForeignKey("skills.id"), nullable=True)
+    connection_id = Column(Integer, nullable=True, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
-    event_type= Column(String)
\ No newline at end of file
+    event_type= Column(String)
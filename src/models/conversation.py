@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from src.config.database import Base
 from datetime import datetime
@@ -12,7 +12,33 @@ class Conversation(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Denormalized inbox state, maintained by send_message and the mark-read routes.
+    # last_message_at holds the creation time until the first message, so it is never NULL.
+    last_message_id = Column(Integer, nullable=True)
+    last_message_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    user1_unread = Column(Integer, default=0, nullable=False)
+    user2_unread = Column(Integer, default=0, nullable=False)
+    # Read watermarks: each participant has read every message with id <= theirs
+    user1_last_read_id = Column(Integer, default=0, nullable=False)
+    user2_last_read_id = Column(Integer, default=0, nullable=False)
+    # Messages with id <= this have moved to message_archive_segments
+    archived_through_id = Column(Integer, default=0, nullable=False)
+
     # Relationships
     user1 = relationship("User", foreign_keys=[user1_id])
     user2 = relationship("User", foreign_keys=[user2_id])
     messages = relationship("Message", back_populates="conversation", cascade="all, delete-orphan")
+    archive_segments = relationship("MessageArchiveSegment", back_populates="conversation", cascade="all, delete-orphan")
+    last_message = relationship(
+        "Message",
+        primaryjoin="Conversation.last_message_id == Message.id",
+        foreign_keys=[last_message_id],
+        uselist=False,
+        viewonly=True,
+    )
+
+    # The inbox reads each side newest-first straight off these
+    __table_args__ = (
+        Index("ix_conversations_user1_last_message", "user1_id", "last_message_at"),
+        Index("ix_conversations_user2_last_message", "user2_id", "last_message_at"),
+    )
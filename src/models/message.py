@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, Text, Boolean
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Text, Boolean, Index
 from sqlalchemy.orm import relationship
 from src.config.database import Base
 from datetime import datetime
@@ -10,9 +10,17 @@ class Message(Base):
     conversation_id = Column(Integer, ForeignKey("conversations.id"), nullable=False, index=True)
     sender_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     content = Column(Text, nullable=False)
+    # Legacy flag, no longer written: read state comes from the conversation watermarks
     is_read = Column(Boolean, default=False)
     sent_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     conversation = relationship("Conversation", back_populates="messages")
     sender = relationship("User", foreign_keys=[sender_id])
+
+    # History pages are ranges over (conversation_id, id)
+    __table_args__ = (
+        Index("ix_messages_conversation_id_id", "conversation_id", "id"),
+        Index("ix_messages_conversation_updated", "conversation_id", "updated_at"),
+    )
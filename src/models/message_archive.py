@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, LargeBinary, Index
+from sqlalchemy.orm import relationship
+from src.config.database import Base
+from datetime import datetime
+
+class MessageArchiveSegment(Base):
+    """
+    Cold storage for old messages: a run of consecutive messages from one
+    conversation, zlib-compressed JSON in `data`. Segments are append-only
+    and cover ids first_message_id..last_message_id of that conversation.
+    """
+    __tablename__ = "message_archive_segments"
+
+    id = Column(Integer, primary_key=True, index=True)
+    conversation_id = Column(Integer, ForeignKey("conversations.id"), nullable=False)
+    first_message_id = Column(Integer, nullable=False)
+    last_message_id = Column(Integer, nullable=False)
+    message_count = Column(Integer, nullable=False)
+    first_sent_at = Column(DateTime, nullable=True)
+    last_sent_at = Column(DateTime, nullable=True)
+    data = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    conversation = relationship("Conversation", back_populates="archive_segments")
+
+    # History pages find the segments around a cursor by id range
+    __table_args__ = (
+        Index("ix_message_archive_conversation_last", "conversation_id", "last_message_id"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, Text, Boolean, String
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Text, Boolean, String, Index
 from sqlalchemy.orm import relationship
 from src.config.database import Base
 from datetime import datetime
@@ -13,6 +13,12 @@ class Notification(Base):
     is_read = Column(Boolean, default=False)
     related_entity_id = Column(Integer, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     recipient = relationship("User", foreign_keys=[recipient_id])
+
+    # Delta sync reads each user's changes in (updated_at, id) order
+    __table_args__ = (
+        Index("ix_notifications_recipient_updated", "recipient_id", "updated_at", "id"),
+    )
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Text, String
+from src.config.database import Base
+from datetime import datetime
+
+class NotificationOutbox(Base):
+    """Notifications waiting for the outbox worker; rows are deleted once delivered."""
+    __tablename__ = "notification_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    recipient_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    type = Column(String, nullable=False)
+    content = Column(Text, nullable=False)
+    related_entity_id = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    # Set when a worker takes the row; stale claims are retaken after a timeout
+    claim_token = Column(String(32), nullable=True, index=True)
+    claimed_at = Column(DateTime, nullable=True)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, Index
+from sqlalchemy.orm import relationship
+from src.config.database import Base
+from datetime import datetime
+
+class RelatedSkill(Base):
+    __tablename__ = "related_skills"
+
+    skill_id = Column(Integer, ForeignKey("skills.id"), primary_key=True)
+    related_skill_id = Column(Integer, ForeignKey("skills.id"), primary_key=True)
+    rank = Column(Integer, nullable=False) # 1 = closest neighbour
+    score = Column(Float, nullable=False) # cosine similarity of the two skill columns
+    co_count = Column(Integer, nullable=False) # users holding or following both
+    computed_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_related_skills_skill_rank", "skill_id", "rank"),
+    )
+
+    related_skill = relationship("Skill", foreign_keys=[related_skill_id])
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, Enum, String
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Enum, String, Index
 from sqlalchemy.orm import relationship
 from src.config.database import Base
 from datetime import datetime
@@ -22,8 +22,16 @@ class Session(Base):
     end_time = Column(DateTime, nullable=False)
     status = Column(String, default=SessionStatus.PENDING) 
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     requester = relationship("User", foreign_keys=[requester_id])
     provider = relationship("User", foreign_keys=[provider_id])
     skill = relationship("Skill")
+    slots = relationship("SessionSlot", back_populates="session", cascade="all, delete-orphan")
+
+    # Delta sync reads each side's changes by updated_at
+    __table_args__ = (
+        Index("ix_sessions_requester_updated", "requester_id", "updated_at"),
+        Index("ix_sessions_provider_updated", "provider_id", "updated_at"),
+    )
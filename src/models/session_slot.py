@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index, UniqueConstraint
+from sqlalchemy.orm import relationship
+from src.config.database import Base
+
+class SessionSlot(Base):
+    """
+    Interval index over the calendar: one row per participant of each
+    session that still holds its time (not rejected or cancelled).
+    """
+    __tablename__ = "session_slots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(Integer, ForeignKey("sessions.id"), nullable=False, index=True)
+    participant_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    start_time = Column(DateTime, nullable=False)
+    end_time = Column(DateTime, nullable=False)
+
+    session = relationship("Session", back_populates="slots")
+
+    # Conflict checks are a bounded range scan on (participant, start_time)
+    __table_args__ = (
+        Index("ix_session_slots_participant_start", "participant_id", "start_time"),
+        UniqueConstraint("session_id", "participant_id", name="uq_session_slots_session_participant"),
+    )
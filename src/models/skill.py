@@ -12,5 +12,6 @@ class Skill(Base):
     description=Column(String,nullable=False, index=True)
     is_deleted = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from sqlalchemy.orm import relationship
+from src.config.database import Base
+from datetime import datetime
+
+class SkillStats(Base):
+    __tablename__ = "skill_stats"
+
+    skill_id = Column(Integer, ForeignKey("skills.id"), primary_key=True)
+    followers_count = Column(Integer, nullable=False, default=0)
+    teachers_count = Column(Integer, nullable=False, default=0)
+    learners_count = Column(Integer, nullable=False, default=0)
+    popularity = Column(Integer, nullable=False, default=0, index=True) # followers + teachers + learners
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    skill = relationship("Skill")
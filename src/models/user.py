@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Float
 from sqlalchemy.orm import relationship
 from src.config.database import Base
 from datetime import datetime
@@ -14,6 +14,9 @@ class User(Base):
     profile_photo_url = Column(String, nullable=True)
     location_city = Column(String, index=True)
     location_country = Column(String)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    geo_cell = Column(String(12), nullable=True, index=True) # geohash of (latitude, longitude)
     whatsapp_number = Column(String, nullable=True)
     is_active = Column(Boolean, default=True)
     is_superuser = Column(Boolean, default=False)
@@ -14,5 +14,6 @@ class UserPortfolio(Base):
     media_url = Column(String, nullable=True)
     item_type = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     user = relationship("User", back_populates="portfolio_items")
@@ -13,6 +13,7 @@ class UserSkill(Base):
     teaching_style = Column(String)
     experience_note = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     user = relationship(
         "User",
         back_populates="skills"
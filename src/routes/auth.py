@@ -7,6 +7,7 @@ from src.schemas.user import UserCreate, UserRead
 from src.schemas.token import Token, RefreshTokenInput
 from src.auth.jwt import create_access_token, create_refresh_token, verify_token, ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_DAYS
 from src.routes.users import hash_password, verify_password
+from src.services.geo import apply_location, geo_index
 from datetime import timedelta
 from jose import jwt, JWTError
 import os
@@ -37,10 +38,12 @@ def register(user_in: UserCreate, db: Session = Depends(get_db)):
         is_active=True,
         is_superuser=user_in.is_superuser if hasattr(user_in, 'is_superuser') else False,
     )
+    apply_location(user, user_in.latitude, user_in.longitude)
 
     db.add(user)
     db.commit()
     db.refresh(user)
+    geo_index.update(user.id, user.latitude, user.longitude)
     return user
 
 @router.post("/login", response_model=Token)
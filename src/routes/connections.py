@@ -1,15 +1,77 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy import update
+from sqlalchemy.orm import Session, aliased, selectinload
+from typing import List, Optional, Union
 
 from src.config.database import get_db
 from src.models import Connection, User, ConnectionStatus
-from src.schemas.connection import ConnectionCreate, ConnectionRead, ConnectionUpdate
+from src.schemas.connection import (
+    ConnectionCreate, ConnectionRead, ConnectionSlimRead, ConnectionUpdate, ConnectionBulkUpdate, ConnectionBulkReport
+)
 from src.routes.users import get_current_user
-from src.routes.notifications import create_notification_internal
+from src.routes.notifications import create_notification_internal, create_notifications_bulk
+from src.schemas.connection_event import ConnectionEventType, ConnectionEventPage
+from src.services.connection_events import connection_event_writer, read_events
 
 router = APIRouter(prefix="/connections", tags=["Connections"])
 
+MAX_BULK_IDS = 500
+MAX_EVENT_PAGE = 1000
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+SLIM_USER_FIELDS = ("id", "name", "profile_photo_url", "location_city")
+
+
+def _connection_page(query, response: Response, cursor: Optional[int], limit: int, fields: str):
+    """
+    One page of connections, newest first, keyed on id so later pages cost the
+    same as the first. The next cursor goes in X-Next-Cursor while the body
+    stays a plain list. "full" loads both users with one selectinload query;
+    "slim" joins them and reads only SLIM_USER_FIELDS in a single query.
+    """
+    if cursor is not None:
+        query = query.filter(Connection.id < cursor)
+    if fields == "slim":
+        Requester, Recipient = aliased(User), aliased(User)
+        rows = (
+            query.join(Requester, Connection.requester_id == Requester.id)
+            .join(Recipient, Connection.recipient_id == Recipient.id)
+            .order_by(Connection.id.desc())
+            .limit(limit + 1)
+            .with_entities(
+                Connection.id, Connection.requester_id, Connection.recipient_id, Connection.status,
+                Connection.created_at, Connection.updated_at,
+                *[getattr(Requester, f) for f in SLIM_USER_FIELDS],
+                *[getattr(Recipient, f) for f in SLIM_USER_FIELDS],
+            )
+            .all()
+        )
+        n = len(SLIM_USER_FIELDS)
+        items = [
+            {
+                "id": row[0], "requester_id": row[1], "recipient_id": row[2], "status": row[3],
+                "created_at": row[4], "updated_at": row[5],
+                "requester": dict(zip(SLIM_USER_FIELDS, row[6:6 + n])),
+                "recipient": dict(zip(SLIM_USER_FIELDS, row[6 + n:])),
+            }
+            for row in rows
+        ]
+    else:
+        items = (
+            query.options(selectinload(Connection.requester), selectinload(Connection.recipient))
+            .order_by(Connection.id.desc())
+            .limit(limit + 1)
+            .all()
+        )
+
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        response.headers["X-Next-Cursor"] = str(last["id"] if fields == "slim" else last.id)
+    return items
+
 @router.post("/", response_model=ConnectionRead, status_code=status.HTTP_201_CREATED)
 def send_connection_request(
     payload: ConnectionCreate,
@@ -40,6 +102,9 @@ def send_connection_request(
              existing.recipient_id = payload.recipient_id
              db.commit()
              db.refresh(existing)
+             connection_event_writer.record(
+                 ConnectionEventType.request, current_user.id, payload.recipient_id, connection_id=existing.id
+             )
              return existing
         
     new_connection = Connection(
@@ -48,10 +113,9 @@ def send_connection_request(
         status=ConnectionStatus.PENDING
     )
     db.add(new_connection)
-    db.commit()
-    db.refresh(new_connection)
-    
-    # Notify recipient
+    db.flush()
+
+    # Notify recipient; the outbox row commits together with the connection
     create_notification_internal(
         db=db,
         recipient_id=payload.recipient_id,
@@ -59,6 +123,11 @@ def send_connection_request(
         content=f"{current_user.name} sent you a connection request.",
         related_entity_id=new_connection.id
     )
+    db.commit()
+    db.refresh(new_connection)
+    connection_event_writer.record(
+        ConnectionEventType.request, current_user.id, payload.recipient_id, connection_id=new_connection.id
+    )
     
     return new_connection
 
@@ -77,8 +146,12 @@ def cancel_connection_request(
     if not connection:
         raise HTTPException(status_code=404, detail="Pending connection request not found")
         
+    recipient_id = connection.recipient_id
     db.delete(connection)
     db.commit()
+    connection_event_writer.record(
+        ConnectionEventType.cancelled, current_user.id, recipient_id, connection_id=connection_id
+    )
 
 @router.delete("/{connection_id}", status_code=status.HTTP_204_NO_CONTENT)
 def remove_connection(
@@ -95,18 +168,137 @@ def remove_connection(
     if not connection:
         raise HTTPException(status_code=404, detail="Connection not found")
         
+    other_id = connection.recipient_id if connection.requester_id == current_user.id else connection.requester_id
     db.delete(connection)
     db.commit()
+    connection_event_writer.record(ConnectionEventType.removed, current_user.id, other_id, connection_id=connection_id)
 
-@router.get("/requests", response_model=List[ConnectionRead])
+@router.get("/requests", response_model=Union[List[ConnectionRead], List[ConnectionSlimRead]])
 def get_pending_requests(
+    response: Response,
+    cursor: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: str = Query("full", regex="^(full|slim)$"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    return db.query(Connection).filter(
+    query = db.query(Connection).filter(
         Connection.recipient_id == current_user.id,
         Connection.status == ConnectionStatus.PENDING
-    ).all()
+    )
+    return _connection_page(query, response, cursor, limit, fields)
+
+@router.get("/events", response_model=ConnectionEventPage)
+def get_connection_events(
+    after: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_EVENT_PAGE),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Read the connection event log from an offset (an event id). Pass the
+    returned next_offset back as `after` to continue. Superusers read every
+    event; other users only events they are part of.
+
+    Delivery is at-least-once: events appear once settled (a few seconds
+    after they happen) so late commits are not skipped, but consumers should
+    still apply them idempotently by id, e.g. when a response is lost and
+    the same offset is read again.
+    """
+    user_id = None if current_user.is_superuser else current_user.id
+    events = read_events(db, after=after, limit=limit, user_id=user_id)
+    return {"events": events, "next_offset": events[-1].id if events else after}
+
+@router.put("/bulk", response_model=ConnectionBulkReport)
+def bulk_update_connection_status(
+    payload: ConnectionBulkUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Accept or reject many pending requests at once: one ownership query,
+    one UPDATE, one outbox insert and a single commit. Only the rows the
+    guarded UPDATE actually changed count as updated, so a request answered
+    concurrently is reported as not_pending and gets no notification or event.
+    """
+    if payload.status not in [ConnectionStatus.ACCEPTED, ConnectionStatus.REJECTED]:
+        raise HTTPException(status_code=400, detail="Invalid status update")
+
+    ids = list(dict.fromkeys(payload.ids))
+    if not ids:
+        raise HTTPException(status_code=400, detail="No connection ids given")
+    if len(ids) > MAX_BULK_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_IDS} ids per request")
+
+    found = {
+        row.id: row
+        for row in db.query(Connection.id, Connection.requester_id, Connection.recipient_id, Connection.status)
+        .filter(Connection.id.in_(ids))
+    }
+
+    eligible = [
+        connection_id for connection_id, row in found.items()
+        if row.recipient_id == current_user.id and row.status == ConnectionStatus.PENDING
+    ]
+    changed = set()
+    if eligible:
+        # Same guards as the classification, so a request answered concurrently is not overwritten;
+        # RETURNING tells us which rows this statement really changed
+        changed = set(db.execute(
+            update(Connection)
+            .where(
+                Connection.id.in_(eligible),
+                Connection.recipient_id == current_user.id,
+                Connection.status == ConnectionStatus.PENDING,
+            )
+            .values(status=payload.status, updated_at=datetime.utcnow())
+            .returning(Connection.id),
+            execution_options={"synchronize_session": False},
+        ).scalars())
+
+    # Rows that lost a race since the first read are reported in their current state
+    missed = [connection_id for connection_id in eligible if connection_id not in changed]
+    if missed:
+        for connection_id in missed:
+            # A request cancelled in the meantime is gone and reads as not_found
+            del found[connection_id]
+        found.update({
+            row.id: row
+            for row in db.query(Connection.id, Connection.requester_id, Connection.recipient_id, Connection.status)
+            .filter(Connection.id.in_(missed))
+        })
+
+    results = []
+    for connection_id in ids:
+        row = found.get(connection_id)
+        if connection_id in changed:
+            results.append({"id": connection_id, "result": "updated", "status": payload.status})
+        elif not row:
+            results.append({"id": connection_id, "result": "not_found"})
+        elif row.recipient_id != current_user.id:
+            results.append({"id": connection_id, "result": "forbidden"})
+        else:
+            results.append({"id": connection_id, "result": "not_pending", "status": row.status})
+
+    updated = [connection_id for connection_id in ids if connection_id in changed]
+    if updated and payload.status == ConnectionStatus.ACCEPTED:
+        create_notifications_bulk(db, [
+            {
+                "recipient_id": found[connection_id].requester_id,
+                "type": "connection_accepted",
+                "content": f"{current_user.name} accepted your connection request.",
+                "related_entity_id": connection_id,
+            }
+            for connection_id in updated
+        ])
+    db.commit()
+
+    for connection_id in updated:
+        connection_event_writer.record(
+            payload.status.value, current_user.id, found[connection_id].requester_id, connection_id=connection_id
+        )
+
+    return {"updated": len(updated), "results": results}
 
 @router.put("/{connection_id}", response_model=ConnectionRead)
 def update_connection_status(
@@ -128,11 +320,18 @@ def update_connection_status(
     connection.status = payload.status
     db.commit()
     db.refresh(connection)
+    connection_event_writer.record(
+        payload.status.value, current_user.id, connection.requester_id, connection_id=connection.id
+    )
     return connection
 
-@router.get("/", response_model=List[ConnectionRead])
+@router.get("/", response_model=Union[List[ConnectionRead], List[ConnectionSlimRead]])
 def get_connections(
+    response: Response,
     type: str = Query("accepted", regex="^(accepted|pending|sent)$"),
+    cursor: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: str = Query("full", regex="^(full|slim)$"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -156,4 +355,4 @@ def get_connections(
             Connection.status == ConnectionStatus.PENDING
         )
         
-    return query.all()
+    return _connection_page(query, response, cursor, limit, fields)
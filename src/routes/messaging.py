@@ -1,20 +1,102 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, case, func, or_, select, union_all
+from sqlalchemy.orm import Session, selectinload
+from typing import Dict, List, Optional
 from datetime import datetime
 
-from src.config.database import get_db
+from src.config.database import SessionLocal, get_db
 from src.models.user import User
 from src.models.conversation import Conversation
 from src.models.message import Message
-from src.routes.users import get_current_user
-from src.schemas.messaging import ConversationRead, ConversationCreate, MessageRead, MessageCreate
+from src.routes.users import get_current_user, get_active_user_id
+from src.schemas.messaging import ConversationRead, ConversationCreate, MessageRead, MessageCreate, MessageSearchPage
+from src.services.message_archive import (
+    archived_before, archived_from, find_archived_message, first_archived_unread, has_archived_before
+)
+from src.services.message_search import decode_cursor, encode_cursor, search_messages
+from src.services.realtime import Subscription, broker, publish_to_users, user_channel
 
 router = APIRouter(prefix="/messaging", tags=["Messaging"]) # Changed prefix to /messaging to avoid conflict or clarify? Plan said /conversations and /messages. Let's stick to Plan but maybe group under messaging tag.
 
 # Let's use /conversations for conversation management
 # and /messages for sending? Or keep them all under one router.
 
+DEFAULT_INBOX_SIZE = 50
+MAX_INBOX_SIZE = 200
+DEFAULT_MESSAGE_PAGE = 50
+MAX_MESSAGE_PAGE = 200
+DEFAULT_SEARCH_PAGE = 20
+MAX_SEARCH_PAGE = 50
+
+
+def _unread_column(conversation: Conversation, user_id: int):
+    """The counter of unread messages for user_id's side of the conversation."""
+    return Conversation.user1_unread if conversation.user1_id == user_id else Conversation.user2_unread
+
+
+def _watermark_column(conversation: Conversation, user_id: int):
+    """user_id's read watermark column on the conversation."""
+    return Conversation.user1_last_read_id if conversation.user1_id == user_id else Conversation.user2_last_read_id
+
+
+def _watermark(conversation: Conversation, user_id: int) -> int:
+    return (conversation.user1_last_read_id if conversation.user1_id == user_id else conversation.user2_last_read_id) or 0
+
+
+def apply_read_state(db: Session, messages, read_up_to):
+    """
+    Set is_read on loaded messages from the recipient's watermark instead of
+    the per-message flag. read_up_to(message) gives that watermark. Messages
+    are detached first so the derived value is never flushed back.
+    """
+    for message in messages:
+        if message in db:
+            db.expunge(message)
+        message.is_read = message.id <= (read_up_to(message) or 0)
+    return messages
+
+
+def apply_conversation_read_state(db: Session, messages, conversations: Dict[int, Conversation]):
+    """apply_read_state for messages whose conversations are loaded, keyed by id."""
+    def recipient_watermark(message):
+        # A message is read once the participant who did not send it has passed it
+        conversation = conversations[message.conversation_id]
+        if message.sender_id == conversation.user1_id:
+            return conversation.user2_last_read_id
+        return conversation.user1_last_read_id
+    return apply_read_state(db, messages, recipient_watermark)
+
+
+def _conversation_read_state(db: Session, messages, conversation: Conversation):
+    return apply_conversation_read_state(db, messages, {conversation.id: conversation})
+
+
+def _message_event(message: Message) -> dict:
+    return {
+        "type": "message",
+        "message": {
+            "id": message.id,
+            "conversation_id": message.conversation_id,
+            "sender_id": message.sender_id,
+            "content": message.content,
+            "is_read": message.is_read,
+            "sent_at": message.sent_at.isoformat(),
+        },
+    }
+
+
+def _parse_inbox_cursor(cursor: Optional[str]):
+    if not cursor:
+        return None
+    try:
+        at, conversation_id = cursor.rsplit("_", 1)
+        return datetime.fromisoformat(at), int(conversation_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @router.post("/conversations", response_model=ConversationRead, status_code=status.HTTP_201_CREATED)
 def start_conversation(
     payload: ConversationCreate,
@@ -45,19 +127,59 @@ def start_conversation(
 
 @router.get("/conversations", response_model=List[ConversationRead])
 def get_my_conversations(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_INBOX_SIZE, ge=1, le=MAX_INBOX_SIZE),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    # Fetch conversations where I am user1 or user2
-    conversations = db.query(Conversation).filter(
-        (Conversation.user1_id == current_user.id) | (Conversation.user2_id == current_user.id)
-    ).order_by(Conversation.updated_at.desc()).all()
-    
-    # We need to populate last_message manually or via join if not eager loaded
-    # Pydantic schema expects last_message. 
-    # Let's let helper method or Pydantic allow None, but valid UI needs it.
-    # For now, simplistic approach.
-    
+    """
+    Inbox, most recent activity first. Each side (me as user1, me as user2)
+    is read newest-first off its (user, last_message_at) index and capped at
+    the page size, then merged; participants and last messages come in via
+    selectinload, so the query count does not grow with the page. The next
+    cursor is returned in X-Next-Cursor.
+    """
+    after = _parse_inbox_cursor(cursor)
+
+    def side(column):
+        query = select(Conversation.id.label("id")).where(column == current_user.id)
+        if after:
+            at, conversation_id = after
+            query = query.where(or_(
+                Conversation.last_message_at < at,
+                and_(Conversation.last_message_at == at, Conversation.id < conversation_id),
+            ))
+        return query.order_by(Conversation.last_message_at.desc(), Conversation.id.desc()).limit(limit + 1).subquery()
+
+    page_ids = union_all(select(side(Conversation.user1_id)), select(side(Conversation.user2_id))).subquery()
+    conversations = (
+        db.query(Conversation)
+        .join(page_ids, Conversation.id == page_ids.c.id)
+        .options(
+            selectinload(Conversation.user1),
+            selectinload(Conversation.user2),
+            selectinload(Conversation.last_message),
+        )
+        .order_by(Conversation.last_message_at.desc(), Conversation.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+
+    if len(conversations) > limit:
+        conversations = conversations[:limit]
+        last = conversations[-1]
+        response.headers["X-Next-Cursor"] = f"{last.last_message_at.isoformat()}_{last.id}"
+
+    for conversation in conversations:
+        peer_id = conversation.user2_id if conversation.user1_id == current_user.id else conversation.user1_id
+        conversation.unread_count = (
+            conversation.user1_unread if conversation.user1_id == current_user.id else conversation.user2_unread
+        )
+        conversation.last_read_message_id = _watermark(conversation, current_user.id)
+        conversation.peer_last_read_message_id = _watermark(conversation, peer_id)
+        if conversation.last_message is not None:
+            _conversation_read_state(db, [conversation.last_message], conversation)
     return conversations
 
 @router.post("/messages", response_model=MessageRead, status_code=status.HTTP_201_CREATED)
@@ -80,20 +202,41 @@ def send_message(
         content=payload.content
     )
     db.add(message)
-    
-    # Update conversation updated_at
-    conversation.updated_at = datetime.utcnow()
+    db.flush()
+
+    # Denormalized inbox state; the recipient's counter is bumped relatively so concurrent sends add up
+    recipient_unread = Conversation.user2_unread if conversation.user1_id == current_user.id else Conversation.user1_unread
+    db.query(Conversation).filter(Conversation.id == conversation.id).update({
+        Conversation.last_message_id: message.id,
+        Conversation.last_message_at: message.sent_at,
+        Conversation.updated_at: datetime.utcnow(),
+        recipient_unread: recipient_unread + 1,
+    }, synchronize_session=False)
     
     db.commit()
     db.refresh(message)
+    publish_to_users([conversation.user1_id, conversation.user2_id], _message_event(message))
     return message
 
 @router.get("/conversations/{conversation_id}/messages", response_model=List[MessageRead])
 def get_messages(
     conversation_id: int,
+    response: Response,
+    before: Optional[int] = None,
+    after: Optional[int] = None,
+    anchor: Optional[str] = Query(None, regex="^first_unread$"),
+    limit: int = Query(DEFAULT_MESSAGE_PAGE, ge=1, le=MAX_MESSAGE_PAGE),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    """
+    One page of history, oldest first. With no cursor it is the latest page;
+    `before=<id>` pages back, `after=<id>` fetches what arrived since (the
+    delta a client polls for), and `anchor=first_unread` starts at my first
+    unread message (X-First-Unread-Id) or falls back to the latest page.
+    X-Before-Cursor / X-After-Cursor are set while older / newer messages remain.
+    Pages that reach past the hot table carry on into the message archive.
+    """
     conversation = db.query(Conversation).filter(Conversation.id == conversation_id).first()
     if not conversation:
         raise HTTPException(status_code=404, detail="Conversation not found")
@@ -101,19 +244,120 @@ def get_messages(
     if conversation.user1_id != current_user.id and conversation.user2_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not a participant")
         
-    messages = db.query(Message).filter(
-        Message.conversation_id == conversation.id
-    ).order_by(Message.sent_at.asc()).all()
-    
-    return messages
+    if sum(x is not None for x in (before, after, anchor)) > 1:
+        raise HTTPException(status_code=400, detail="Use only one of before, after and anchor")
+
+    history = db.query(Message).filter(Message.conversation_id == conversation.id)
+    # Every archived id is below every hot one, so the archive simply continues the history downwards
+    archived_through = conversation.archived_through_id or 0
+
+    start = None
+    if after is not None:
+        start = after + 1
+    elif anchor:
+        read_up_to = _watermark(conversation, current_user.id)
+        if read_up_to < archived_through:
+            start = first_archived_unread(db, conversation.id, read_up_to, current_user.id)
+        if start is None:
+            start = history.filter(
+                Message.sender_id != current_user.id,
+                Message.id > read_up_to
+            ).with_entities(func.min(Message.id)).scalar()
+        if start is not None:
+            response.headers["X-First-Unread-Id"] = str(start)
+
+    if start is not None:
+        messages = archived_from(db, conversation.id, start, limit + 1) if start <= archived_through else []
+        if len(messages) <= limit:
+            messages += history.filter(Message.id >= start).order_by(Message.id.asc()).limit(limit + 1 - len(messages)).all()
+        has_newer = len(messages) > limit
+        messages = messages[:limit]
+        has_older = bool(messages) and (
+            db.query(history.filter(Message.id < messages[0].id).exists()).scalar()
+            or has_archived_before(db, conversation.id, messages[0].id)
+        )
+    else:
+        if before is not None:
+            history = history.filter(Message.id < before)
+        messages = history.order_by(Message.id.desc()).limit(limit + 1).all()
+        if len(messages) <= limit and archived_through:
+            messages += archived_before(
+                db, conversation.id, messages[-1].id if messages else before, limit + 1 - len(messages)
+            )
+        has_older = len(messages) > limit
+        messages = messages[:limit][::-1]
+        has_newer = bool(messages) and before is not None and db.query(
+            db.query(Message).filter(Message.conversation_id == conversation.id, Message.id > messages[-1].id).exists()
+        ).scalar()
+
+    if has_older:
+        response.headers["X-Before-Cursor"] = str(messages[0].id)
+    if has_newer:
+        response.headers["X-After-Cursor"] = str(messages[-1].id)
+    return _conversation_read_state(db, messages, conversation)
+
+@router.get("/search", response_model=MessageSearchPage)
+def search_my_messages(
+    q: str = Query(..., min_length=1, max_length=200),
+    conversation_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_SEARCH_PAGE, ge=1, le=MAX_SEARCH_PAGE),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Full-text search over my conversations, best match first, with a
+    highlighted snippet per hit. Runs on the database's own index (Postgres
+    GIN over to_tsvector, SQLite FTS5); pass next_cursor back to page on.
+    Only the hot table is indexed, so archived messages are not searched.
+    """
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    try:
+        hits = search_messages(db, current_user.id, q, limit, after=after, conversation_id=conversation_id)
+    except NotImplementedError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    next_cursor = None
+    if len(hits) > limit:
+        hits = hits[:limit]
+        next_cursor = encode_cursor(hits[-1]["score"], hits[-1]["id"])
+    if not hits:
+        return {"results": [], "next_cursor": None}
+
+    messages = {m.id: m for m in db.query(Message).filter(Message.id.in_([h["id"] for h in hits]))}
+    conversations = {
+        c.id: c for c in db.query(Conversation).filter(
+            Conversation.id.in_({m.conversation_id for m in messages.values()})
+        )
+    }
+    apply_conversation_read_state(db, messages.values(), conversations)
+    return {
+        "results": [
+            {"message": messages[h["id"]], "snippet": h["snippet"], "score": h["score"]}
+            for h in hits if h["id"] in messages
+        ],
+        "next_cursor": next_cursor,
+    }
 
 @router.put("/messages/{message_id}/read", response_model=MessageRead)
 def mark_message_read(
     message_id: int,
+    conversation_id: Optional[int] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    message = db.query(Message).filter(Message.id == message_id).first()
+    """
+    Read this message and everything before it. Archived messages are found
+    among my conversations; passing conversation_id narrows that to one.
+    """
+    message = db.query(Message).filter(Message.id == message_id).first() or find_archived_message(
+        db, message_id, current_user.id, conversation_id
+    )
     if not message:
         raise HTTPException(status_code=404, detail="Message not found")
         
@@ -147,10 +391,29 @@ def mark_message_read(
         # Unless it's a "note to self"? No, conversation is between 2 ppl.
         raise HTTPException(status_code=400, detail="Cannot mark your own message as read")
 
-    message.is_read = True
+    # Reading a message reads everything before it: advance my watermark (never backwards)
+    # and recount what is still unread above it, all in one single-row UPDATE
+    watermark = _watermark_column(conversation, current_user.id)
+    read_up_to = max(_watermark(conversation, current_user.id), message.id)
+    still_unread = select(func.count(Message.id)).where(
+        Message.conversation_id == conversation.id,
+        Message.sender_id != current_user.id,
+        Message.id > read_up_to
+    ).scalar_subquery()
+    db.query(Conversation).filter(Conversation.id == conversation.id).update({
+        watermark: case((watermark < message.id, message.id), else_=watermark),
+        _unread_column(conversation, current_user.id): still_unread,
+    }, synchronize_session=False)
     db.commit()
-    db.refresh(message)
-    return message
+    if message in db:
+        db.refresh(message)
+    publish_to_users([conversation.user1_id, conversation.user2_id], {
+        "type": "read",
+        "conversation_id": conversation.id,
+        "reader_id": current_user.id,
+        "last_read_message_id": read_up_to,
+    })
+    return apply_read_state(db, [message], lambda m: read_up_to)[0]
 
 @router.put("/conversations/{conversation_id}/read", status_code=status.HTTP_200_OK)
 def mark_conversation_read(
@@ -165,14 +428,21 @@ def mark_conversation_read(
     if conversation.user1_id != current_user.id and conversation.user2_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not a participant")
 
-    # Update all messages in this conversation where sender != current_user AND is_read = False
-    db.query(Message).filter(
-        Message.conversation_id == conversation.id,
-        Message.sender_id != current_user.id,
-        Message.is_read == False
-    ).update({Message.is_read: True}, synchronize_session=False)
+    # One single-row UPDATE however much was unread: move my watermark to the
+    # latest message (read in the same statement, so a concurrent send is not skipped)
+    db.query(Conversation).filter(Conversation.id == conversation.id).update({
+        _watermark_column(conversation, current_user.id): func.coalesce(Conversation.last_message_id, 0),
+        _unread_column(conversation, current_user.id): 0,
+    }, synchronize_session=False)
     
     db.commit()
+    db.refresh(conversation)
+    publish_to_users([conversation.user1_id, conversation.user2_id], {
+        "type": "read",
+        "conversation_id": conversation.id,
+        "reader_id": current_user.id,
+        "last_read_message_id": _watermark(conversation, current_user.id),
+    })
     return {"message": "Conversation marked as read"}
 
 @router.get("/unread-count")
@@ -180,16 +450,97 @@ def get_unread_count(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    # Count messages where sender != current_user and is_read = False
+    # Count messages where sender != current_user and not yet read
     # and I am a participant in the conversation basically check all messages 
     # sent TO me. 
     # Since Message doesn't permit explicit "recipient_id" column (it infers from conversation),
     # we logic: Join Conversation, check if I am user1 or user2, and sender_id != me.
     
-    count = db.query(Message).join(Conversation).filter(
-        (Conversation.user1_id == current_user.id) | (Conversation.user2_id == current_user.id),
-        Message.sender_id != current_user.id,
-        Message.is_read == False
-    ).count()
+    # Now read from the per-participant counters on conversations instead of scanning messages
+    count = db.query(func.coalesce(func.sum(
+        case((Conversation.user1_id == current_user.id, Conversation.user1_unread), else_=Conversation.user2_unread)
+    ), 0)).filter(
+        (Conversation.user1_id == current_user.id) | (Conversation.user2_id == current_user.id)
+    ).scalar()
     
     return {"unread_count": count}
+
+
+def _conversation_peer(conversation_id: int, user_id: int) -> Optional[int]:
+    db = SessionLocal()
+    try:
+        conversation = db.query(Conversation.user1_id, Conversation.user2_id).filter(
+            Conversation.id == conversation_id
+        ).first()
+    finally:
+        db.close()
+    if not conversation or user_id not in conversation:
+        return None
+    return conversation.user2_id if conversation.user1_id == user_id else conversation.user1_id
+
+
+@router.websocket("/ws")
+async def messaging_socket(websocket: WebSocket, token: Optional[str] = None):
+    """
+    Push channel for new messages, read receipts and typing events, so
+    clients stop polling. Authenticate with the access token as `?token=`
+    (browsers cannot set headers on a WebSocket) or a Bearer header.
+    Clients send {"type": "typing", "conversation_id": id}. A socket that
+    falls SUBSCRIBER_QUEUE_SIZE events behind is closed with 1013 and should
+    resync over the REST cursors before reconnecting.
+    """
+    if token is None:
+        authorization = websocket.headers.get("authorization", "")
+        if authorization.lower().startswith("bearer "):
+            token = authorization[7:]
+    user_id = await run_in_threadpool(get_active_user_id, token)
+    if user_id is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    subscription = Subscription(asyncio.get_running_loop())
+    channel = user_channel(user_id)
+    broker.subscribe(channel, subscription)
+
+    async def pump():
+        while True:
+            event = await subscription.queue.get()
+            if subscription.overflowed:
+                await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+                return
+            await websocket.send_json(event)
+
+    sender = asyncio.create_task(pump())
+    # Peers are looked up once per conversation for the life of the socket
+    peers: Dict[int, Optional[int]] = {}
+    try:
+        while True:
+            try:
+                data = json.loads(await websocket.receive_text())
+            except ValueError:
+                await websocket.send_json({"type": "error", "detail": "Invalid JSON"})
+                continue
+
+            if not isinstance(data, dict) or data.get("type") != "typing":
+                await websocket.send_json({"type": "error", "detail": "Unsupported event"})
+                continue
+            conversation_id = data.get("conversation_id")
+            if not isinstance(conversation_id, int):
+                await websocket.send_json({"type": "error", "detail": "conversation_id is required"})
+                continue
+            if conversation_id not in peers:
+                peers[conversation_id] = await run_in_threadpool(_conversation_peer, conversation_id, user_id)
+            peer = peers[conversation_id]
+            if peer is None:
+                await websocket.send_json({"type": "error", "detail": "Not a participant"})
+                continue
+            await run_in_threadpool(
+                broker.publish, user_channel(peer),
+                {"type": "typing", "conversation_id": conversation_id, "user_id": user_id},
+            )
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        broker.unsubscribe(channel, subscription)
+        sender.cancel()
@@ -1,15 +1,71 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import json
+import os
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session as DBSession
-from typing import List
+from typing import List, Optional
 
-from src.config.database import get_db
+from src.config.database import SessionLocal, get_db
 from src.models.user import User
 from src.models.notification import Notification
-from src.schemas.notification import NotificationRead
-from src.routes.users import get_current_user
+from src.schemas.notification import NotificationRead, NotificationOutboxMetrics
+from src.routes.users import get_current_user, get_active_user_id
+from src.services.notification_outbox import OUTBOX_BATCH_SIZE, OUTBOX_WORKERS, enqueue_notifications, outbox_worker
+from src.services.realtime import Subscription, broker, user_channel
 
 router = APIRouter(prefix="/notifications", tags=["Notifications"])
 
+SSE_HEARTBEAT_SECONDS = int(os.getenv("SSE_HEARTBEAT_SECONDS", 15))
+# Notifications written to one stream per DB read; a long backlog goes out in several
+SSE_BATCH_SIZE = 100
+# Ids are taken before commit, so a lower one can appear after a higher one was
+# sent. At most every worker's batch is in flight at once; each read also looks
+# back this many ids and sends what it has not sent yet.
+SSE_OVERLAP_IDS = int(os.getenv("SSE_OVERLAP_IDS", OUTBOX_WORKERS * OUTBOX_BATCH_SIZE))
+
+
+def _latest_notification_ids(user_id: int) -> List[int]:
+    """The user's notification ids within SSE_OVERLAP_IDS of their latest, ascending."""
+    db = SessionLocal()
+    try:
+        latest = db.query(func.max(Notification.id)).filter(Notification.recipient_id == user_id).scalar() or 0
+        rows = db.query(Notification.id).filter(
+            Notification.recipient_id == user_id,
+            Notification.id > latest - SSE_OVERLAP_IDS,
+        ).order_by(Notification.id.asc()).all()
+        return [row.id for row in rows] or [0]
+    finally:
+        db.close()
+
+
+def _notifications_after(user_id: int, after_id: int, up_to: Optional[int] = None,
+                         limit: Optional[int] = SSE_BATCH_SIZE) -> List[dict]:
+    db = SessionLocal()
+    try:
+        query = db.query(Notification).filter(
+            Notification.recipient_id == user_id,
+            Notification.id > after_id
+        )
+        if up_to is not None:
+            query = query.filter(Notification.id <= up_to)
+        rows = query.order_by(Notification.id.asc()).limit(limit).all()
+        return [
+            {
+                "id": n.id,
+                "type": n.type,
+                "content": n.content,
+                "is_read": n.is_read,
+                "created_at": n.created_at.isoformat(),
+                "related_entity_id": n.related_entity_id,
+            }
+            for n in rows
+        ]
+    finally:
+        db.close()
+
 @router.get("/", response_model=List[NotificationRead])
 def get_my_notifications(
     limit: int = 20,
@@ -22,6 +78,105 @@ def get_my_notifications(
     ).order_by(Notification.created_at.desc()).offset(skip).limit(limit).all()
     return notifications
 
+@router.get("/stream")
+async def stream_notifications(
+    request: Request,
+    token: Optional[str] = None,
+    authorization: Optional[str] = Header(None),
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    Server-Sent Events feed of my new notifications. The event id is the
+    highest notification id sent so far, so a reconnect with Last-Event-ID
+    (or ?last_event_id=) resumes where it stopped. EventSource cannot set
+    headers, so the access token may also be passed as `?token=`.
+
+    Delivery is at-least-once. A notification whose id is below one already
+    sent (it committed late) still goes out, and a resumed stream resends
+    the last SSE_OVERLAP_IDS ids' worth, so clients dedupe on the `id`
+    field of each notification's data.
+
+    A stream is an idle coroutine until the outbox worker publishes a wake-up
+    for its user, then reads what is new in one query. Wake-ups that arrive
+    while a slow client is still being written to collapse into that next
+    read, so per-connection memory stays bounded. A comment line goes out
+    every SSE_HEARTBEAT_SECONDS to keep proxies from closing the stream.
+    """
+    if token is None and authorization and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    user_id = await run_in_threadpool(get_active_user_id, token)
+    if user_id is None:
+        raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
+
+    resume_from = last_event_id or request.query_params.get("last_event_id")
+    try:
+        cursor = int(resume_from) if resume_from else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+
+    subscription = Subscription(asyncio.get_running_loop())
+    channel = user_channel(user_id)
+    broker.subscribe(channel, subscription)
+
+    async def events():
+        nonlocal cursor
+        # Ids sent within SSE_OVERLAP_IDS of the cursor, so a look-back read skips them
+        sent = set()
+        try:
+            if cursor is None:
+                sent.update(await run_in_threadpool(_latest_notification_ids, user_id))
+                cursor = max(sent)
+            yield f"retry: 5000\nid: {cursor}\n\n"
+            pending = True # catch up on anything since Last-Event-ID
+            while True:
+                if pending:
+                    late = await run_in_threadpool(
+                        _notifications_after, user_id, cursor - SSE_OVERLAP_IDS, cursor, None
+                    )
+                    for item in late:
+                        if item["id"] not in sent:
+                            sent.add(item["id"])
+                            yield f"id: {cursor}\nevent: notification\ndata: {json.dumps(item)}\n\n"
+                while pending:
+                    batch = await run_in_threadpool(_notifications_after, user_id, cursor)
+                    for item in batch:
+                        cursor = item["id"]
+                        sent.add(cursor)
+                        yield f"id: {cursor}\nevent: notification\ndata: {json.dumps(item)}\n\n"
+                    pending = len(batch) == SSE_BATCH_SIZE
+                sent = {i for i in sent if i > cursor - SSE_OVERLAP_IDS}
+
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+
+                # Anything queued meanwhile is covered by the same read
+                woken = event.get("type") in ("notification", "overflow")
+                while not subscription.queue.empty():
+                    woken = subscription.queue.get_nowait().get("type") in ("notification", "overflow") or woken
+                subscription.overflowed = False
+                pending = woken
+        finally:
+            broker.unsubscribe(channel, subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/outbox/metrics", response_model=NotificationOutboxMetrics)
+def get_outbox_metrics(
+    db: DBSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Outbox backlog and delivery lag for this worker process."""
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Only superusers can view outbox metrics")
+    return outbox_worker.metrics(db)
+
 @router.put("/{notification_id}/read", status_code=status.HTTP_204_NO_CONTENT)
 def mark_notification_as_read(
     notification_id: int,
@@ -47,17 +202,22 @@ def create_notification_internal(
     content: str,
     related_entity_id: int = None
 ):
-    notif = Notification(
-        recipient_id=recipient_id,
-        type=type,
-        content=content,
-        related_entity_id=related_entity_id,
-        is_read=False
-    )
-    db.add(notif)
-    db.commit() # Internal usage might need commit or flush depending on transaction scope. 
-    # For simplicity, we commit here, but ideally we should let caller commit if part of bigger transaction.
-    # But this function creates a session side-effect, so it's okay to commit if isolated.
-    # If called within another route that has uncommitted changes, validation might fail if DB is strict.
-    # Let's assume standalone or safe validation.
-    return notif
+    """
+    Queue a notification in the caller's transaction via the outbox; it is
+    delivered by the outbox worker once the caller commits.
+    """
+    enqueue_notifications(db, [{
+        "recipient_id": recipient_id,
+        "type": type,
+        "content": content,
+        "related_entity_id": related_entity_id,
+    }])
+
+
+def create_notifications_bulk(db: DBSession, notifications: List[dict]):
+    """
+    Queue many notifications with one executemany outbox insert. Each dict
+    has recipient_id, type, content and optionally related_entity_id.
+    Does not commit: the rows join the caller's transaction.
+    """
+    enqueue_notifications(db, notifications)
@@ -1,16 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session as DBSession
-from typing import List
+from typing import List, Optional
+from datetime import datetime, timedelta, timezone
+import os
 import json
 
 from src.config.database import get_db
 from src.models.user import User
 from src.models.session import Session, SessionStatus
-from src.schemas.session import SessionCreate, SessionRead, AvailabilityUpdate
+from src.schemas.session import SessionCreate, SessionRead, AvailabilityUpdate, FreeSlotsRead
 from src.routes.users import get_current_user
+from src.services.booking import SESSION_MAX_HOURS, find_conflict, hold_slots, lock_for_booking, release_slots
+from src.services.free_slots import free_slots
 
 router = APIRouter(prefix="/sessions", tags=["Sessions"])
 
+# Widest range one free-slots call may cover
+FREE_SLOTS_MAX_DAYS = int(os.getenv("FREE_SLOTS_MAX_DAYS", 62))
+FREE_SLOTS_DEFAULT_DAYS = 7
+
+
+def _utc_naive(at: Optional[datetime]) -> Optional[datetime]:
+    # Stored times are naive UTC
+    if at is not None and at.tzinfo is not None:
+        return at.astimezone(timezone.utc).replace(tzinfo=None)
+    return at
+
 @router.post("/", response_model=SessionRead, status_code=status.HTTP_201_CREATED)
 def book_session(
     payload: SessionCreate,
@@ -20,32 +36,76 @@ def book_session(
     if payload.provider_id == current_user.id:
         raise HTTPException(status_code=400, detail="Cannot book session with yourself")
 
-    # Check overlaps (Simple check)
-    overlap = db.query(Session).filter(
-        (Session.provider_id == payload.provider_id) | (Session.requester_id == payload.provider_id),
-        Session.status != SessionStatus.CANCELLED,
-        Session.end_time > payload.start_time,
-        Session.start_time < payload.end_time
-    ).first()
-    
+    # Same frame as session_slots and free-slots: naive UTC, whatever offset the client sent
+    start_time, end_time = _utc_naive(payload.start_time), _utc_naive(payload.end_time)
+    if end_time - start_time > timedelta(hours=SESSION_MAX_HOURS):
+        raise HTTPException(status_code=400, detail=f"Sessions can last at most {SESSION_MAX_HOURS} hours")
+
+    # Check and insert under the booking lock, against both calendars
+    lock_for_booking(db, (payload.provider_id, current_user.id))
+    overlap = find_conflict(db, (payload.provider_id, current_user.id), start_time, end_time)
     if overlap:
+        if overlap.participant_id == current_user.id:
+            raise HTTPException(status_code=400, detail="You already have a session at this time")
         raise HTTPException(status_code=400, detail="Time slot already booked")
 
     session = Session(
         requester_id=current_user.id,
         provider_id=payload.provider_id,
         skill_id=payload.skill_id,
-        start_time=payload.start_time,
-        end_time=payload.end_time,
+        start_time=start_time,
+        end_time=end_time,
         status=SessionStatus.PENDING.value
     )
     db.add(session)
-    db.commit()
+    db.flush()
+    hold_slots(db, session)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Exclusion constraint backstop (Postgres), should a booking ever slip past the lock
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Time slot already booked")
     db.refresh(session)
     return session
 
 from datetime import datetime
 
+@router.get("/providers/{provider_id}/free-slots", response_model=FreeSlotsRead)
+def get_free_slots(
+    provider_id: int,
+    from_: Optional[datetime] = Query(None, alias="from"),
+    to: Optional[datetime] = None,
+    duration: int = Query(60, ge=15, le=SESSION_MAX_HOURS * 60),
+    db: DBSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Slots of `duration` minutes the provider could still be booked for
+    between `from` (default now, never earlier) and `to` (default a week
+    later): their weekly availability, read as UTC, minus pending and
+    accepted sessions.
+    """
+    provider = db.query(User).filter(User.id == provider_id, User.is_active == True).first()
+    if not provider:
+        raise HTTPException(status_code=404, detail="Provider not found")
+
+    start = max(_utc_naive(from_) or datetime.utcnow(), datetime.utcnow())
+    end = _utc_naive(to) or start + timedelta(days=FREE_SLOTS_DEFAULT_DAYS)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="`to` must be after `from` and in the future")
+    if end - start > timedelta(days=FREE_SLOTS_MAX_DAYS):
+        raise HTTPException(status_code=400, detail=f"Range can span at most {FREE_SLOTS_MAX_DAYS} days")
+
+    slots = free_slots(db, provider.id, provider.availability, start, end, duration)
+    return {
+        "provider_id": provider.id,
+        "start_time": start,
+        "end_time": end,
+        "duration_minutes": duration,
+        "slots": [{"start_time": s, "end_time": e} for s, e in slots],
+    }
+
 @router.get("/", response_model=List[SessionRead])
 def get_my_sessions(
     status: str = None,
@@ -144,6 +204,7 @@ def reject_session(
         raise HTTPException(status_code=400, detail=f"Cannot reject session with status {session.status}")
 
     session.status = SessionStatus.REJECTED.value
+    release_slots(db, session)
     db.commit()
     db.refresh(session)
     return session
@@ -165,6 +226,7 @@ def cancel_session(
          raise HTTPException(status_code=400, detail=f"Cannot cancel session with status {session.status}")
 
     session.status = SessionStatus.CANCELLED.value
+    release_slots(db, session)
     db.commit()
     db.refresh(session)
     return session
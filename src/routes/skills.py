@@ -1,11 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Response, UploadFile, File
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from src.config.database import get_db
 from src.models.skill import Skill
-from src.schemas.skill import SkillCreate, SkillRead
+from src.schemas.skill import SkillCreate, SkillRead, PopularSkillRead, SkillImportReport, RelatedSkillRead
 from src.routes.users import get_current_user 
 from src.models.user import User
+from src.services.http_cache import make_weak_etag, etag_matches, not_modified, set_cache_headers
+from src.services.skill_index import skill_index
+from src.services.catalog_cache import skill_catalog, bump_catalog_version, CATALOG_VERSION_CHECK_SECONDS
+from src.services.skill_stats import adjust_skill_stats
+from src.models.skill_stats import SkillStats
+from src.models.related_skill import RelatedSkill
+from src.services.skill_import import import_skills, parse_rows, detect_format
+import io
+from fastapi.responses import JSONResponse
+
+CATALOG_CACHE_CONTROL = f"public, max-age={CATALOG_VERSION_CHECK_SECONDS}"
+NEAR_DUPLICATE_SIMILARITY = 0.85
 
 
 router = APIRouter(prefix="/skills", tags=["Skills"])
@@ -18,13 +30,17 @@ def suggest_skills(
 ):
     if not query:
         return []
-        
-    skills = (
-        db.query(Skill)
-        .filter(Skill.name.ilike(f"%{query}%"), Skill.is_deleted == False)
-        .limit(limit)
-        .all()
-    )
+
+    # Served from the in-memory prefix index; the DB is only hit on a (re)build
+    skill_index.ensure_fresh(db, skill_catalog.version(db))
+    skills = skill_index.search(query, limit)
+
+    # Typo fallback ("pyhton") so users are not left retrying on an empty list
+    if len(skills) < limit:
+        seen = {s["id"] for s in skills}
+        for match, _ in skill_index.fuzzy_search(query, limit):
+            if match["id"] not in seen and len(skills) < limit:
+                skills.append(match)
     return skills
 
 # Micro-UX: Follow Skill
@@ -47,11 +63,13 @@ def toggle_follow_skill(
     
     if existing:
         db.delete(existing)
+        adjust_skill_stats(db, skill_id, followers=-1)
         db.commit()
         return {"message": "Skill unfollowed"}
     else:
         follow = SkillFollow(user_id=current_user.id, skill_id=skill_id)
         db.add(follow)
+        adjust_skill_stats(db, skill_id, followers=1)
         db.commit()
         return {"message": "Skill followed"}
 
@@ -75,6 +93,7 @@ def get_followed_skills(
 @router.post("/", response_model=SkillRead, status_code=status.HTTP_201_CREATED)
 def create_skill(
     payload: SkillCreate,
+    allow_similar: bool = Query(False, description="Create even if near-duplicate names exist"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -83,6 +102,22 @@ def create_skill(
 
     normalized_name = payload.name.strip().lower()
 
+    # Near-duplicate check ("machne learning" vs "machine learning")
+    if not allow_similar:
+        skill_index.ensure_fresh(db, skill_catalog.version(db))
+        similar = [
+            {"id": match["id"], "name": match["name"], "similarity": round(score, 2)}
+            for match, score in skill_index.fuzzy_search(
+                normalized_name, limit=5, min_similarity=NEAR_DUPLICATE_SIMILARITY, whole_name=True
+            )
+            if match["name"] != normalized_name
+        ]
+        if similar:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail={"message": "Similar skills already exist", "similar": similar},
+            )
+
     existing = (
         db.query(Skill)
         .filter(Skill.name.ilike(normalized_name))
@@ -94,8 +129,11 @@ def create_skill(
             existing.is_deleted = False
             existing.description = payload.description # Update details if changed
             existing.category = payload.category
+            bump_catalog_version(db)
             db.commit()
             db.refresh(existing)
+            skill_catalog.expire()
+            skill_index.add(existing, catalog_version=skill_catalog.version(db))
             return existing
         else:
             raise HTTPException(
@@ -111,51 +149,191 @@ def create_skill(
     )
 
     db.add(skill)
+    db.flush()
+    db.add(SkillStats(skill_id=skill.id))
+    bump_catalog_version(db)
     db.commit()
     db.refresh(skill)
+    skill_catalog.expire()
+    skill_index.add(skill, catalog_version=skill_catalog.version(db))
     return skill
 
+@router.post("/import", response_model=SkillImportReport)
+def import_skill_catalog(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, regex="^(csv|ndjson)$", description="Defaults to the file extension"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized to import skills")
+
+    fmt = format or detect_format(file.filename, file.content_type)
+    lines = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    report = import_skills(db, parse_rows(lines, fmt))
+
+    skill_catalog.expire()
+    return report
+
+@router.get("/popular", response_model=List[PopularSkillRead])
+def get_popular_skills(
+    category: Optional[str] = None,
+    limit: int = 20,
+    db: Session = Depends(get_db),
+):
+    # Reads the materialized counters; ordering uses the skill_stats.popularity index
+    query = (
+        db.query(Skill, SkillStats)
+        .join(SkillStats, SkillStats.skill_id == Skill.id)
+        .filter(Skill.is_deleted == False)
+    )
+
+    if category:
+        query = query.filter(Skill.category.ilike(f"%{category}%"))
+
+    rows = query.order_by(SkillStats.popularity.desc(), Skill.name.asc()).limit(limit).all()
+    return [
+        {
+            "id": skill.id,
+            "name": skill.name,
+            "category": skill.category,
+            "description": skill.description,
+            "created_at": skill.created_at,
+            "followers_count": stats.followers_count,
+            "teachers_count": stats.teachers_count,
+            "learners_count": stats.learners_count,
+            "popularity": stats.popularity,
+        }
+        for skill, stats in rows
+    ]
+
 @router.get("/categories", response_model=List[str])
-def get_categories(db: Session = Depends(get_db)):
-    categories = db.query(Skill.category).filter(Skill.is_deleted == False).distinct().all()
-    return [c[0] for c in categories if c[0]]
+def get_categories(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    version, categories = skill_catalog.categories(db)
+    etag = make_weak_etag("categories", version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, CATALOG_CACHE_CONTROL)
+
+    set_cache_headers(response, etag, CATALOG_CACHE_CONTROL)
+    return categories
 
 @router.get("/", response_model=List[SkillRead])
 def list_skills(
     skill: Optional[str] = Query(None, description="Search skill"),
     category: Optional[str] = None,
+    sort: str = Query("name", regex="^(name|popularity)$"),
     skip: int = 0,
     limit: int = 50,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
 ):
-    query = db.query(Skill).filter(Skill.is_deleted == False)
+    # Filtered and paged from the per-worker catalog copy, already serialized
+    version, catalog = skill_catalog.skills(db)
+    etag = make_weak_etag("skills", version, skill, category, skip, limit)
+    if sort == "name" and etag_matches(if_none_match, etag):
+        return not_modified(etag, CATALOG_CACHE_CONTROL)
 
+    results = catalog
+    fuzzy_ids = None
     if skill:
-        query = query.filter(Skill.name.ilike(f"%{skill.lower()}%"))
+        needle = skill.lower()
+        results = [s for s in results if needle in s["name"].lower()]
+
+        if not results:
+            # No substring hit: fall back to typo-tolerant matches, best first
+            skill_index.ensure_fresh(db, version)
+            fuzzy_ids = [match["id"] for match, _ in skill_index.fuzzy_search(skill, skip + limit)]
+            by_id = {s["id"]: s for s in catalog}
+            results = [by_id[i] for i in fuzzy_ids if i in by_id]
+
+    if sort == "popularity":
+        # Ordered and paged in SQL off the skill_stats.popularity index, then
+        # served from the catalog copy. Counters change outside the catalog
+        # version, so no ETag on this ordering.
+        ranked = (
+            db.query(Skill.id)
+            .join(SkillStats, SkillStats.skill_id == Skill.id)
+            .filter(Skill.is_deleted == False)
+        )
+        if fuzzy_ids is not None:
+            ranked = ranked.filter(Skill.id.in_(fuzzy_ids))
+        elif skill:
+            ranked = ranked.filter(Skill.name.ilike(f"%{skill}%"))
+        if category:
+            ranked = ranked.filter(Skill.category.ilike(f"%{category}%"))
+        page = ranked.order_by(SkillStats.popularity.desc(), Skill.name.asc()).offset(skip).limit(limit).all()
+        by_id = {s["id"]: s for s in catalog}
+        return JSONResponse(
+            content=[by_id[row.id] for row in page if row.id in by_id],
+            headers={"Cache-Control": CATALOG_CACHE_CONTROL},
+        )
 
     if category:
-        query = query.filter(Skill.category.ilike(f"%{category}%"))
+        needle = category.lower()
+        results = [s for s in results if needle in s["category"].lower()]
 
-    return (
-        query
-        .order_by(Skill.name.asc())
-        .offset(skip)
-        .limit(limit)
-        .all()
+    return JSONResponse(
+        content=results[skip:skip + limit],
+        headers={"ETag": etag, "Cache-Control": CATALOG_CACHE_CONTROL},
     )
 
 @router.get("/{skill_id}", response_model=SkillRead)
 def get_skill(
     skill_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),):
-    skill = db.query(Skill).filter(Skill.id == skill_id, Skill.is_deleted == False).first()
-
-    if not skill:
+    # Version-only lookup so a revalidation never builds the Skill object
+    version = (
+        db.query(Skill.updated_at)
+        .filter(Skill.id == skill_id, Skill.is_deleted == False)
+        .first()
+    )
+    if not version:
         raise HTTPException(status_code=404, detail="Skill not found")
 
+    etag = make_weak_etag("skill", skill_id, version.updated_at)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    skill = db.query(Skill).filter(Skill.id == skill_id).first()
+    set_cache_headers(response, etag)
     return skill
 
 
+@router.get("/{skill_id}/related", response_model=List[RelatedSkillRead])
+def get_related_skills(
+    skill_id: int,
+    limit: int = 10,
+    db: Session = Depends(get_db),
+):
+    # Neighbours are precomputed by rebuild_related_skills; this is one indexed read
+    rows = (
+        db.query(Skill, RelatedSkill.score, RelatedSkill.co_count)
+        .join(RelatedSkill, RelatedSkill.related_skill_id == Skill.id)
+        .filter(RelatedSkill.skill_id == skill_id, Skill.is_deleted == False)
+        .order_by(RelatedSkill.rank.asc())
+        .limit(limit)
+        .all()
+    )
+    return [
+        {
+            "id": skill.id,
+            "name": skill.name,
+            "category": skill.category,
+            "description": skill.description,
+            "created_at": skill.created_at,
+            "score": score,
+            "co_count": co_count,
+        }
+        for skill, score, co_count in rows
+    ]
+
+
 @router.delete("/{skill_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_skill(
     skill_id: int,
@@ -169,4 +347,7 @@ def delete_skill(
 
     # Soft delete
     skill.is_deleted = True
+    bump_catalog_version(db)
     db.commit()
+    skill_catalog.expire()
+    skill_index.remove(skill_id, catalog_version=skill_catalog.version(db))
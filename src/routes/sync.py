@@ -0,0 +1,176 @@
+import base64
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.orm import Session as DBSession
+
+from src.config.database import get_db
+from src.models.connection import Connection
+from src.models.connection_event import ConnectionEvent
+from src.models.conversation import Conversation
+from src.models.message import Message
+from src.models.notification import Notification
+from src.models.session import Session
+from src.models.user import User
+from src.routes.messaging import apply_conversation_read_state
+from src.routes.users import get_current_user
+from src.schemas.connection_event import ConnectionEventType
+from src.schemas.sync import SyncResponse
+from src.services.connection_events import settled
+
+router = APIRouter(prefix="/sync", tags=["Sync"])
+
+# Rows per stream per call; a capped stream sets has_more
+SYNC_MAX_ROWS = int(os.getenv("SYNC_MAX_ROWS", 500))
+# Re-read this far back so rows committed just after their updated_at was stamped are not missed
+SYNC_OVERLAP_SECONDS = int(os.getenv("SYNC_OVERLAP_SECONDS", 2))
+
+STREAMS = ("conversations", "messages", "notifications", "connections", "sessions")
+
+
+def _encode_cursor(positions: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(positions, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> dict:
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        positions = {}
+        for stream in STREAMS:
+            # Streams added after a cursor was issued start from its message position
+            at, last_id = raw.get(stream) or raw["messages"]
+            positions[stream] = (datetime.fromisoformat(at), int(last_id))
+        positions["events"] = int(raw["events"])
+        return positions
+    except (ValueError, KeyError, TypeError, IndexError):
+        raise HTTPException(status_code=400, detail="Invalid sync cursor")
+
+
+def _changed_after(query, model, position):
+    at, last_id = position
+    return (
+        query.filter(or_(model.updated_at > at, and_(model.updated_at == at, model.id > last_id)))
+        .order_by(model.updated_at.asc(), model.id.asc())
+        .limit(SYNC_MAX_ROWS + 1)
+        .all()
+    )
+
+
+def _conversation_change(conversation: Conversation, uid: int) -> dict:
+    mine = conversation.user1_id == uid
+    return {
+        "id": conversation.id,
+        "user1_id": conversation.user1_id,
+        "user2_id": conversation.user2_id,
+        "last_message_id": conversation.last_message_id,
+        "last_message_at": conversation.last_message_at,
+        "unread_count": conversation.user1_unread if mine else conversation.user2_unread,
+        "last_read_message_id": (conversation.user1_last_read_id if mine else conversation.user2_last_read_id) or 0,
+        "peer_last_read_message_id": (conversation.user2_last_read_id if mine else conversation.user1_last_read_id) or 0,
+        "updated_at": conversation.updated_at,
+    }
+
+
+@router.get("", response_model=SyncResponse)
+def sync(
+    since: Optional[str] = None,
+    db: DBSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Everything that changed for me since `since`, in one round trip:
+    conversations (unread counts and read watermarks, so read receipts),
+    messages in my conversations, notifications, connections and sessions
+    (new rows and updates, each read off a (user, updated_at) index), plus
+    ids of connections deleted since. Rows are upserts and may repeat across
+    calls, so clients apply them by id.
+
+    Call without `since` after a full load to get a starting cursor. Each
+    stream returns at most SYNC_MAX_ROWS; when one is capped, has_more is set
+    and the returned cursor continues exactly where it stopped.
+    """
+    uid = current_user.id
+    started = datetime.utcnow()
+    unread_count = db.query(func.coalesce(func.sum(
+        case((Conversation.user1_id == uid, Conversation.user1_unread), else_=Conversation.user2_unread)
+    ), 0)).filter(or_(Conversation.user1_id == uid, Conversation.user2_id == uid)).scalar()
+
+    if since is None:
+        fresh = (started - timedelta(seconds=SYNC_OVERLAP_SECONDS)).isoformat()
+        last_event = db.query(func.max(ConnectionEvent.id)).scalar() or 0
+        positions = {stream: [fresh, 0] for stream in STREAMS}
+        positions["events"] = last_event
+        return {"cursor": _encode_cursor(positions), "has_more": False, "unread_count": unread_count}
+
+    positions = _decode_cursor(since)
+    mine = or_(Conversation.user1_id == uid, Conversation.user2_id == uid)
+    changes = {
+        "conversations": _changed_after(db.query(Conversation).filter(mine), Conversation, positions["conversations"]),
+        "messages": _changed_after(
+            db.query(Message).join(Conversation, Message.conversation_id == Conversation.id).filter(mine),
+            Message, positions["messages"],
+        ),
+        "notifications": _changed_after(
+            db.query(Notification).filter(Notification.recipient_id == uid),
+            Notification, positions["notifications"],
+        ),
+        "connections": _changed_after(
+            db.query(Connection).filter(or_(Connection.requester_id == uid, Connection.recipient_id == uid)),
+            Connection, positions["connections"],
+        ),
+        "sessions": _changed_after(
+            db.query(Session).filter(or_(Session.requester_id == uid, Session.provider_id == uid)),
+            Session, positions["sessions"],
+        ),
+    }
+
+    # Deletions come from the append-only connection event log, read up to its settled head
+    removals = settled(
+        db.query(ConnectionEvent.id, ConnectionEvent.connection_id, ConnectionEvent.created_at)
+        .filter(
+            or_(ConnectionEvent.from_user_id == uid, ConnectionEvent.to_user_id == uid),
+            ConnectionEvent.event_type.in_([ConnectionEventType.cancelled.value, ConnectionEventType.removed.value]),
+            ConnectionEvent.id > positions["events"],
+        )
+        .order_by(ConnectionEvent.id.asc())
+        .limit(SYNC_MAX_ROWS + 1)
+        .all()
+    )
+
+    has_more = False
+    caught_up = started - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+    next_positions = {}
+    for stream, rows in changes.items():
+        if len(rows) > SYNC_MAX_ROWS:
+            has_more = True
+            rows = changes[stream] = rows[:SYNC_MAX_ROWS]
+            next_positions[stream] = [rows[-1].updated_at.isoformat(), rows[-1].id]
+        else:
+            # Caught up: start the next read a little before now
+            at, _ = positions[stream]
+            next_positions[stream] = [max(at, caught_up).isoformat(), 0]
+    if len(removals) > SYNC_MAX_ROWS:
+        has_more = True
+        removals = removals[:SYNC_MAX_ROWS]
+    next_positions["events"] = removals[-1].id if removals else positions["events"]
+
+    # Read state of messages comes from the watermarks of the conversations they belong to
+    marks = dict(
+        db.query(Conversation.id, Conversation).filter(
+            Conversation.id.in_({m.conversation_id for m in changes["messages"]})
+        ).all()
+    ) if changes["messages"] else {}
+    apply_conversation_read_state(db, changes["messages"], marks)
+    changes["conversations"] = [_conversation_change(c, uid) for c in changes["conversations"]]
+
+    return {
+        "cursor": _encode_cursor(next_positions),
+        "has_more": has_more,
+        "unread_count": unread_count,
+        **changes,
+        "deleted": {"connections": [r.connection_id for r in removals if r.connection_id is not None]},
+    }
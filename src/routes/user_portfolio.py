@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Response
 from sqlalchemy.orm import Session
+from sqlalchemy import func
 from typing import List, Optional
 
 from src.config.database import get_db
@@ -11,6 +12,7 @@ from src.schemas.user_portfolio import (
     UserPortfolioUpdate,
 )
 from src.routes.users import get_current_user
+from src.services.http_cache import make_weak_etag, etag_matches, not_modified, set_cache_headers
 
 
 router = APIRouter(prefix="/portfolio", tags=["User Portfolio"])
@@ -55,8 +57,21 @@ def get_my_portfolio(
 @router.get("/user/{user_id}", response_model=List[UserPortfolioRead])
 def get_user_public_portfolio(
     user_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
 ):
+    # count + max(updated_at) changes on every insert, update and delete
+    count, last_updated = (
+        db.query(func.count(UserPortfolio.id), func.max(UserPortfolio.updated_at))
+        .filter(UserPortfolio.user_id == user_id)
+        .one()
+    )
+    etag = make_weak_etag("portfolio", user_id, count, last_updated)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    set_cache_headers(response, etag)
     return (
         db.query(UserPortfolio)
         .filter(UserPortfolio.user_id == user_id)
@@ -1,12 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Response
 from sqlalchemy.orm import Session
+from sqlalchemy import func
 from typing import List, Optional,Text
 from src.config.database import get_db
 from src.models.user_skill import UserSkill
 from src.models.skill import Skill
 from src.models.user import User
-from src.schemas.user_skill import UserSkillCreate, UserSkillRead, SkillRole
+from src.schemas.user_skill import UserSkillCreate, UserSkillRead, SkillRole, FacetedMentorResults, MentorRead
+from src.services.geo import geo_index
+from src.services.swap_matches import swap_index
+from src.services.mentor_index import mentor_index, RATING_BUCKETS
 from src.routes.users import get_current_user 
+from src.services.skill_stats import adjust_for_role
+from src.services.http_cache import make_weak_etag, etag_matches, not_modified, set_cache_headers
 
 router = APIRouter(prefix="/user-skills", tags=["User Skills"])
 
@@ -38,8 +44,10 @@ def add_user_skill(
 
     user_skill = UserSkill(**payload.dict())
     db.add(user_skill)
+    adjust_for_role(db, payload.skill_id, payload.role, 1)
     db.commit()
     db.refresh(user_skill)
+    swap_index.add(user_skill.user_id, user_skill.skill_id, user_skill.role)
     return user_skill
 
 @router.get("/me", response_model=List[UserSkillRead])
@@ -58,8 +66,20 @@ def get_my_skills(
 @router.get("/user/{user_id}", response_model=List[UserSkillRead])
 def get_user_public_skills(
     user_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
 ):
+    count, last_updated = (
+        db.query(func.count(UserSkill.id), func.max(UserSkill.updated_at))
+        .filter(UserSkill.user_id == user_id, UserSkill.role == SkillRole.teach)
+        .one()
+    )
+    etag = make_weak_etag("user-skills", user_id, count, last_updated)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    set_cache_headers(response, etag)
     return (
         db.query(UserSkill)
         .filter(
@@ -68,10 +88,12 @@ def get_user_public_skills(
         .all()
     )
 
-@router.get("/mentors", response_model=List[UserSkillRead])
+@router.get("/mentors", response_model=List[MentorRead])
 def discover_mentors(
     skill_id: Optional[int] = None,
     city: Optional[str] = None,
+    near: Optional[str] = Query(None, regex=r"^-?\d+(\.\d+)?,-?\d+(\.\d+)?$", description="lat,lon"),
+    radius_km: float = Query(25, gt=0, le=500),
     skip: int = 0,
     limit: int = 20,
     db: Session = Depends(get_db),
@@ -91,7 +113,49 @@ def discover_mentors(
     if city:
         query = query.filter(User.location_city.ilike(f"%{city}%"))
 
-    return query.offset(skip).limit(limit).all()
+    if not near:
+        return query.offset(skip).limit(limit).all()
+
+    lat, lon = (float(part) for part in near.split(","))
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise HTTPException(status_code=400, detail="Invalid coordinates")
+
+    # Grid lookup in memory gives the nearby users; the DB only sees those ids
+    geo_index.ensure_fresh(db)
+    nearby = dict(geo_index.within(lat, lon, radius_km))
+    if not nearby:
+        return []
+
+    rows = query.filter(UserSkill.user_id.in_(list(nearby))).all()
+    rows.sort(key=lambda row: (nearby[row.user_id], row.id))
+    page = rows[skip:skip + limit]
+    for row in page:
+        row.distance_km = round(nearby[row.user_id], 2)
+    return page
+
+
+@router.get("/mentors/faceted", response_model=FacetedMentorResults)
+def discover_mentors_faceted(
+    skill_id: Optional[int] = None,
+    category: Optional[str] = None,
+    city: Optional[str] = None,
+    rating: Optional[str] = Query(None, regex="^(" + "|".join(RATING_BUCKETS) + ")$"),
+    skip: int = 0,
+    limit: int = 20,
+    db: Session = Depends(get_db),
+):
+    """
+    Mentor results plus facet counts (skill, category, city, rating bucket) in one call.
+    """
+    mentor_index.ensure_fresh(db)
+    return mentor_index.search(
+        skill_id=skill_id,
+        category=category,
+        city=city,
+        rating=rating,
+        skip=skip,
+        limit=limit,
+    )
 
 
 @router.put("/{user_skill_id}", response_model=UserSkillRead)
@@ -109,11 +173,19 @@ def update_user_skill(
     if user_skill.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not allowed")
 
+    old_role = user_skill.role
+    if payload.role != old_role:
+        adjust_for_role(db, user_skill.skill_id, old_role, -1)
+        adjust_for_role(db, user_skill.skill_id, payload.role, 1)
+
     for field, value in payload.dict(exclude={"user_id", "skill_id"}).items():
         setattr(user_skill, field, value)
 
     db.commit()
     db.refresh(user_skill)
+    if payload.role != old_role:
+        swap_index.remove(user_skill.user_id, user_skill.skill_id, old_role)
+        swap_index.add(user_skill.user_id, user_skill.skill_id, payload.role)
     return user_skill
 
 @router.delete("/{user_skill_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -131,4 +203,6 @@ def delete_user_skill(
         raise HTTPException(status_code=403, detail="Not allowed")
 
     db.delete(user_skill)
+    adjust_for_role(db, user_skill.skill_id, user_skill.role, -1)
     db.commit()
+    swap_index.remove(user_skill.user_id, user_skill.skill_id, user_skill.role)
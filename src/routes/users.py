@@ -1,14 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from src.schemas.user import UserCreate, UserRead, UserProfileAggregated
+from src.schemas.user import UserCreate, UserRead, UserProfileAggregated, SwapMatchPage
 from src.models.user import User
 from src.models.user_skill import UserSkill
 from src.models.connection import Connection, ConnectionStatus
-from src.config.database import get_db
+from src.config.database import SessionLocal, get_db
 from src.models.profile_view import ProfileView
 from src.schemas.dashboard import DashboardStats
 from src.schemas.session import AvailabilityUpdate
+from src.models.user_portfolio import UserPortfolio
+from src.services.geo import apply_location, geo_index
+from src.services.swap_matches import swap_index
+from src.services.http_cache import make_weak_etag, etag_matches, not_modified, set_cache_headers
 from sqlalchemy import func
 import json
 from passlib.context import CryptContext
@@ -57,6 +61,25 @@ def get_current_user_optional(token: Optional[str] = Depends(oauth2_scheme), db:
     except:
         return None
 
+def get_active_user_id(token: Optional[str]) -> Optional[int]:
+    """
+    Resolve an access token to an active user's id with a short-lived session,
+    for long-lived connections (WebSocket, SSE) that must not hold a pooled
+    connection open via Depends(get_db).
+    """
+    if not token:
+        return None
+    try:
+        email = verify_token(token, HTTPException(status_code=401))
+    except HTTPException:
+        return None
+    db = SessionLocal()
+    try:
+        user = db.query(User.id, User.is_active).filter(User.email == email).first()
+    finally:
+        db.close()
+    return user.id if user and user.is_active else None
+
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -81,10 +104,12 @@ def create_user(user_in: UserCreate, db: Session = Depends(get_db)):
         is_active=True,
         is_superuser=user_in.is_superuser if hasattr(user_in, 'is_superuser') else False,
 )
+    apply_location(user, user_in.latitude, user_in.longitude)
 
     db.add(user)
     db.commit()
     db.refresh(user)
+    geo_index.update(user.id, user.latitude, user.longitude)
     return user
 
 
@@ -149,14 +174,50 @@ def search_users(
     return query.offset(skip).limit(limit).all()
 
 
+def get_connection_status(db: Session, current_user: Optional[User], user_id: int) -> str:
+    if not current_user:
+        return "none"
+    if current_user.id == user_id:
+        return "self"
+
+    conn = db.query(Connection.status, Connection.requester_id).filter(
+        ((Connection.requester_id == current_user.id) & (Connection.recipient_id == user_id)) |
+        ((Connection.requester_id == user_id) & (Connection.recipient_id == current_user.id))
+    ).first()
+
+    if not conn:
+        return "none"
+    if conn.status == ConnectionStatus.ACCEPTED:
+        return "accepted"
+    if conn.status == ConnectionStatus.REJECTED:
+        return "rejected"
+    if conn.requester_id == current_user.id:
+        return "pending_sent"
+    return "pending_received"
+
+
 @router.get("/{user_id}/profile", response_model=UserProfileAggregated)
 def get_user_profile(
     user_id: int, 
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: Optional[User] = Depends(get_current_user_optional) # Need to implement optional auth
 ):
-    user = db.query(User).filter(User.id == user_id, User.is_active == True).first()
-    if not user:
+    # One version-only query: user row + skill and portfolio (count, max updated_at)
+    def versions_of(model):
+        scope = db.query(model).filter(model.user_id == User.id)
+        return (
+            scope.with_entities(func.count(model.id)).scalar_subquery(),
+            scope.with_entities(func.max(model.updated_at)).scalar_subquery(),
+        )
+
+    version = db.query(
+        User.updated_at,
+        *versions_of(UserSkill),
+        *versions_of(UserPortfolio),
+    ).filter(User.id == user_id, User.is_active == True).first()
+    if not version:
         raise HTTPException(status_code=404, detail="User not found")
     
     # Log Profile View
@@ -165,27 +226,19 @@ def get_user_profile(
         db.add(view)
         db.commit()
 
-    connection_status = "none"
-    if current_user:
-        if current_user.id == user_id:
-             connection_status = "self"
-        else:
-            # Check connection
-            conn = db.query(Connection).filter(
-                ((Connection.requester_id == current_user.id) & (Connection.recipient_id == user_id)) |
-                ((Connection.requester_id == user_id) & (Connection.recipient_id == current_user.id))
-            ).first()
-            
-            if conn:
-                if conn.status == ConnectionStatus.ACCEPTED:
-                    connection_status = "accepted"
-                elif conn.status == ConnectionStatus.REJECTED:
-                    connection_status = "rejected"
-                elif conn.status == ConnectionStatus.PENDING:
-                    if conn.requester_id == current_user.id:
-                        connection_status = "pending_sent"
-                    else:
-                        connection_status = "pending_received"
+    connection_status = get_connection_status(db, current_user, user_id)
+
+    # stats.views is left out of the ETag on purpose: it grows with every view,
+    # and a weak validator only promises a semantically equivalent body.
+    etag = make_weak_etag("profile", user_id, connection_status, *version)
+    if etag_matches(if_none_match, etag):
+        response = not_modified(etag, cache_control="private, no-cache")
+        response.headers["Vary"] = "Authorization"
+        return response
+
+    user = db.query(User).filter(User.id == user_id).first()
+    set_cache_headers(response, etag, cache_control="private, no-cache")
+    response.headers["Vary"] = "Authorization"
 
     return {
         "user": user,
@@ -202,10 +255,21 @@ def get_user_profile(
 
 
 @router.get("/{user_id}", response_model=UserRead)
-def get_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id, User.is_active == True).first()
-    if not user:
+def get_user(
+    user_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)):
+    version = db.query(User.updated_at).filter(User.id == user_id, User.is_active == True).first()
+    if not version:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+    etag = make_weak_etag("user", user_id, version.updated_at)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    user = db.query(User).filter(User.id == user_id).first()
+    set_cache_headers(response, etag)
     return user
 @router.get("/", response_model=List[UserRead])
 def list_users(
@@ -227,12 +291,14 @@ def update_my_profile(
     current_user.location_city = user_in.location_city
     current_user.location_country = user_in.location_country
     current_user.whatsapp_number = user_in.whatsapp_number
+    apply_location(current_user, user_in.latitude, user_in.longitude)
 
     if user_in.password:
         current_user.password = hash_password(user_in.password)
 
     db.commit()
     db.refresh(current_user)
+    geo_index.update(current_user.id, current_user.latitude, current_user.longitude)
     return current_user
 
 
@@ -259,6 +325,8 @@ def deactivate_account(
     current_user: User = Depends(get_current_user),):
     current_user.is_active = False
     db.commit()
+    geo_index.update(current_user.id, None, None)
+    swap_index.drop_user(current_user.id)
 
 @router.get("/me/completion")
 def get_profile_completion(current_user: User = Depends(get_current_user)):
@@ -276,7 +344,9 @@ def get_profile_completion(current_user: User = Depends(get_current_user)):
     
     return {"percentage": percentage, "missing": missing}
 
-from src.schemas.user_skill import UserSkillCreate, UserSkillRead, SkillRole
+from src.schemas.user_skill import UserSkillCreate, UserSkillRead, SkillRole, UserSkillSetReplace
+from src.services.skill_stats import adjust_for_role, adjust_role_counts_many
+from src.models.skill import Skill
 
 @router.post("/me/skills", response_model=UserSkillRead, status_code=status.HTTP_201_CREATED)
 def add_my_skill(
@@ -301,10 +371,109 @@ def add_my_skill(
          
     user_skill = UserSkill(**payload.dict())
     db.add(user_skill)
+    adjust_for_role(db, payload.skill_id, payload.role, 1)
     db.commit()
     db.refresh(user_skill)
+    swap_index.add(user_skill.user_id, user_skill.skill_id, user_skill.role)
     return user_skill
 
+@router.put("/me/skills", response_model=List[UserSkillRead])
+def replace_my_skills(
+    payload: UserSkillSetReplace,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Replace the whole teach/learn set: one bulk delete, one bulk insert, one commit.
+    """
+    # Last entry wins if the same (skill, role) is sent twice
+    desired = {(item.skill_id, item.role.value): item for item in payload.skills}
+
+    skill_ids = {skill_id for skill_id, _ in desired}
+    if skill_ids:
+        found = {
+            skill_id for (skill_id,) in
+            db.query(Skill.id).filter(Skill.id.in_(skill_ids), Skill.is_deleted == False)
+        }
+        missing = sorted(skill_ids - found)
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Skills not found: {missing}")
+
+    current = {
+        (row.skill_id, row.role): row
+        for row in db.query(UserSkill.id, UserSkill.skill_id, UserSkill.role,
+                            UserSkill.teaching_style, UserSkill.experience_note)
+        .filter(UserSkill.user_id == current_user.id)
+    }
+
+    removed = [row for key, row in current.items() if key not in desired]
+    added = [item for key, item in desired.items() if key not in current]
+    changed = [
+        {"id": current[key].id, "teaching_style": item.teaching_style, "experience_note": item.experience_note}
+        for key, item in desired.items()
+        if key in current and (current[key].teaching_style, current[key].experience_note)
+        != (item.teaching_style, item.experience_note)
+    ]
+
+    if removed:
+        db.query(UserSkill).filter(
+            UserSkill.id.in_([row.id for row in removed])
+        ).delete(synchronize_session=False)
+
+    if added:
+        db.bulk_insert_mappings(UserSkill, [
+            {
+                "user_id": current_user.id,
+                "skill_id": item.skill_id,
+                "role": item.role.value,
+                "teaching_style": item.teaching_style,
+                "experience_note": item.experience_note,
+            }
+            for item in added
+        ])
+
+    if changed:
+        db.bulk_update_mappings(UserSkill, changed)
+
+    # skill_stats: (teachers, learners) delta per skill, applied as one executemany
+    deltas = {}
+    changes = [(row.skill_id, row.role, -1) for row in removed]
+    changes += [(item.skill_id, item.role.value, 1) for item in added]
+    for skill_id, role, step in changes:
+        teachers, learners = deltas.get(skill_id, (0, 0))
+        if role == SkillRole.teach:
+            deltas[skill_id] = (teachers + step, learners)
+        else:
+            deltas[skill_id] = (teachers, learners + step)
+    adjust_role_counts_many(db, deltas)
+
+    db.commit()
+    skills = db.query(UserSkill).filter(UserSkill.user_id == current_user.id).order_by(UserSkill.id.asc()).all()
+    swap_index.set_user(current_user.id, [(s.skill_id, s.role) for s in skills])
+    return skills
+
+@router.get("/me/swap-matches", response_model=SwapMatchPage)
+def get_swap_matches(
+    skip: int = 0,
+    limit: int = 20,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Two-way swaps: users who teach something I want to learn and want to learn something I teach.
+    """
+    swap_index.ensure_fresh(db)
+    total, page = swap_index.matches(current_user.id, skip, limit)
+
+    users = {}
+    if page:
+        users = {u.id: u for u in db.query(User).filter(User.id.in_([m["user_id"] for m in page]))}
+
+    return {
+        "total": total,
+        "results": [{**m, "user": users[m["user_id"]]} for m in page if m["user_id"] in users],
+    }
+
 @router.get("/me/suggested-mentors", response_model=List[UserRead])
 def get_suggested_mentors(
     db: Session = Depends(get_db),
@@ -21,4 +21,5 @@ from .user_portfolio import (
 from .connection_event import (
     ConnectionEventCreate,
     ConnectionEventRead,
+    ConnectionEventPage,
 )
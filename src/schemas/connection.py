@@ -1,7 +1,7 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
-from src.schemas.user import UserRead
+from src.schemas.user import UserRead, UserSlimRead
 from src.models.connection import ConnectionStatus
 
 class ConnectionBase(BaseModel):
@@ -23,5 +23,28 @@ class ConnectionRead(ConnectionBase):
     class Config:
         orm_mode = True
 
+class ConnectionSlimRead(ConnectionBase):
+    id: int
+    requester_id: int
+    recipient_id: int
+    status: ConnectionStatus
+    created_at: datetime
+    updated_at: datetime
+    requester: UserSlimRead
+    recipient: UserSlimRead
+
 class ConnectionUpdate(BaseModel):
     status: ConnectionStatus
+
+class ConnectionBulkUpdate(BaseModel):
+    ids: List[int]
+    status: ConnectionStatus
+
+class ConnectionBulkResult(BaseModel):
+    id: int
+    result: str # 'updated', 'not_found', 'forbidden', 'not_pending'
+    status: Optional[ConnectionStatus] = None
+
+class ConnectionBulkReport(BaseModel):
+    updated: int
+    results: List[ConnectionBulkResult]
@@ -3,23 +3,33 @@ from datetime import datetime
 from typing import Optional, List
 from enum import Enum
 
+class ConnectionEventType(str, Enum):
+    request = "request"
+    accepted = "accepted"
+    rejected = "rejected"
+    cancelled = "cancelled"
+    removed = "removed"
+
 class ConnectionEventRead(BaseModel):
     id: int
     from_user_id: int
     to_user_id: int
-    skill_id: int
+    skill_id: Optional[int] = None
+    connection_id: Optional[int] = None
+    event_type: ConnectionEventType
     created_at: datetime
 
-class ConnectionEventType(str, Enum):
-    request = "request"
-    accepted = "accepted"
-    rejected = "rejected"
-    cancelled = "cancelled"
+    class Config:
+        orm_mode = True
+
+class ConnectionEventPage(BaseModel):
+    events: List[ConnectionEventRead]
+    next_offset: int
 
 class ConnectionEventCreate(BaseModel):
     from_user_id: int
     to_user_id: int
-    skill_id: int
+    skill_id: Optional[int] = None
     event_type: ConnectionEventType
 
     class Config:
@@ -26,7 +26,20 @@ class ConversationRead(BaseModel):
     user1: UserRead
     user2: UserRead
     last_message: Optional[MessageRead] = None
+    last_message_at: Optional[datetime] = None
+    unread_count: int = 0 # for the requesting user
+    last_read_message_id: int = 0 # my watermark
+    peer_last_read_message_id: int = 0 # the other participant's, for "seen" ticks
     updated_at: datetime
 
     class Config:
         orm_mode = True
+
+class MessageSearchHit(BaseModel):
+    message: MessageRead
+    snippet: str # HTML-escaped message text around the match, terms wrapped in <mark></mark>
+    score: float
+
+class MessageSearchPage(BaseModel):
+    results: List[MessageSearchHit]
+    next_cursor: Optional[str] = None
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import Optional
 
 class NotificationRead(BaseModel):
     id: int
@@ -11,3 +12,16 @@ class NotificationRead(BaseModel):
 
     class Config:
         orm_mode = True
+
+class NotificationOutboxMetrics(BaseModel):
+    backlog: int
+    oldest_pending_seconds: float
+    workers: int
+    delivered: int
+    coalesced: int
+    batches: int
+    failures: int
+    avg_lag_seconds: Optional[float] = None
+    max_lag_seconds: float
+    last_lag_seconds: Optional[float] = None
+    last_delivery_at: Optional[datetime] = None
@@ -35,6 +35,17 @@ class SessionRead(BaseModel):
     class Config:
         orm_mode = True
 
+class FreeSlot(BaseModel):
+    start_time: datetime
+    end_time: datetime
+
+class FreeSlotsRead(BaseModel):
+    provider_id: int
+    start_time: datetime
+    end_time: datetime
+    duration_minutes: int
+    slots: List[FreeSlot]
+
 class AvailabilityUpdate(BaseModel):
     availability: Dict[str, List[str]] 
     # Example: {"Monday": ["09:00-11:00", "14:00-16:00"], "Tuesday": []}
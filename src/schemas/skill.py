@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import List, Optional
 
 
 class SkillBase(BaseModel):
@@ -17,3 +18,28 @@ class SkillRead(SkillBase):
 
     class Config:
         from_attributes = True
+
+class PopularSkillRead(SkillRead):
+    followers_count: int
+    teachers_count: int
+    learners_count: int
+    popularity: int
+
+class RelatedSkillRead(SkillRead):
+    score: float
+    co_count: int
+
+class SkillImportRow(BaseModel):
+    row: int
+    name: Optional[str] = None
+    status: str # 'created', 'reactivated', 'exists', 'duplicate', 'invalid'
+    skill_id: Optional[int] = None
+    error: Optional[str] = None
+
+class SkillImportReport(BaseModel):
+    created: int
+    reactivated: int
+    exists: int
+    duplicate: int
+    invalid: int
+    rows: List[SkillImportRow]
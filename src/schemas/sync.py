@@ -0,0 +1,56 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+from src.models.connection import ConnectionStatus
+from src.schemas.messaging import MessageRead
+from src.schemas.notification import NotificationRead
+
+class ConnectionChange(BaseModel):
+    id: int
+    requester_id: int
+    recipient_id: int
+    status: ConnectionStatus
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        orm_mode = True
+
+class SessionChange(BaseModel):
+    id: int
+    requester_id: int
+    provider_id: int
+    skill_id: int
+    start_time: datetime
+    end_time: datetime
+    status: str
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+class ConversationChange(BaseModel):
+    id: int
+    user1_id: int
+    user2_id: int
+    last_message_id: Optional[int] = None
+    last_message_at: Optional[datetime] = None
+    unread_count: int
+    last_read_message_id: int
+    peer_last_read_message_id: int
+    updated_at: datetime
+
+class SyncDeleted(BaseModel):
+    connections: List[int] = []
+
+class SyncResponse(BaseModel):
+    cursor: str
+    has_more: bool # call again with the new cursor straight away
+    unread_count: int
+    conversations: List[ConversationChange] = []
+    messages: List[MessageRead] = []
+    notifications: List[NotificationRead] = []
+    connections: List[ConnectionChange] = []
+    sessions: List[SessionChange] = []
+    deleted: SyncDeleted = SyncDeleted()
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
 from typing import Optional, List
 from src.schemas.user_skill import UserSkillRead
@@ -13,6 +13,8 @@ class UserCreate(BaseModel):
     profile_photo_url: Optional[str] = None
     location_city: Optional[str] = None
     location_country: Optional[str] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
     whatsapp_number: Optional[str] = None
     is_superuser: Optional[bool] = False    
 
@@ -24,6 +26,8 @@ class UserRead(BaseModel):
     profile_photo_url: Optional[str]
     location_city: Optional[str]
     location_country: Optional[str]
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
     whatsapp_number: Optional[str]
     is_active: bool
     created_at: datetime
@@ -34,9 +38,30 @@ class UserRead(BaseModel):
     class Config:
         orm_mode = True # Changed from from_attributes to orm_mode for Pydantic v1 compatibility if needed, or stick to v2 if environment supports
 
+class UserSlimRead(BaseModel):
+    """Just enough of a user to render a list row."""
+    id: int
+    name: str
+    profile_photo_url: Optional[str] = None
+    location_city: Optional[str] = None
+
+    class Config:
+        orm_mode = True
+
 class UserProfileAggregated(BaseModel):
     user: UserRead
     skills: List[UserSkillRead]
     portfolio: List[UserPortfolioRead]
     connection_status: Optional[str] = "none" # "none", "pending_sent", "pending_received", "accepted", "rejected", "self"
     stats: Optional[dict] = None # e.g. {"views": 10, "connections": 5}
+
+
+class SwapMatchRead(BaseModel):
+    user: UserRead
+    score: float
+    you_teach: List[int] # skill ids I teach that they want to learn
+    they_teach: List[int] # skill ids they teach that I want to learn
+
+class SwapMatchPage(BaseModel):
+    total: int
+    results: List[SwapMatchRead]
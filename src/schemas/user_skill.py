@@ -18,6 +18,14 @@ class UserSkillCreate(UserSkillBase):
     user_id: int
     skill_id: int
 
+class UserSkillSetItem(UserSkillBase):
+    skill_id: int
+
+
+class UserSkillSetReplace(BaseModel):
+    skills: List[UserSkillSetItem]
+
+
 class UserSkillRead(UserSkillBase):
     id: int
     user_id: int
@@ -26,3 +34,26 @@ class UserSkillRead(UserSkillBase):
 
     class Config:
         from_attributes = True
+
+
+class MentorRead(UserSkillRead):
+    distance_km: Optional[float] = None
+
+
+class FacetCount(BaseModel):
+    value: str
+    label: Optional[str] = None
+    count: int
+
+
+class MentorFacets(BaseModel):
+    skill: List[FacetCount]
+    category: List[FacetCount]
+    city: List[FacetCount]
+    rating: List[FacetCount]
+
+
+class FacetedMentorResults(BaseModel):
+    total: int
+    results: List[UserSkillRead]
+    facets: MentorFacets
@@ -0,0 +1,139 @@
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session as DBSession
+
+from src.models.session import Session, SessionStatus
+from src.models.session_slot import SessionSlot
+from src.models.user import User
+
+# Longest bookable session; also bounds how far back a conflict scan has to look
+SESSION_MAX_HOURS = int(os.getenv("SESSION_MAX_HOURS", 12))
+
+# Statuses that give a session's time back
+RELEASED_STATUSES = (SessionStatus.REJECTED.value, SessionStatus.CANCELLED.value)
+
+logger = logging.getLogger(__name__)
+
+# Longest slot stored, in hours: SESSION_MAX_HOURS unless the backfill copied
+# longer legacy sessions. Conflict scans look back this far.
+_longest_slot_hours = float(SESSION_MAX_HOURS)
+
+# First key of the two-key Postgres advisory locks that serialise one participant's bookings
+_POSTGRES_LOCK_CLASS = 4049
+
+# Postgres: no two slots of one participant may overlap, enforced by the database itself
+_POSTGRES_CONSTRAINT = "session_slots_no_overlap"
+_POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS btree_gist",
+    f"""ALTER TABLE session_slots ADD CONSTRAINT {_POSTGRES_CONSTRAINT}
+        EXCLUDE USING gist (participant_id WITH =, tsrange(start_time, end_time) WITH &&)""",
+]
+
+
+def ensure_booking_index(engine: Engine):
+    """
+    Backfill session_slots from sessions the first time it is empty, note the
+    longest slot stored, then on Postgres add the overlap exclusion
+    constraint. Safe to run on every startup.
+    """
+    global _longest_slot_hours
+    dialect = engine.dialect.name
+    with engine.begin() as conn:
+        if conn.execute(text("SELECT 1 FROM session_slots LIMIT 1")).first() is None:
+            for column in ("requester_id", "provider_id"):
+                conn.execute(text(f"""
+                    INSERT INTO session_slots (session_id, participant_id, start_time, end_time)
+                    SELECT id, {column}, start_time, end_time FROM sessions
+                    WHERE status NOT IN (:rejected, :cancelled)
+                """), dict(zip(("rejected", "cancelled"), RELEASED_STATUSES)))
+
+        # Legacy sessions are copied as they are, and may run past SESSION_MAX_HOURS
+        if dialect == "postgresql":
+            longest = conn.execute(text(
+                "SELECT MAX(EXTRACT(EPOCH FROM end_time - start_time)) FROM session_slots"
+            )).scalar()
+        elif dialect == "sqlite":
+            longest = conn.execute(text(
+                "SELECT MAX((julianday(end_time) - julianday(start_time)) * 86400) FROM session_slots"
+            )).scalar()
+        else:
+            longest = None
+        _longest_slot_hours = max(float(SESSION_MAX_HOURS), float(longest or 0) / 3600)
+
+    if dialect != "postgresql":
+        return
+    try:
+        with engine.begin() as conn:
+            exists = conn.execute(
+                text("SELECT 1 FROM pg_constraint WHERE conname = :name"), {"name": _POSTGRES_CONSTRAINT}
+            ).first()
+            if not exists:
+                for statement in _POSTGRES_DDL:
+                    conn.execute(text(statement))
+    except Exception:
+        # Missing btree_gist rights or overlapping legacy bookings: lock_for_booking's
+        # per-participant advisory locks still keep new bookings apart
+        logger.exception("Could not add the %s constraint", _POSTGRES_CONSTRAINT)
+
+
+def lock_for_booking(db: DBSession, participant_ids: Iterable[int]):
+    """
+    Serialise bookings touching any of the participants for the rest of db's
+    transaction, so the conflict check and the insert cannot interleave with
+    another booking's. On SQLite this upgrades the transaction to BEGIN
+    IMMEDIATE (the write lock); on Postgres it takes a transaction-scoped
+    advisory lock per participant, with the exclusion constraint as a
+    backstop where it exists; elsewhere it locks the users' rows.
+    """
+    conn = db.connection()
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        driver = conn.connection.driver_connection
+        # An open driver transaction has already written, so it holds the write lock
+        if not driver.in_transaction:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        return
+    # Always in id order, so two bookings sharing both participants cannot deadlock
+    ids = sorted(set(participant_ids))
+    if dialect == "postgresql":
+        for participant_id in ids:
+            conn.execute(
+                text("SELECT pg_advisory_xact_lock(:lock_class, :participant_id)"),
+                {"lock_class": _POSTGRES_LOCK_CLASS, "participant_id": participant_id},
+            )
+    else:
+        db.query(User.id).filter(User.id.in_(ids)).order_by(User.id).with_for_update().all()
+
+
+def conflict_lookback() -> timedelta:
+    """How far before a range a slot can start and still reach into it."""
+    return timedelta(hours=_longest_slot_hours)
+
+
+def find_conflict(db: DBSession, participant_ids: Iterable[int], start: datetime, end: datetime) -> Optional[SessionSlot]:
+    """A slot of any of the participants overlapping [start, end), if there is one."""
+    return db.query(SessionSlot).filter(
+        SessionSlot.participant_id.in_(list(participant_ids)),
+        SessionSlot.start_time < end,
+        # No slot is longer than the lookback, so earlier starts cannot reach this one
+        SessionSlot.start_time > start - conflict_lookback(),
+        SessionSlot.end_time > start,
+    ).order_by(SessionSlot.start_time.asc()).first()
+
+
+def hold_slots(db: DBSession, session: Session):
+    """Add the session's slots for both participants; the session must be flushed."""
+    db.add_all([
+        SessionSlot(session_id=session.id, participant_id=participant_id,
+                    start_time=session.start_time, end_time=session.end_time)
+        for participant_id in (session.requester_id, session.provider_id)
+    ])
+
+
+def release_slots(db: DBSession, session: Session):
+    db.query(SessionSlot).filter(SessionSlot.session_id == session.id).delete(synchronize_session=False)
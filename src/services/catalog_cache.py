@@ -0,0 +1,95 @@
+import os
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from src.models.catalog_version import CatalogVersion
+from src.models.skill import Skill
+
+CATALOG_VERSION_CHECK_SECONDS = int(os.getenv("CATALOG_VERSION_CHECK_SECONDS", 5))
+SKILL_CATALOG = "skills"
+
+
+def bump_catalog_version(db: Session, name: str = SKILL_CATALOG):
+    """
+    Increment the catalog version inside the caller's transaction.
+    Does not commit: the bump lands together with the catalog change.
+    """
+    updated = (
+        db.query(CatalogVersion)
+        .filter(CatalogVersion.name == name)
+        .update({CatalogVersion.version: CatalogVersion.version + 1}, synchronize_session=False)
+    )
+    if not updated:
+        db.add(CatalogVersion(name=name, version=1))
+
+
+class SkillCatalogCache:
+    """
+    Per-worker copy of the non-deleted skill catalog and its category list,
+    keyed by the DB catalog version. The version row is read at most once
+    every CATALOG_VERSION_CHECK_SECONDS; the catalog itself only when it moved.
+    """
+
+    def __init__(self, check_seconds: int = CATALOG_VERSION_CHECK_SECONDS):
+        self.check_seconds = check_seconds
+        self._version: Optional[int] = None
+        self._checked_at: Optional[float] = None
+        # (version, serialized skills ordered by name, categories)
+        self._loaded: Optional[Tuple[int, List[dict], List[str]]] = None
+        self._lock = threading.Lock()
+
+    def version(self, db: Session) -> int:
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.check_seconds:
+            row = db.query(CatalogVersion.version).filter(CatalogVersion.name == SKILL_CATALOG).first()
+            self._version = row.version if row else 0
+            self._checked_at = now
+        return self._version
+
+    def expire(self):
+        """Force a version check on the next read (used after a local write)."""
+        self._checked_at = None
+
+    def skills(self, db: Session) -> Tuple[int, List[dict]]:
+        version, skills, _ = self._load(db)
+        return version, skills
+
+    def categories(self, db: Session) -> Tuple[int, List[str]]:
+        version, _, categories = self._load(db)
+        return version, categories
+
+    def _load(self, db: Session) -> Tuple[int, List[dict], List[str]]:
+        version = self.version(db)
+        loaded = self._loaded
+        if loaded and loaded[0] == version:
+            return loaded
+
+        with self._lock:
+            if self._loaded and self._loaded[0] == version:
+                return self._loaded
+
+            rows = (
+                db.query(Skill.id, Skill.name, Skill.category, Skill.description, Skill.created_at)
+                .filter(Skill.is_deleted == False)
+                .order_by(Skill.name.asc())
+                .all()
+            )
+            skills = [
+                {
+                    "name": row.name,
+                    "category": row.category,
+                    "description": row.description,
+                    "id": row.id,
+                    "created_at": row.created_at.isoformat() if row.created_at else None,
+                }
+                for row in rows
+            ]
+            categories = sorted({row.category for row in rows if row.category})
+            self._loaded = (version, skills, categories)
+            return self._loaded
+
+
+skill_catalog = SkillCatalogCache()
@@ -0,0 +1,162 @@
+import logging
+import os
+import queue
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from src.config.database import SessionLocal
+from src.models.connection_event import ConnectionEvent
+from src.schemas.connection_event import ConnectionEventType
+
+EVENT_BATCH_SIZE = int(os.getenv("CONNECTION_EVENT_BATCH_SIZE", 200))
+EVENT_FLUSH_SECONDS = float(os.getenv("CONNECTION_EVENT_FLUSH_SECONDS", 0.5))
+# Readers only see events recorded at least this long ago. Writers in several
+# workers commit out of id order; by then every lower id has committed too.
+EVENT_SETTLE_SECONDS = float(os.getenv("CONNECTION_EVENT_SETTLE_SECONDS", 5))
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionEventWriter:
+    """
+    Per-worker background writer for the append-only connection_events log.
+
+    Routes call record() after their own commit; it only enqueues, so the
+    request never waits on the insert. A daemon thread drains the queue and
+    writes whatever has accumulated (up to EVENT_BATCH_SIZE, or after
+    EVENT_FLUSH_SECONDS) as one executemany insert in its own session, then
+    hands the batch to in-process subscribers. Events still queued when the
+    process dies are lost; stop() drains the queue on a clean shutdown.
+    """
+
+    def __init__(self, batch_size: int = EVENT_BATCH_SIZE, flush_seconds: float = EVENT_FLUSH_SECONDS):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue: "queue.Queue[Optional[dict]]" = queue.Queue()
+        self._subscribers: List[Callable[[List[dict]], None]] = []
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        event_type: ConnectionEventType,
+        from_user_id: int,
+        to_user_id: int,
+        connection_id: Optional[int] = None,
+        skill_id: Optional[int] = None,
+    ):
+        self._ensure_started()
+        self._queue.put({
+            "event_type": ConnectionEventType(event_type).value,
+            "from_user_id": from_user_id,
+            "to_user_id": to_user_id,
+            "connection_id": connection_id,
+            "skill_id": skill_id,
+            "created_at": datetime.utcnow(),
+        })
+
+    def subscribe(self, callback: Callable[[List[dict]], None]):
+        """Call back with each batch once it is written; callbacks run on the writer thread."""
+        self._subscribers.append(callback)
+
+    def flush(self, timeout: Optional[float] = None):
+        """Block until everything enqueued so far is written."""
+        if self._thread is None:
+            return
+        done = threading.Event()
+        self._queue.put({"_flushed": done})
+        done.wait(timeout)
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._queue.put(None)
+        thread.join(timeout)
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="connection-event-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, waiters = [], []
+            try:
+                item = self._queue.get(timeout=self.flush_seconds)
+            except queue.Empty:
+                continue
+            # Take the first item, then whatever else is already waiting
+            while True:
+                if item is None:
+                    stopping = True
+                elif "_flushed" in item:
+                    waiters.append(item["_flushed"])
+                else:
+                    batch.append(item)
+                if stopping or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._write(batch)
+            for waiter in waiters:
+                waiter.set()
+
+    def _write(self, batch: List[dict]):
+        db = SessionLocal()
+        try:
+            db.bulk_insert_mappings(ConnectionEvent, batch)
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Dropped %d connection events", len(batch))
+            return
+        finally:
+            db.close()
+
+        for callback in self._subscribers:
+            try:
+                callback(batch)
+            except Exception:
+                logger.exception("Connection event subscriber failed")
+
+
+def settled(events: list) -> list:
+    """
+    The leading run of id-ordered events recorded at least
+    EVENT_SETTLE_SECONDS ago. Cutting at the first fresh one means an offset
+    taken from the result never moves past an event that commits late.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=EVENT_SETTLE_SECONDS)
+    for i, event in enumerate(events):
+        if event.created_at is not None and event.created_at >= cutoff:
+            return events[:i]
+    return events
+
+
+def read_events(db: Session, after: int = 0, limit: int = 100, user_id: Optional[int] = None) -> List[ConnectionEvent]:
+    """
+    Settled events with id > after, oldest first; the last id returned is the
+    consumer's next offset. Events show up EVENT_SETTLE_SECONDS after they
+    are recorded, so an offset never moves past an event that commits late.
+    """
+    query = db.query(ConnectionEvent).filter(ConnectionEvent.id > after)
+    if user_id is not None:
+        query = query.filter(or_(ConnectionEvent.from_user_id == user_id, ConnectionEvent.to_user_id == user_id))
+    return settled(query.order_by(ConnectionEvent.id.asc()).limit(limit).all())
+
+
+connection_event_writer = ConnectionEventWriter()
@@ -0,0 +1,181 @@
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from src.models.session_slot import SessionSlot
+from src.services.booking import conflict_lookback
+
+# Parsed weekly availability kept per worker, for this many users
+AVAILABILITY_CACHE_SIZE = int(os.getenv("AVAILABILITY_CACHE_SIZE", 4096))
+
+WEEK_MINUTES = 7 * 24 * 60
+DAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+_RANGE = re.compile(r"^\s*(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*$")
+
+# Intervals are (start, end) pairs, half-open, sorted and non-overlapping
+Interval = Tuple[int, int]
+
+
+def _merge(intervals: List[Interval]) -> List[Interval]:
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def parse_availability(raw: Optional[str]) -> List[Interval]:
+    """
+    Weekly availability as merged minute offsets from Monday 00:00 (UTC).
+    Days match by name or three-letter prefix; ranges may end at 24:00 or
+    run past midnight into the next day. Unreadable entries are skipped.
+    """
+    try:
+        week = json.loads(raw) if raw else {}
+    except ValueError:
+        return []
+    if not isinstance(week, dict):
+        return []
+
+    intervals = []
+    for day, ranges in week.items():
+        key = str(day).strip().lower()
+        index = next((i for i, name in enumerate(DAYS) if key in (name, name[:3])), None)
+        if index is None or not isinstance(ranges, list):
+            continue
+        for text in ranges:
+            match = _RANGE.match(str(text))
+            if not match:
+                continue
+            h1, m1, h2, m2 = map(int, match.groups())
+            start, end = h1 * 60 + m1, h2 * 60 + m2
+            if start >= 24 * 60 or end > 24 * 60 or m1 > 59 or m2 > 59 or start == end:
+                continue
+            if end < start:
+                end += 24 * 60
+            start, end = start + index * 24 * 60, end + index * 24 * 60
+            # Sunday night spilling into Monday wraps round to the start of the week
+            if end > WEEK_MINUTES:
+                intervals.append((0, end - WEEK_MINUTES))
+                end = WEEK_MINUTES
+            intervals.append((start, end))
+    return _merge(intervals)
+
+
+class AvailabilityCache:
+    """
+    Per-worker parsed availability, keyed by user and checked against the
+    stored JSON on every read, so an edit takes effect immediately.
+    """
+
+    def __init__(self, size: int = AVAILABILITY_CACHE_SIZE):
+        self.size = size
+        self._entries: "OrderedDict[int, Tuple[Optional[str], List[Interval]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int, raw: Optional[str]) -> List[Interval]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] == raw:
+                self._entries.move_to_end(user_id)
+                return entry[1]
+        weekly = parse_availability(raw)
+        with self._lock:
+            self._entries[user_id] = (raw, weekly)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return weekly
+
+
+availability_cache = AvailabilityCache()
+
+
+def _to_minutes(at: datetime, origin: datetime) -> int:
+    return int((at - origin).total_seconds() // 60)
+
+
+def expand(weekly: List[Interval], start: int, end: int) -> List[Interval]:
+    """Concrete intervals in [start, end), minutes from a Monday 00:00, from the weekly pattern."""
+    out = []
+    week = (start // WEEK_MINUTES) * WEEK_MINUTES
+    while week < end and weekly:
+        for offset_start, offset_end in weekly:
+            s, e = max(week + offset_start, start), min(week + offset_end, end)
+            if s < e:
+                out.append((s, e))
+        week += WEEK_MINUTES
+    # Ranges touching across a week boundary join up
+    return _merge(out)
+
+
+def subtract(free: List[Interval], busy: List[Interval]) -> List[Interval]:
+    """free minus busy, both sorted; one linear sweep."""
+    out = []
+    i = 0
+    for start, end in free:
+        while i < len(busy) and busy[i][1] <= start:
+            i += 1
+        j = i
+        cursor = start
+        while j < len(busy) and busy[j][0] < end:
+            if busy[j][0] > cursor:
+                out.append((cursor, busy[j][0]))
+            cursor = max(cursor, busy[j][1])
+            j += 1
+        if cursor < end:
+            out.append((cursor, end))
+    return out
+
+
+def free_slots(
+    db: Session,
+    provider_id: int,
+    availability: Optional[str],
+    start: datetime,
+    end: datetime,
+    duration_minutes: int,
+) -> List[Tuple[datetime, datetime]]:
+    """
+    Bookable slots of `duration_minutes` between start and end: the
+    provider's weekly availability expanded over the range, minus the times
+    their sessions hold (the same interval index booking checks), cut into
+    back-to-back slots from the start of each free window.
+    """
+    weekly = availability_cache.get(provider_id, availability)
+    if not weekly:
+        return []
+    monday = datetime.combine((start - timedelta(days=start.weekday())).date(), datetime.min.time())
+    # Round inwards to whole minutes
+    lo = -(-int((start - monday).total_seconds()) // 60)
+    hi = _to_minutes(end, monday)
+
+    held = db.query(SessionSlot.start_time, SessionSlot.end_time).filter(
+        SessionSlot.participant_id == provider_id,
+        SessionSlot.start_time < end,
+        SessionSlot.start_time > start - conflict_lookback(),
+        SessionSlot.end_time > start,
+    ).order_by(SessionSlot.start_time.asc()).all()
+    # Round outwards, so a slot never touches part of a held minute
+    busy = _merge([
+        (_to_minutes(s, monday), -(-int((e - monday).total_seconds()) // 60))
+        for s, e in held
+    ])
+
+    slots = []
+    for window_start, window_end in subtract(expand(weekly, lo, hi), busy):
+        at = window_start
+        while at + duration_minutes <= window_end:
+            slots.append((monday + timedelta(minutes=at), monday + timedelta(minutes=at + duration_minutes)))
+            at += duration_minutes
+    return slots
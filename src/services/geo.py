@@ -0,0 +1,241 @@
+import csv
+import math
+import os
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from src.models.user import User
+
+GAZETTEER_PATH = os.getenv(
+    "GAZETTEER_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "gazetteer.csv"),
+)
+GEO_INDEX_TTL_SECONDS = int(os.getenv("GEO_INDEX_TTL_SECONDS", 300))
+
+# users.geo_cell precision: 6 chars is a ~1.2km x 0.6km cell
+GEO_CELL_PRECISION = 6
+# Cap on cells enumerated per query; the grid precision is picked to stay under it
+MAX_QUERY_CELLS = 64
+EARTH_RADIUS_KM = 6371.0
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash(lat: float, lon: float, precision: int = GEO_CELL_PRECISION) -> str:
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """(lat_degrees, lon_degrees) covered by one geohash cell."""
+    total = 5 * precision
+    lon_bits = (total + 1) // 2
+    lat_bits = total // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def covering_cells(lat: float, lon: float, radius_km: float) -> Tuple[int, set]:
+    """Geohash cells covering the bounding box of the circle, at the finest precision under MAX_QUERY_CELLS."""
+    dlat = radius_km / 111.0
+    dlon = radius_km / (111.0 * max(math.cos(math.radians(lat)), 0.01))
+    min_lat, max_lat = max(lat - dlat, -90.0), min(lat + dlat, 90.0 - 1e-9)
+    min_lon, max_lon = lon - dlon, lon + dlon
+
+    for precision in range(GEO_CELL_PRECISION, 0, -1):
+        h, w = cell_size(precision)
+        rows = math.floor(max_lat / h) - math.floor(min_lat / h) + 1
+        cols = math.floor(max_lon / w) - math.floor(min_lon / w) + 1
+        if rows * cols <= MAX_QUERY_CELLS or precision == 1:
+            break
+
+    cells = set()
+    lat_steps = [min_lat + i * h for i in range(int(rows))] + [max_lat]
+    lon_steps = [min_lon + i * w for i in range(int(cols))] + [max_lon]
+    for cell_lat in lat_steps:
+        for cell_lon in lon_steps:
+            wrapped = ((cell_lon + 180.0) % 360.0) - 180.0
+            cells.add(geohash(min(cell_lat, max_lat), wrapped, precision))
+    return precision, cells
+
+
+_gazetteer: Optional[Dict[Tuple[str, str], Tuple[float, float]]] = None
+
+
+def _load_gazetteer() -> Dict[Tuple[str, str], Tuple[float, float]]:
+    global _gazetteer
+    if _gazetteer is None:
+        entries = {}
+        with open(GAZETTEER_PATH, encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                coords = (float(row["latitude"]), float(row["longitude"]))
+                city = row["city"].strip().lower()
+                entries[(city, row["country"].strip().lower())] = coords
+                # City-only lookups take the first country listed
+                entries.setdefault((city, ""), coords)
+        _gazetteer = entries
+    return _gazetteer
+
+
+def lookup_city(city: Optional[str], country: Optional[str] = None) -> Optional[Tuple[float, float]]:
+    """Resolve a free-text city to coordinates from the offline gazetteer."""
+    if not city or not city.strip():
+        return None
+    entries = _load_gazetteer()
+    key = " ".join(city.strip().lower().split())
+    if country and country.strip():
+        found = entries.get((key, country.strip().lower()))
+        if found:
+            return found
+    return entries.get((key, ""))
+
+
+def apply_location(user: User, latitude: Optional[float] = None, longitude: Optional[float] = None):
+    """Set lat/lon (explicit, else gazetteer from the city) and the geo_cell on a user."""
+    if latitude is not None and longitude is not None:
+        coords = (latitude, longitude)
+    else:
+        coords = lookup_city(user.location_city, user.location_country)
+
+    if coords:
+        user.latitude, user.longitude = coords
+        user.geo_cell = geohash(*coords)
+    else:
+        user.latitude = user.longitude = user.geo_cell = None
+
+
+def backfill_locations(db: Session, batch_size: int = 500) -> Tuple[int, int]:
+    """
+    Resolve coordinates for users that have a city but no latitude (rows
+    written before geo search existed). Users with explicit coordinates are
+    left alone. Returns (resolved, unresolved).
+    """
+    resolved = unresolved = 0
+    after = 0
+    while True:
+        rows = (
+            db.query(User.id, User.location_city, User.location_country)
+            .filter(User.id > after, User.latitude.is_(None), User.location_city.isnot(None))
+            .order_by(User.id.asc())
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            return resolved, unresolved
+        after = rows[-1].id
+        updates = []
+        for row in rows:
+            coords = lookup_city(row.location_city, row.location_country)
+            if coords:
+                updates.append({"id": row.id, "latitude": coords[0], "longitude": coords[1], "geo_cell": geohash(*coords)})
+            else:
+                unresolved += 1
+        if updates:
+            db.bulk_update_mappings(User, updates)
+            db.commit()
+            resolved += len(updates)
+
+
+class _Grid(NamedTuple):
+    # precision -> geohash prefix -> [(user_id, lat, lon)]
+    cells: Dict[int, Dict[str, List[Tuple[int, float, float]]]]
+    points: Dict[int, Tuple[float, float]]
+
+
+class GeoIndex:
+    """
+    Per-worker mirror of users.geo_cell, bucketed by geohash prefix at every
+    precision up to GEO_CELL_PRECISION. A radius query reads a bounded set of
+    cells and only distance-checks the users inside them, so cost follows the
+    number of nearby users rather than the table size.
+    """
+
+    def __init__(self, ttl_seconds: int = GEO_INDEX_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._grid = _Grid({p: {} for p in range(1, GEO_CELL_PRECISION + 1)}, {})
+        self._built_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def ensure_fresh(self, db: Session):
+        if self._built_at is None or time.monotonic() - self._built_at > self.ttl_seconds:
+            self.rebuild(db)
+
+    def rebuild(self, db: Session):
+        rows = db.query(User.id, User.latitude, User.longitude).filter(
+            User.is_active == True,
+            User.latitude.isnot(None),
+            User.longitude.isnot(None),
+        )
+        points = {user_id: (lat, lon) for user_id, lat, lon in rows}
+        with self._lock:
+            self._grid = self._build(points)
+            self._built_at = time.monotonic()
+
+    def update(self, user_id: int, latitude: Optional[float], longitude: Optional[float]):
+        """Patch one user after a profile change in this worker."""
+        if self._built_at is None:
+            return
+        with self._lock:
+            cells, points = self._grid
+            old = points.pop(user_id, None)
+            # Affected buckets are replaced, never mutated, so readers iterate stable lists
+            if old:
+                full = geohash(*old, GEO_CELL_PRECISION)
+                for p in range(1, GEO_CELL_PRECISION + 1):
+                    cells[p][full[:p]] = [e for e in cells[p].get(full[:p], ()) if e[0] != user_id]
+            if latitude is not None and longitude is not None:
+                points[user_id] = (latitude, longitude)
+                full = geohash(latitude, longitude, GEO_CELL_PRECISION)
+                for p in range(1, GEO_CELL_PRECISION + 1):
+                    cells[p][full[:p]] = cells[p].get(full[:p], []) + [(user_id, latitude, longitude)]
+
+    def within(self, lat: float, lon: float, radius_km: float) -> List[Tuple[int, float]]:
+        """[(user_id, distance_km)] inside the radius, nearest first."""
+        grid = self._grid
+        precision, cells = covering_cells(lat, lon, radius_km)
+        buckets = grid.cells[precision]
+
+        found = []
+        for cell in cells:
+            for user_id, user_lat, user_lon in buckets.get(cell, ()):
+                distance = haversine_km(lat, lon, user_lat, user_lon)
+                if distance <= radius_km:
+                    found.append((user_id, distance))
+        found.sort(key=lambda item: item[1])
+        return found
+
+    @staticmethod
+    def _build(points: Dict[int, Tuple[float, float]]) -> _Grid:
+        cells = {p: {} for p in range(1, GEO_CELL_PRECISION + 1)}
+        for user_id, (lat, lon) in points.items():
+            full = geohash(lat, lon, GEO_CELL_PRECISION)
+            for p in range(1, GEO_CELL_PRECISION + 1):
+                cells[p].setdefault(full[:p], []).append((user_id, lat, lon))
+        return _Grid(cells, points)
+
+
+geo_index = GeoIndex()
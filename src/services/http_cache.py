@@ -0,0 +1,43 @@
+import hashlib
+from typing import Optional
+from fastapi import Response
+
+
+def make_weak_etag(*parts) -> str:
+    """
+    Build a weak ETag from the version parts of an entity (ids, updated_at, counts).
+    Weak because the body is only semantically equivalent, not byte identical.
+    """
+    raw = "|".join("" if p is None else str(p) for p in parts)
+    digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match uses weak comparison, so the W/ prefix is ignored on both sides
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def not_modified(etag: str, cache_control: str = "no-cache") -> Response:
+    return Response(
+        status_code=304,
+        headers={"ETag": etag, "Cache-Control": cache_control},
+    )
+
+
+def set_cache_headers(response: Response, etag: str, cache_control: str = "no-cache"):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
@@ -0,0 +1,264 @@
+import heapq
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from src.config.database import SessionLocal
+from src.models.review import Review
+from src.models.skill import Skill
+from src.models.user import User
+from src.models.user_skill import UserSkill
+from src.schemas.user_skill import SkillRole
+
+MENTOR_INDEX_TTL_SECONDS = int(os.getenv("MENTOR_INDEX_TTL_SECONDS", 60))
+FACET_LIMIT = 20
+
+RATING_BUCKETS = ["4-5", "3-4", "2-3", "1-2", "unrated"]
+FACETS = ("skill", "category", "city", "rating")
+
+logger = logging.getLogger(__name__)
+
+
+def rating_bucket(avg: Optional[float]) -> str:
+    if avg is None:
+        return "unrated"
+    floor = min(max(int(avg), 1), 4)
+    return f"{floor}-{floor + 1}"
+
+
+def bitmap_of(positions: List[int], size: int) -> int:
+    """Bitmap with the given bits set, built in one pass instead of one OR per bit."""
+    buf = bytearray((size + 7) // 8)
+    for pos in positions:
+        buf[pos >> 3] |= 1 << (pos & 7)
+    return int.from_bytes(buf, "little")
+
+
+def iter_bits(bitmap: int, skip: int = 0):
+    """
+    Yield set bit positions, lowest first, after skipping the first `skip`.
+    The bitmap is split into 64-bit words once; whole words are skipped by
+    popcount, and bits are peeled off a word with x & -x. Peeling them off
+    the full-width int instead would cost O(N) per bit.
+    """
+    raw = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    for offset in range(0, len(raw), 8):
+        word = int.from_bytes(raw[offset:offset + 8], "little")
+        if skip:
+            ones = word.bit_count()
+            if skip >= ones:
+                skip -= ones
+                continue
+        while word:
+            low = word & -word
+            word ^= low
+            if skip:
+                skip -= 1
+                continue
+            yield offset * 8 + low.bit_length() - 1
+
+
+class _Snapshot(NamedTuple):
+    docs: List[dict]
+    # facet -> value -> bitmap over doc positions
+    postings: Dict[str, Dict[str, int]]
+    labels: Dict[str, Dict[str, str]]
+    all_docs: int
+    # facet -> [(unfiltered count, value)], most documents first
+    totals: Dict[str, List[Tuple[int, str]]]
+
+
+class MentorFacetIndex:
+    """
+    Per-worker posting lists over teachable UserSkill rows of active users.
+
+    Each facet value (skill, category, city, rating bucket) owns a bitmap held
+    in a Python int, bit i meaning document i. Filtering is a chain of ANDs and
+    a facet count is popcount(result & value), so one request costs CPU time
+    instead of a GROUP BY per facet. Unfiltered counts are kept from the
+    build, and a filtered facet stops ANDing once no remaining value's
+    unfiltered count could reach its top FACET_LIMIT. Rebuilt on a TTL: the first build blocks,
+    later ones run on a background thread (one at a time) while requests keep
+    reading the previous snapshot.
+    """
+
+    def __init__(self, ttl_seconds: int = MENTOR_INDEX_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._snapshot = _Snapshot(
+            [], {facet: {} for facet in FACETS}, {facet: {} for facet in FACETS}, 0, {facet: [] for facet in FACETS}
+        )
+        self._built_at: Optional[float] = None
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    def ensure_fresh(self, db: Session):
+        if self._built_at is None:
+            with self._lock:
+                if self._built_at is None:
+                    self.rebuild(db)
+        elif time.monotonic() - self._built_at > self.ttl_seconds:
+            self._refresh_in_background()
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._background_rebuild, name="mentor-index-rebuild", daemon=True).start()
+
+    def _background_rebuild(self):
+        db = SessionLocal()
+        try:
+            self.rebuild(db)
+        except Exception:
+            logger.exception("Mentor index rebuild failed")
+        finally:
+            db.close()
+            with self._lock:
+                self._refreshing = False
+
+    def rebuild(self, db: Session):
+        ratings = dict(
+            db.query(Review.subject_id, func.avg(Review.rating)).group_by(Review.subject_id).all()
+        )
+        rows = (
+            db.query(UserSkill, Skill.name, Skill.category, User.location_city)
+            .join(User, UserSkill.user_id == User.id)
+            .join(Skill, UserSkill.skill_id == Skill.id)
+            .filter(
+                UserSkill.role == SkillRole.teach,
+                User.is_active == True,
+                Skill.is_deleted == False,
+            )
+            .order_by(UserSkill.id.asc())
+            .all()
+        )
+
+        docs = []
+        # facet -> value -> doc positions, turned into bitmaps once all rows are seen
+        positions: Dict[str, Dict[str, List[int]]] = {facet: {} for facet in FACETS}
+        labels: Dict[str, Dict[str, str]] = {facet: {} for facet in FACETS}
+
+        def post(facet, value, label, pos):
+            positions[facet].setdefault(value, []).append(pos)
+            labels[facet].setdefault(value, label)
+
+        for pos, (user_skill, skill_name, category, city) in enumerate(rows):
+            docs.append({
+                "id": user_skill.id,
+                "role": user_skill.role,
+                "user_id": user_skill.user_id,
+                "skill_id": user_skill.skill_id,
+                "teaching_style": user_skill.teaching_style,
+                "experience_note": user_skill.experience_note,
+                "created_at": user_skill.created_at,
+            })
+            post("skill", str(user_skill.skill_id), skill_name, pos)
+            if category:
+                post("category", category.strip().lower(), category, pos)
+            if city and city.strip():
+                post("city", city.strip().lower(), city.strip(), pos)
+            bucket = rating_bucket(ratings.get(user_skill.user_id))
+            post("rating", bucket, bucket, pos)
+
+        postings = {
+            facet: {value: bitmap_of(found, len(docs)) for value, found in values.items()}
+            for facet, values in positions.items()
+        }
+        totals = {
+            facet: sorted(((len(found), value) for value, found in values.items()), key=lambda t: (-t[0], t[1]))
+            for facet, values in positions.items()
+        }
+        self._snapshot = _Snapshot(docs, postings, labels, (1 << len(docs)) - 1, totals)
+        self._built_at = time.monotonic()
+
+    def search(
+        self,
+        skill_id: Optional[int] = None,
+        category: Optional[str] = None,
+        city: Optional[str] = None,
+        rating: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 20,
+    ) -> dict:
+        snap = self._snapshot
+        filters = {
+            "skill": self._match_exact(snap, "skill", str(skill_id) if skill_id else None),
+            "category": self._match_exact(snap, "category", category.strip().lower() if category else None),
+            # Substring match like discover_mentors' ilike('%city%'): OR of matching city values
+            "city": self._match_substring(snap, "city", city.strip().lower() if city else None),
+            "rating": self._match_exact(snap, "rating", rating),
+        }
+
+        result = snap.all_docs
+        for bitmap in filters.values():
+            result &= bitmap
+
+        # Disjunctive counts: each facet ignores its own filter, so siblings stay visible
+        facets = {}
+        for facet in FACETS:
+            base = snap.all_docs
+            for other, bitmap in filters.items():
+                if other != facet:
+                    base &= bitmap
+            facets[facet] = self._facet_counts(snap, facet, base)
+
+        page = []
+        for pos in iter_bits(result, skip):
+            if len(page) >= limit:
+                break
+            page.append(snap.docs[pos])
+
+        return {"total": result.bit_count(), "results": page, "facets": facets}
+
+    @staticmethod
+    def _facet_counts(snap: _Snapshot, facet: str, base: int) -> List[dict]:
+        totals = snap.totals[facet]
+        if base == snap.all_docs:
+            counted = totals[:FACET_LIMIT]
+        else:
+            counted = []
+            # The FACET_LIMIT best counts so far, smallest on top
+            best: List[int] = []
+            postings = snap.postings[facet]
+            for total, value in totals:
+                # A count never exceeds the unfiltered one, so nothing further down can place
+                if len(best) == FACET_LIMIT and total < best[0]:
+                    break
+                count = (base & postings[value]).bit_count()
+                if count:
+                    counted.append((count, value))
+                    if len(best) < FACET_LIMIT:
+                        heapq.heappush(best, count)
+                    elif count > best[0]:
+                        heapq.heapreplace(best, count)
+            counted.sort(key=lambda t: (-t[0], t[1]))
+            del counted[FACET_LIMIT:]
+        return [
+            {"value": value, "label": snap.labels[facet][value], "count": count}
+            for count, value in counted
+        ]
+
+    @staticmethod
+    def _match_exact(snap: _Snapshot, facet: str, value: Optional[str]) -> int:
+        if value is None:
+            return snap.all_docs
+        return snap.postings[facet].get(value, 0)
+
+    @staticmethod
+    def _match_substring(snap: _Snapshot, facet: str, needle: Optional[str]) -> int:
+        if not needle:
+            return snap.all_docs
+        bitmap = 0
+        for value, postings in snap.postings[facet].items():
+            if needle in value:
+                bitmap |= postings
+        return bitmap
+
+
+mentor_index = MentorFacetIndex()
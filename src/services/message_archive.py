@@ -0,0 +1,255 @@
+import json
+import logging
+import os
+import threading
+import zlib
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session, defer
+
+from src.config.database import SessionLocal
+from src.models.conversation import Conversation
+from src.models.message import Message
+from src.models.message_archive import MessageArchiveSegment
+
+# Messages older than this move out of the hot messages table
+MESSAGE_ARCHIVE_AFTER_DAYS = int(os.getenv("MESSAGE_ARCHIVE_AFTER_DAYS", 180))
+MESSAGE_ARCHIVE_SEGMENT_SIZE = int(os.getenv("MESSAGE_ARCHIVE_SEGMENT_SIZE", 500))
+# Seconds between passes of the in-process archiver; 0 leaves it to archive_messages.py
+MESSAGE_ARCHIVE_INTERVAL_SECONDS = float(os.getenv("MESSAGE_ARCHIVE_INTERVAL_SECONDS", 3600))
+MESSAGE_ARCHIVE_BATCH_CONVERSATIONS = int(os.getenv("MESSAGE_ARCHIVE_BATCH_CONVERSATIONS", 100))
+
+logger = logging.getLogger(__name__)
+
+
+def _pack(messages: List[Message]) -> bytes:
+    rows = [
+        [m.id, m.sender_id, m.content, m.sent_at.isoformat() if m.sent_at else None,
+         m.updated_at.isoformat() if m.updated_at else None]
+        for m in messages
+    ]
+    return zlib.compress(json.dumps(rows, separators=(",", ":")).encode(), 9)
+
+
+def _unpack(segment: MessageArchiveSegment) -> List[Message]:
+    """The segment's messages, oldest first, as transient Message objects (never added to a session)."""
+    return [
+        Message(
+            id=message_id,
+            conversation_id=segment.conversation_id,
+            sender_id=sender_id,
+            content=content,
+            is_read=False,
+            sent_at=datetime.fromisoformat(sent_at) if sent_at else None,
+            updated_at=datetime.fromisoformat(updated_at) if updated_at else None,
+        )
+        for message_id, sender_id, content, sent_at, updated_at in json.loads(zlib.decompress(segment.data))
+    ]
+
+
+def _segments(db: Session, conversation_id: int):
+    # Payloads load per segment on first access, so a page only decompresses what it reads
+    return db.query(MessageArchiveSegment).options(defer(MessageArchiveSegment.data)).filter(
+        MessageArchiveSegment.conversation_id == conversation_id
+    )
+
+
+def archived_before(db: Session, conversation_id: int, before: Optional[int], limit: int) -> List[Message]:
+    """Up to `limit` archived messages with id < before (all if None), newest first."""
+    segments = _segments(db, conversation_id)
+    if before is not None:
+        segments = segments.filter(MessageArchiveSegment.first_message_id < before)
+    found = []
+    for segment in segments.order_by(MessageArchiveSegment.last_message_id.desc()):
+        found.extend(m for m in reversed(_unpack(segment)) if before is None or m.id < before)
+        if len(found) >= limit:
+            break
+    return found[:limit]
+
+
+def archived_from(db: Session, conversation_id: int, start: int, limit: int) -> List[Message]:
+    """Up to `limit` archived messages with id >= start, oldest first."""
+    segments = _segments(db, conversation_id).filter(MessageArchiveSegment.last_message_id >= start)
+    found = []
+    for segment in segments.order_by(MessageArchiveSegment.first_message_id.asc()):
+        found.extend(m for m in _unpack(segment) if m.id >= start)
+        if len(found) >= limit:
+            break
+    return found[:limit]
+
+
+def has_archived_before(db: Session, conversation_id: int, before: int) -> bool:
+    return db.query(
+        _segments(db, conversation_id).filter(MessageArchiveSegment.first_message_id < before).exists()
+    ).scalar()
+
+
+def first_archived_unread(db: Session, conversation_id: int, read_up_to: int, reader_id: int) -> Optional[int]:
+    """Id of the first archived message above read_up_to that reader_id did not send."""
+    segments = _segments(db, conversation_id).filter(MessageArchiveSegment.last_message_id > read_up_to)
+    for segment in segments.order_by(MessageArchiveSegment.first_message_id.asc()):
+        for message in _unpack(segment):
+            if message.id > read_up_to and message.sender_id != reader_id:
+                return message.id
+    return None
+
+
+def find_archived_message(db: Session, message_id: int, user_id: int,
+                          conversation_id: Optional[int] = None) -> Optional[Message]:
+    """
+    An archived message from one of user_id's conversations (or just
+    conversation_id, when the caller knows it). Segments of one conversation
+    never overlap, so each conversation offers at most one candidate: the
+    first segment ending at or after the id, a (conversation_id,
+    last_message_id) index probe.
+    """
+    conversations = db.query(Conversation.id).filter(
+        or_(Conversation.user1_id == user_id, Conversation.user2_id == user_id),
+        Conversation.archived_through_id >= message_id,
+    )
+    if conversation_id is not None:
+        conversations = conversations.filter(Conversation.id == conversation_id)
+    candidates = db.query(MessageArchiveSegment).options(defer(MessageArchiveSegment.data)).filter(
+        MessageArchiveSegment.conversation_id.in_(conversations.scalar_subquery()),
+        MessageArchiveSegment.first_message_id <= message_id,
+        MessageArchiveSegment.last_message_id >= message_id,
+    ).order_by(MessageArchiveSegment.last_message_id.asc())
+    for segment in candidates:
+        # Ranges of different conversations interleave, so the id may fall in a gap
+        for message in _unpack(segment):
+            if message.id == message_id:
+                return message
+    return None
+
+
+def archive_conversation(db: Session, conversation: Conversation, cutoff: datetime,
+                         segment_size: int = MESSAGE_ARCHIVE_SEGMENT_SIZE) -> int:
+    """
+    Move the conversation's messages sent before `cutoff` into segments and
+    delete them from messages, in one transaction; returns how many moved.
+
+    Only a prefix of the history is archived (up to the first message newer
+    than the cutoff, never the last message), so every archived id is below
+    every hot one. While the conversation is active only full segments are
+    written; once it has gone quiet the remainder is flushed too.
+    """
+    if conversation.last_message_id is None:
+        return 0
+    newer = db.query(func.min(Message.id)).filter(
+        Message.conversation_id == conversation.id, Message.sent_at >= cutoff
+    ).scalar()
+    upper = min(conversation.last_message_id, newer) if newer is not None else conversation.last_message_id
+    dormant = conversation.last_message_at < cutoff
+
+    through = previous = conversation.archived_through_id or 0
+    moved = 0
+    while True:
+        batch = (
+            db.query(Message)
+            .filter(Message.conversation_id == conversation.id, Message.id > through, Message.id < upper)
+            .order_by(Message.id.asc())
+            .limit(segment_size)
+            .all()
+        )
+        if not batch or (len(batch) < segment_size and not dormant):
+            break
+        db.add(MessageArchiveSegment(
+            conversation_id=conversation.id,
+            first_message_id=batch[0].id,
+            last_message_id=batch[-1].id,
+            message_count=len(batch),
+            first_sent_at=batch[0].sent_at,
+            last_sent_at=batch[-1].sent_at,
+            data=_pack(batch),
+        ))
+        through = batch[-1].id
+        moved += len(batch)
+        for message in batch:
+            db.expunge(message)
+    if not moved:
+        return 0
+
+    db.query(Message).filter(
+        Message.conversation_id == conversation.id, Message.id > previous, Message.id <= through
+    ).delete(synchronize_session=False)
+    # Guarded on the old boundary, so a concurrent archiver makes one of us roll back
+    claimed = db.query(Conversation).filter(
+        Conversation.id == conversation.id, Conversation.archived_through_id == previous
+    ).update({Conversation.archived_through_id: through}, synchronize_session=False)
+    if not claimed:
+        db.rollback()
+        return 0
+    db.commit()
+    return moved
+
+
+def archive_once(db: Session, older_than_days: int = MESSAGE_ARCHIVE_AFTER_DAYS) -> dict:
+    """One pass over every conversation whose oldest hot message is past the cutoff."""
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    oldest = select(func.min(Message.id)).where(
+        Message.conversation_id == Conversation.id
+    ).correlate(Conversation).scalar_subquery()
+    stats = {"conversations": 0, "messages": 0}
+    after = 0
+    while True:
+        # Oldest hot message per conversation is a (conversation_id, id) index probe
+        candidates = (
+            db.query(Conversation)
+            .join(Message, Message.id == oldest)
+            .filter(
+                Conversation.id > after,
+                Message.sent_at < cutoff,
+                Message.id != Conversation.last_message_id,
+            )
+            .order_by(Conversation.id.asc())
+            .limit(MESSAGE_ARCHIVE_BATCH_CONVERSATIONS)
+            .all()
+        )
+        if not candidates:
+            return stats
+        after = candidates[-1].id
+        for conversation in candidates:
+            moved = archive_conversation(db, conversation, cutoff)
+            if moved:
+                stats["conversations"] += 1
+                stats["messages"] += moved
+
+
+class MessageArchiver:
+    """Runs archive_once every MESSAGE_ARCHIVE_INTERVAL_SECONDS on a daemon thread."""
+
+    def __init__(self, interval_seconds: float = MESSAGE_ARCHIVE_INTERVAL_SECONDS):
+        self.interval_seconds = interval_seconds
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def start(self):
+        if self._thread is not None or self.interval_seconds <= 0:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="message-archiver", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stopping.wait(self.interval_seconds):
+            db = SessionLocal()
+            try:
+                stats = archive_once(db)
+                if stats["messages"]:
+                    logger.info("Archived %(messages)s messages from %(conversations)s conversations", stats)
+            except Exception:
+                db.rollback()
+                logger.exception("Message archive pass failed")
+            finally:
+                db.close()
+
+
+message_archiver = MessageArchiver()
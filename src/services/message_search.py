@@ -0,0 +1,165 @@
+import base64
+import html
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from src.models.conversation import Conversation
+from src.models.message import Message
+
+# Postgres text search configuration; "simple" does no stemming, so it suits mixed-language chat
+SEARCH_CONFIG = "simple"
+SNIPPET_START, SNIPPET_END = "<mark>", "</mark>"
+SNIPPET_WORDS = 12
+# The database marks matches with these private-use characters; the text
+# around them is HTML-escaped before they become SNIPPET_START/END
+_MARK_START, _MARK_END = "\ue000", "\ue001"
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+# SQLite: FTS5 external-content table over messages, kept in step by triggers
+_SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(content, content='messages', content_rowid='id')",
+    """CREATE TRIGGER IF NOT EXISTS messages_fts_ai AFTER INSERT ON messages BEGIN
+        INSERT INTO messages_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS messages_fts_ad AFTER DELETE ON messages BEGIN
+        INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS messages_fts_au AFTER UPDATE OF content ON messages BEGIN
+        INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO messages_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+]
+
+# Postgres: GIN expression index, matched by the same to_tsvector() expression in queries
+_POSTGRES_DDL = [
+    f"CREATE INDEX IF NOT EXISTS ix_messages_content_fts ON messages USING GIN (to_tsvector('{SEARCH_CONFIG}', content))",
+]
+
+
+def ensure_search_index(engine: Engine):
+    """Create the full-text index for this database if missing; safe to run on every startup."""
+    dialect = engine.dialect.name
+    with engine.begin() as conn:
+        if dialect == "postgresql":
+            for statement in _POSTGRES_DDL:
+                conn.execute(text(statement))
+        elif dialect == "sqlite":
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'")
+            ).first()
+            for statement in _SQLITE_DDL:
+                conn.execute(text(statement))
+            if not exists:
+                # Index messages written before the table existed
+                conn.execute(text("INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')"))
+
+
+def encode_cursor(score: float, message_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{score!r}:{message_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    """Raises ValueError on a malformed cursor."""
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    score, message_id = raw.rsplit(":", 1)
+    return float(score), int(message_id)
+
+
+def _render_snippet(raw: Optional[str]) -> str:
+    escaped = html.escape(raw or "", quote=False)
+    return escaped.replace(_MARK_START, SNIPPET_START).replace(_MARK_END, SNIPPET_END)
+
+
+def _fts5_query(q: str) -> Optional[str]:
+    # Quote every word so user input is never parsed as FTS5 syntax; the last one matches as a prefix
+    words = _WORD.findall(q)
+    if not words:
+        return None
+    quoted = ['"' + w.replace('"', '""') + '"' for w in words]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def search_messages(
+    db: Session,
+    user_id: int,
+    q: str,
+    limit: int,
+    after: Optional[Tuple[float, int]] = None,
+    conversation_id: Optional[int] = None,
+) -> List[dict]:
+    """
+    Best matches first among messages in user_id's conversations, as
+    [{"id", "score", "snippet"}], higher score better. Fetches limit + 1 so
+    the caller can tell whether another page exists.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return _search_postgres(db, user_id, q, limit, after, conversation_id)
+    if dialect == "sqlite":
+        return _search_sqlite(db, user_id, q, limit, after, conversation_id)
+    raise NotImplementedError(f"Message search is not available on {dialect}")
+
+
+def _search_postgres(db, user_id, q, limit, after, conversation_id):
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    document = func.to_tsvector(SEARCH_CONFIG, Message.content)
+    score = func.ts_rank(document, query)
+
+    matches = (
+        select(Message.id.label("id"), score.label("score"))
+        .join(Conversation, Message.conversation_id == Conversation.id)
+        .where(
+            document.op("@@")(query),
+            or_(Conversation.user1_id == user_id, Conversation.user2_id == user_id),
+        )
+    )
+    if conversation_id is not None:
+        matches = matches.where(Message.conversation_id == conversation_id)
+    if after:
+        last_score, last_id = after
+        matches = matches.where(or_(score < last_score, and_(score == last_score, Message.id < last_id)))
+    page = matches.order_by(score.desc(), Message.id.desc()).limit(limit + 1).subquery()
+
+    # Headlines are costly, so they are only built for the page
+    headline = func.ts_headline(
+        SEARCH_CONFIG, Message.content, query,
+        f"StartSel={_MARK_START}, StopSel={_MARK_END}, MaxFragments=1, MaxWords={SNIPPET_WORDS}, MinWords=3",
+    )
+    rows = db.execute(
+        select(page.c.id, page.c.score, headline.label("snippet"))
+        .join(Message, Message.id == page.c.id)
+        .order_by(page.c.score.desc(), page.c.id.desc())
+    ).all()
+    return [{"id": r.id, "score": float(r.score), "snippet": _render_snippet(r.snippet)} for r in rows]
+
+
+def _search_sqlite(db, user_id, q, limit, after, conversation_id):
+    match = _fts5_query(q)
+    if match is None:
+        return []
+    # bm25() is lower-is-better; negate it so both backends rank high to low
+    sql = f"""
+        SELECT m.id AS id, -bm25(messages_fts) AS score,
+               snippet(messages_fts, 0, :start, :end, '…', {SNIPPET_WORDS}) AS snippet
+        FROM messages_fts
+        JOIN messages m ON m.id = messages_fts.rowid
+        JOIN conversations c ON c.id = m.conversation_id
+        WHERE messages_fts MATCH :match
+          AND (c.user1_id = :user_id OR c.user2_id = :user_id)
+    """
+    params = {"start": _MARK_START, "end": _MARK_END, "match": match, "user_id": user_id, "limit": limit + 1}
+    if conversation_id is not None:
+        sql += " AND m.conversation_id = :conversation_id"
+        params["conversation_id"] = conversation_id
+    if after:
+        sql += " AND (-bm25(messages_fts) < :last_score OR (-bm25(messages_fts) = :last_score AND m.id < :last_id))"
+        params["last_score"], params["last_id"] = after
+    sql += " ORDER BY score DESC, m.id DESC LIMIT :limit"
+    rows = db.execute(text(sql), params).all()
+    return [{"id": r.id, "score": r.score, "snippet": _render_snippet(r.snippet)} for r in rows]
@@ -0,0 +1,211 @@
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy import event, func, or_, select
+from sqlalchemy.orm import Session
+
+from src.config.database import SessionLocal
+from src.models.notification import Notification
+from src.models.notification_outbox import NotificationOutbox
+from src.services.realtime import publish_to_users
+
+OUTBOX_WORKERS = int(os.getenv("NOTIFICATION_OUTBOX_WORKERS", 2))
+OUTBOX_BATCH_SIZE = int(os.getenv("NOTIFICATION_OUTBOX_BATCH_SIZE", 500))
+OUTBOX_POLL_SECONDS = float(os.getenv("NOTIFICATION_OUTBOX_POLL_SECONDS", 1.0))
+# A claim older than this is assumed to belong to a dead worker
+OUTBOX_CLAIM_TIMEOUT_SECONDS = int(os.getenv("NOTIFICATION_OUTBOX_CLAIM_TIMEOUT_SECONDS", 60))
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_notifications(db: Session, notifications: List[dict]):
+    """
+    Write outbox rows in the caller's transaction; nothing is delivered
+    unless the caller commits. Each dict has recipient_id, type, content
+    and optionally related_entity_id.
+    """
+    if not notifications:
+        return
+    now = datetime.utcnow()
+    db.bulk_insert_mappings(NotificationOutbox, [
+        {"related_entity_id": None, **n, "created_at": now}
+        for n in notifications
+    ])
+    db.info["notification_outbox"] = True
+
+
+def _coalesce_key(row: NotificationOutbox):
+    # Repeats about the same entity collapse into one; free-text ones only when identical
+    if row.related_entity_id is not None:
+        return row.recipient_id, row.type, row.related_entity_id
+    return row.recipient_id, row.type, None, row.content
+
+
+class NotificationOutboxWorker:
+    """
+    Drains notification_outbox into notifications with a small thread pool.
+
+    Each pass claims up to OUTBOX_BATCH_SIZE rows with one UPDATE, so workers
+    in this or other processes never take the same rows. It coalesces
+    duplicates, bulk-inserts the notifications and deletes the claimed rows
+    in one transaction. Workers wake on commits that wrote outbox rows and
+    otherwise poll every OUTBOX_POLL_SECONDS.
+    """
+
+    def __init__(self, batch_size: int = OUTBOX_BATCH_SIZE, poll_seconds: float = OUTBOX_POLL_SECONDS):
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self._threads: List[threading.Thread] = []
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = {
+            "delivered": 0,
+            "coalesced": 0,
+            "batches": 0,
+            "failures": 0,
+            "lag_seconds_total": 0.0,
+            "max_lag_seconds": 0.0,
+            "last_lag_seconds": None,
+            "last_delivery_at": None,
+        }
+
+    def start(self, workers: int = OUTBOX_WORKERS):
+        if self._threads or workers <= 0:
+            return
+        self._stopping.clear()
+        for i in range(workers):
+            thread = threading.Thread(target=self._run, name=f"notification-outbox-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        self._stopping.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def wake(self):
+        self._wake.set()
+
+    def drain_once(self, db: Session) -> int:
+        """Deliver one claimed batch; returns the number of outbox rows consumed."""
+        token = uuid.uuid4().hex
+        now = datetime.utcnow()
+        available = or_(
+            NotificationOutbox.claim_token.is_(None),
+            NotificationOutbox.claimed_at < now - timedelta(seconds=OUTBOX_CLAIM_TIMEOUT_SECONDS),
+        )
+        candidates = select(NotificationOutbox.id).where(available).order_by(NotificationOutbox.id).limit(self.batch_size)
+        # Re-checking `available` makes a concurrent claimer skip rows another worker just took
+        claimed = db.query(NotificationOutbox).filter(NotificationOutbox.id.in_(candidates), available).update(
+            {NotificationOutbox.claim_token: token, NotificationOutbox.claimed_at: now},
+            synchronize_session=False,
+        )
+        db.commit()
+        if not claimed:
+            return 0
+
+        rows = (
+            db.query(NotificationOutbox)
+            .filter(NotificationOutbox.claim_token == token)
+            .order_by(NotificationOutbox.id.asc())
+            .all()
+        )
+        latest = {}
+        for row in rows:
+            latest[_coalesce_key(row)] = row
+
+        deleted = db.query(NotificationOutbox).filter(NotificationOutbox.claim_token == token).delete(
+            synchronize_session=False
+        )
+        if deleted != len(rows):
+            # Our claim went stale and another worker took some rows; let it deliver them
+            db.rollback()
+            return 0
+
+        db.bulk_insert_mappings(Notification, [
+            {
+                "recipient_id": row.recipient_id,
+                "type": row.type,
+                "content": row.content,
+                "related_entity_id": row.related_entity_id,
+                "is_read": False,
+                "created_at": row.created_at,
+            }
+            for row in latest.values()
+        ])
+        created = [row.created_at for row in rows]
+        recipients = {row.recipient_id for row in latest.values()}
+        db.commit()
+        # Wake-up only: streams read the new rows themselves, by id
+        publish_to_users(recipients, {"type": "notification"})
+
+        delivered_at = datetime.utcnow()
+        lags = [(delivered_at - created_at).total_seconds() for created_at in created]
+        with self._lock:
+            self._stats["delivered"] += len(latest)
+            self._stats["coalesced"] += len(rows) - len(latest)
+            self._stats["batches"] += 1
+            self._stats["lag_seconds_total"] += sum(lags)
+            self._stats["max_lag_seconds"] = max(self._stats["max_lag_seconds"], max(lags))
+            self._stats["last_lag_seconds"] = lags[-1]
+            self._stats["last_delivery_at"] = delivered_at
+        return len(rows)
+
+    def metrics(self, db: Session) -> dict:
+        backlog, oldest = db.query(func.count(NotificationOutbox.id), func.min(NotificationOutbox.created_at)).one()
+        with self._lock:
+            stats = dict(self._stats)
+        consumed = stats["delivered"] + stats["coalesced"]
+        return {
+            "backlog": backlog,
+            "oldest_pending_seconds": (datetime.utcnow() - oldest).total_seconds() if oldest else 0.0,
+            "workers": len(self._threads),
+            "delivered": stats["delivered"],
+            "coalesced": stats["coalesced"],
+            "batches": stats["batches"],
+            "failures": stats["failures"],
+            "avg_lag_seconds": stats["lag_seconds_total"] / consumed if consumed else None,
+            "max_lag_seconds": stats["max_lag_seconds"],
+            "last_lag_seconds": stats["last_lag_seconds"],
+            "last_delivery_at": stats["last_delivery_at"],
+        }
+
+    def _run(self):
+        while not self._stopping.is_set():
+            db = SessionLocal()
+            try:
+                consumed = self.drain_once(db)
+            except Exception:
+                db.rollback()
+                logger.exception("Notification outbox batch failed")
+                with self._lock:
+                    self._stats["failures"] += 1
+                consumed = 0
+            finally:
+                db.close()
+
+            # A full batch means more may be waiting, so go again straight away
+            if consumed < self.batch_size:
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+
+
+outbox_worker = NotificationOutboxWorker()
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_outbox_worker(session):
+    if session.info.pop("notification_outbox", False):
+        outbox_worker.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_outbox_rows(session):
+    session.info.pop("notification_outbox", None)
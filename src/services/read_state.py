@@ -0,0 +1,100 @@
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.orm import Session
+
+from src.models.conversation import Conversation
+from src.models.message import Message
+
+
+def _legacy_watermark(reader_column):
+    """Highest message the reader did not send that the legacy is_read flag marks read."""
+    return func.coalesce(
+        select(func.max(Message.id)).where(
+            Message.conversation_id == Conversation.id,
+            Message.sender_id != reader_column,
+            Message.is_read.is_(True),
+        ).correlate(Conversation).scalar_subquery(),
+        0,
+    )
+
+
+def _unread_above(reader_column, watermark_column):
+    return select(func.count(Message.id)).where(
+        Message.conversation_id == Conversation.id,
+        Message.sender_id != reader_column,
+        Message.id > watermark_column,
+    ).correlate(Conversation).scalar_subquery()
+
+
+def backfill_read_watermarks(db: Session, batch_size: int = 500) -> int:
+    """
+    Seed each participant's read watermark from the per-message is_read flag
+    written before watermarks existed, then recount both unread counters
+    from the watermarks. A watermark only ever moves forward, so reads made
+    since the deploy are kept. Commits per batch; returns how many
+    conversations it went through.
+    """
+    done = 0
+    after = 0
+    while True:
+        ids = [
+            conversation_id for (conversation_id,) in
+            db.query(Conversation.id).filter(Conversation.id > after)
+            .order_by(Conversation.id.asc()).limit(batch_size).all()
+        ]
+        if not ids:
+            return done
+        batch = and_(Conversation.id >= ids[0], Conversation.id <= ids[-1])
+
+        legacy1 = _legacy_watermark(Conversation.user1_id)
+        legacy2 = _legacy_watermark(Conversation.user2_id)
+        db.query(Conversation).filter(batch).update({
+            Conversation.user1_last_read_id: case(
+                (legacy1 > Conversation.user1_last_read_id, legacy1), else_=Conversation.user1_last_read_id
+            ),
+            Conversation.user2_last_read_id: case(
+                (legacy2 > Conversation.user2_last_read_id, legacy2), else_=Conversation.user2_last_read_id
+            ),
+        }, synchronize_session=False)
+        # Separate statement, so the counts see the watermarks just written
+        db.query(Conversation).filter(batch).update({
+            Conversation.user1_unread: _unread_above(Conversation.user1_id, Conversation.user1_last_read_id),
+            Conversation.user2_unread: _unread_above(Conversation.user2_id, Conversation.user2_last_read_id),
+        }, synchronize_session=False)
+        db.commit()
+        done += len(ids)
+        after = ids[-1]
+
+
+def backfill_last_messages(db: Session, batch_size: int = 500) -> int:
+    """
+    Fill last_message_id / last_message_at for conversations written before
+    the inbox kept them (send_message is their only writer), from each
+    conversation's newest message. Conversations without messages keep
+    their creation time. Commits per batch; returns how many were filled.
+    """
+    newest_id = select(func.max(Message.id)).where(
+        Message.conversation_id == Conversation.id
+    ).correlate(Conversation).scalar_subquery()
+    newest_at = select(Message.sent_at).where(Message.id == newest_id).scalar_subquery()
+
+    filled = 0
+    after = 0
+    while True:
+        ids = [
+            conversation_id for (conversation_id,) in
+            db.query(Conversation.id).filter(Conversation.id > after, Conversation.last_message_id.is_(None))
+            .order_by(Conversation.id.asc()).limit(batch_size).all()
+        ]
+        if not ids:
+            return filled
+        filled += db.query(Conversation).filter(
+            Conversation.id.in_(ids), newest_id.isnot(None)
+        ).update({
+            Conversation.last_message_id: newest_id,
+            Conversation.last_message_at: func.coalesce(newest_at, Conversation.last_message_at),
+        }, synchronize_session=False)
+        db.query(Conversation).filter(Conversation.id.in_(ids), newest_id.is_(None)).update({
+            Conversation.last_message_at: func.coalesce(Conversation.created_at, Conversation.last_message_at),
+        }, synchronize_session=False)
+        db.commit()
+        after = ids[-1]
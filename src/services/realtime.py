@@ -0,0 +1,184 @@
+import asyncio
+import json
+import logging
+import os
+import select
+import threading
+from typing import Dict, Optional, Set
+
+from sqlalchemy import text
+
+from src.config.database import engine
+
+# "memory" (one worker), "postgres" (LISTEN/NOTIFY across workers) or "auto" to follow the database
+REALTIME_BROKER = os.getenv("REALTIME_BROKER", "auto")
+REALTIME_PG_CHANNEL = os.getenv("REALTIME_PG_CHANNEL", "realtime")
+# Events a slow socket may have queued before it is dropped and told to resync
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("REALTIME_QUEUE_SIZE", 256))
+# NOTIFY payloads must stay under 8000 bytes
+PG_PAYLOAD_LIMIT = 7500
+
+logger = logging.getLogger(__name__)
+
+
+def user_channel(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+class Subscription:
+    """One socket's mailbox: an asyncio queue fed from any thread."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int = SUBSCRIBER_QUEUE_SIZE):
+        self.loop = loop
+        self.queue: "asyncio.Queue[dict]" = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def deliver(self, event: dict):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The socket's loop has already shut down
+            pass
+
+    def _put(self, event: dict):
+        if self.overflowed:
+            return
+        if self.queue.full():
+            # Stop queueing; the gateway closes the socket and the client catches up over REST
+            self.overflowed = True
+            self.queue.get_nowait()
+            self.queue.put_nowait({"type": "overflow"})
+            return
+        self.queue.put_nowait(event)
+
+
+class InProcessBroker:
+    """
+    Fan-out to sockets held by this worker. publish() may be called from the
+    sync route threadpool; delivery hops onto each socket's event loop.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def subscribe(self, channel: str, subscription: Subscription):
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+
+    def unsubscribe(self, channel: str, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(channel)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+    def publish(self, channel: str, event: dict):
+        self._fan_out(channel, event)
+
+    def _fan_out(self, channel: str, event: dict):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+
+class PostgresBroker(InProcessBroker):
+    """
+    Cross-worker fan-out over Postgres LISTEN/NOTIFY: publish() sends a NOTIFY
+    and every worker's listener thread delivers it to its own sockets, the
+    publishing worker included.
+    """
+
+    def __init__(self, channel: str = REALTIME_PG_CHANNEL):
+        super().__init__()
+        self.channel = channel
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._listen, name="realtime-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(5)
+            self._thread = None
+
+    def publish(self, channel: str, event: dict):
+        payload = json.dumps({"channel": channel, "event": event}, default=str)
+        if len(payload.encode()) > PG_PAYLOAD_LIMIT:
+            # Too big for NOTIFY: send a marker and let the client fetch the body
+            payload = json.dumps({"channel": channel, "event": _truncated(event)}, default=str)
+        try:
+            with engine.begin() as conn:
+                conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": self.channel, "payload": payload})
+        except Exception:
+            logger.exception("Realtime NOTIFY failed")
+
+    def _listen(self):
+        while not self._stopping.is_set():
+            raw = None
+            try:
+                raw = engine.raw_connection()
+                # Detached so the autocommit LISTEN connection never goes back to the pool
+                raw.detach()
+                conn = raw.driver_connection
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f'LISTEN "{self.channel}"')
+                while not self._stopping.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        message = json.loads(notify.payload)
+                        self._fan_out(message["channel"], message["event"])
+            except Exception:
+                logger.exception("Realtime listener lost its connection; reconnecting")
+                self._stopping.wait(2)
+            finally:
+                if raw is not None:
+                    try:
+                        raw.close()
+                    except Exception:
+                        pass
+
+
+def _truncated(event: dict) -> dict:
+    event = dict(event)
+    if isinstance(event.get("message"), dict):
+        event["message"] = {k: v for k, v in event["message"].items() if k != "content"}
+    event["truncated"] = True
+    return event
+
+
+def _make_broker():
+    kind = REALTIME_BROKER
+    if kind == "auto":
+        kind = "postgres" if engine.dialect.name == "postgresql" else "memory"
+    if kind == "postgres":
+        return PostgresBroker()
+    if kind == "memory":
+        return InProcessBroker()
+    raise ValueError(f"Unknown REALTIME_BROKER: {kind}")
+
+
+broker = _make_broker()
+
+
+def publish_to_users(user_ids, event: dict):
+    for user_id in set(user_ids):
+        broker.publish(user_channel(user_id), event)
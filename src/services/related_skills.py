@@ -0,0 +1,78 @@
+import math
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, Set
+
+from sqlalchemy.orm import Session
+
+from src.models.related_skill import RelatedSkill
+from src.models.skill import Skill
+from src.models.skill_follow import SkillFollow
+from src.models.user_skill import UserSkill
+
+RELATED_TOP_N = 10
+# Users with very wide skill sets add k^2 pairs and little signal
+MAX_SKILLS_PER_USER = 100
+
+
+def build_user_skill_matrix(db: Session) -> Dict[int, Set[int]]:
+    """Binary sparse user x skill matrix as user_id -> {skill_id}, from holdings and follows."""
+    live = {skill_id for (skill_id,) in db.query(Skill.id).filter(Skill.is_deleted == False)}
+    rows: Dict[int, Set[int]] = defaultdict(set)
+    for user_id, skill_id in db.query(UserSkill.user_id, UserSkill.skill_id).union(
+        db.query(SkillFollow.user_id, SkillFollow.skill_id)
+    ):
+        if skill_id in live:
+            rows[user_id].add(skill_id)
+    return rows
+
+
+def co_occurrence(rows: Dict[int, Set[int]]):
+    """
+    Sparse X^T X: column degrees and pair counts, accumulated row by row so
+    cost is sum(k^2) over users rather than skills^2.
+    """
+    degree: Counter = Counter()
+    pairs: Dict[int, Counter] = defaultdict(Counter)
+    for skills in rows.values():
+        if len(skills) > MAX_SKILLS_PER_USER:
+            continue
+        ordered = sorted(skills)
+        degree.update(ordered)
+        for i, a in enumerate(ordered):
+            for b in ordered[i + 1:]:
+                pairs[a][b] += 1
+                pairs[b][a] += 1
+    return degree, pairs
+
+
+def rebuild_related_skills(db: Session, top_n: int = RELATED_TOP_N, min_co_count: int = 1) -> int:
+    """
+    Periodic job: recompute the top-N cosine neighbours for every skill and
+    replace related_skills in one transaction, so readers see old or new, never half.
+    """
+    degree, pairs = co_occurrence(build_user_skill_matrix(db))
+
+    now = datetime.utcnow()
+    mappings = []
+    for skill_id, counts in pairs.items():
+        scored = [
+            (count / math.sqrt(degree[skill_id] * degree[other]), count, other)
+            for other, count in counts.items()
+            if count >= min_co_count
+        ]
+        scored.sort(key=lambda item: (-item[0], -item[1], item[2]))
+        for rank, (score, count, other) in enumerate(scored[:top_n], start=1):
+            mappings.append({
+                "skill_id": skill_id,
+                "related_skill_id": other,
+                "rank": rank,
+                "score": round(score, 6),
+                "co_count": count,
+                "computed_at": now,
+            })
+
+    db.query(RelatedSkill).delete(synchronize_session=False)
+    db.bulk_insert_mappings(RelatedSkill, mappings)
+    db.commit()
+    return len(mappings)
@@ -0,0 +1,150 @@
+import csv
+import json
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from src.models.skill import Skill
+from src.models.skill_stats import SkillStats
+from src.services.catalog_cache import bump_catalog_version
+
+IMPORT_BATCH_SIZE = 500
+REQUIRED_FIELDS = ("name", "category", "description")
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str]) -> str:
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in (content_type or ""):
+        return "ndjson"
+    return "csv"
+
+
+def parse_rows(lines: Iterable[str], fmt: str) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """Yield (row_number, row, error) one line at a time, so large files stream."""
+    if fmt == "ndjson":
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield number, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(row, dict):
+                yield number, None, "Expected a JSON object"
+                continue
+            yield number, row, None
+    else:
+        # Row numbers count the header as row 1, like a spreadsheet
+        for number, row in enumerate(csv.DictReader(lines), start=2):
+            yield number, row, None
+
+
+def _batches(rows: Iterator, size: int) -> Iterator[List]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_skills(db: Session, rows: Iterator, batch_size: int = IMPORT_BATCH_SIZE) -> dict:
+    """
+    Upsert skills in batches: one set-based lookup per batch, then executemany
+    inserts for new names and bulk reactivation of soft-deleted matches.
+    Commits once, together with a single catalog version bump.
+    """
+    report: List[dict] = []
+    seen = set()
+    changed = False
+
+    for batch in _batches(rows, batch_size):
+        pending: Dict[str, dict] = {}
+        for number, row, error in batch:
+            result = {"row": number, "name": None, "status": "invalid", "skill_id": None, "error": error}
+            report.append(result)
+            if error:
+                continue
+
+            values = {field: str(row.get(field) or "").strip() for field in REQUIRED_FIELDS}
+            missing = [field for field in REQUIRED_FIELDS if not values[field]]
+            if missing:
+                result["error"] = f"Missing {', '.join(missing)}"
+                continue
+
+            # Same normalization as create_skill
+            name = values["name"].lower()
+            result["name"] = name
+            if name in seen:
+                result["status"] = "duplicate"
+                result["error"] = "Duplicate name earlier in the file"
+                continue
+            seen.add(name)
+            pending[name] = {"result": result, "category": values["category"], "description": values["description"]}
+
+        if not pending:
+            continue
+
+        existing = {
+            name: (skill_id, is_deleted)
+            for skill_id, name, is_deleted in db.query(Skill.id, func.lower(Skill.name), Skill.is_deleted)
+            .filter(func.lower(Skill.name).in_(list(pending)))
+        }
+
+        now = datetime.utcnow()
+        reactivate = []
+        new_rows = []
+        for name, item in pending.items():
+            result = item["result"]
+            if name in existing:
+                skill_id, is_deleted = existing[name]
+                result["skill_id"] = skill_id
+                if is_deleted:
+                    result["status"] = "reactivated"
+                    reactivate.append({
+                        "id": skill_id,
+                        "is_deleted": False,
+                        "category": item["category"],
+                        "description": item["description"],
+                        "updated_at": now,
+                    })
+                else:
+                    result["status"] = "exists"
+            else:
+                result["status"] = "created"
+                new_rows.append({
+                    "name": name,
+                    "category": item["category"],
+                    "description": item["description"],
+                    "is_deleted": False,
+                    "created_at": now,
+                    "updated_at": now,
+                })
+
+        if reactivate:
+            db.bulk_update_mappings(Skill, reactivate)
+            changed = True
+
+        if new_rows:
+            db.bulk_insert_mappings(Skill, new_rows)
+            created_ids = dict(
+                db.query(Skill.name, Skill.id).filter(Skill.name.in_([r["name"] for r in new_rows]))
+            )
+            db.bulk_insert_mappings(SkillStats, [{"skill_id": skill_id} for skill_id in created_ids.values()])
+            for r in new_rows:
+                pending[r["name"]]["result"]["skill_id"] = created_ids.get(r["name"])
+            changed = True
+
+    if changed:
+        bump_catalog_version(db)
+    db.commit()
+
+    summary = {status: 0 for status in ("created", "reactivated", "exists", "duplicate", "invalid")}
+    for result in report:
+        summary[result["status"]] += 1
+    return {**summary, "rows": report}
@@ -0,0 +1,345 @@
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+from heapq import merge
+from itertools import islice
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from src.models.skill import Skill
+from src.models.skill_stats import SkillStats
+
+SKILL_INDEX_TTL_SECONDS = int(os.getenv("SKILL_INDEX_TTL_SECONDS", 300))
+
+# Prefixes up to this length match a large share of the catalog, so their
+# ranked result lists are precomputed instead of scanned per keystroke
+SHORT_PREFIX_LEN = 2
+
+# Match kinds, best first: whole name prefix, prefix of a later word
+NAME_MATCH = 0
+WORD_MATCH = 1
+
+# Fuzzy matching: postings scanned (rarest trigrams first) and candidates
+# scored by edit distance are both capped, so cost is flat in catalog size
+FUZZY_MAX_POSTINGS = int(os.getenv("FUZZY_MAX_POSTINGS", 2000))
+FUZZY_MAX_CANDIDATES = int(os.getenv("FUZZY_MAX_CANDIDATES", 30))
+FUZZY_MIN_SIMILARITY = float(os.getenv("FUZZY_MIN_SIMILARITY", 0.6))
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.strip().lower().split())
+
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance with adjacent transpositions counted as one edit."""
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+def similarity(a: str, b: str) -> float:
+    if not a and not b:
+        return 1.0
+    return 1 - edit_distance(a, b) / max(len(a), len(b))
+
+
+def _rank(skills: Dict[int, dict], skill_id: int) -> Tuple:
+    entry = skills[skill_id]
+    return (-entry["popularity"], entry["name"], skill_id)
+
+
+def _name_keys(entry: dict) -> List[Tuple[str, int, int]]:
+    """The whole name, then each run of trailing words, as (key, kind, skill_id)."""
+    words = normalize(entry["name"]).split(" ")
+    return [(" ".join(words[pos:]), NAME_MATCH if pos == 0 else WORD_MATCH, entry["id"]) for pos in range(len(words))]
+
+
+class _Snapshot(NamedTuple):
+    skills: Dict[int, dict]
+    # Short prefix -> (kind,) + rank tuples, sorted; the skill id is last
+    short: Dict[str, List[Tuple]]
+    name_keys: List[Tuple[str, int, int]]
+    categories: List[str]
+    members: Dict[str, List[int]]
+    grams: Dict[str, set]
+
+
+class SkillAutocompleteIndex:
+    """
+    Per-worker autocomplete over non-deleted skill names and categories.
+
+    Name keys live in a sorted array searched with bisect; short prefixes and
+    categories map to pre-ranked lists (popularity = followers + teachers +
+    learners). Skill rows are kept as plain dicts shaped like SkillRead, so
+    answering never touches the DB. A local create or delete is patched into
+    the structures in place (bisect inserts and set updates, under the lock
+    readers also take); other workers rebuild when the catalog version
+    moves, and popularity is refreshed on a TTL.
+    """
+
+    def __init__(self, ttl_seconds: int = SKILL_INDEX_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._snapshot = _Snapshot({}, {}, [], [], {}, {})
+        self._built_at: Optional[float] = None
+        self._built_version: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_stale(self) -> bool:
+        return self._built_at is None or time.monotonic() - self._built_at > self.ttl_seconds
+
+    def ensure_fresh(self, db: Session, catalog_version: Optional[int] = None):
+        if self.is_stale or catalog_version != self._built_version:
+            self.rebuild(db, catalog_version)
+
+    def rebuild(self, db: Session, catalog_version: Optional[int] = None):
+        popularity = dict(db.query(SkillStats.skill_id, SkillStats.popularity).all())
+
+        rows = db.query(
+            Skill.id, Skill.name, Skill.category, Skill.description, Skill.created_at
+        ).filter(Skill.is_deleted == False).all()
+
+        skills = {row.id: self._entry(row, popularity.get(row.id, 0)) for row in rows}
+        with self._lock:
+            self._reindex(skills)
+            self._built_at = time.monotonic()
+            self._built_version = catalog_version
+
+    def add(self, skill: Skill, popularity: int = 0, catalog_version: Optional[int] = None):
+        """
+        Patch a created or reactivated skill in without going back to the DB.
+        catalog_version is the version after this write: if it is the only
+        change since the build, the index stays current and skips a rebuild.
+        """
+        if self._built_at is None:
+            return
+
+        entry = self._entry(skill, popularity)
+        with self._lock:
+            if skill.id in self._snapshot.skills:
+                self._unindex(skill.id)
+            self._index(entry)
+            self._follow_version(catalog_version)
+
+    def remove(self, skill_id: int, catalog_version: Optional[int] = None):
+        if self._built_at is None:
+            return
+
+        with self._lock:
+            if skill_id in self._snapshot.skills:
+                self._unindex(skill_id)
+            self._follow_version(catalog_version)
+
+    def _follow_version(self, catalog_version: Optional[int]):
+        if catalog_version is not None and self._built_version is not None \
+                and catalog_version == self._built_version + 1:
+            self._built_version = catalog_version
+
+    def search(self, query: str, limit: int = 10) -> List[dict]:
+        prefix = normalize(query)
+        if not prefix or limit <= 0:
+            return []
+
+        with self._lock:
+            return self._search(prefix, limit)
+
+    def _search(self, prefix: str, limit: int) -> List[dict]:
+        skills, short, name_keys, categories, members, _ = self._snapshot
+
+        def rank(skill_id):
+            return _rank(skills, skill_id)
+
+        if len(prefix) <= SHORT_PREFIX_LEN:
+            ranked = (item[-1] for item in short.get(prefix, ()))
+        else:
+            ranked = self._scan_names(name_keys, prefix, rank)
+
+        results = []
+        seen = set()
+        for skill_id in ranked:
+            if skill_id not in seen:
+                seen.add(skill_id)
+                results.append(skills[skill_id])
+                if len(results) == limit:
+                    return results
+
+        # Category matches rank after any name match
+        category_lists = [members[c] for c in self._matching(categories, prefix)]
+        for skill_id in merge(*category_lists, key=rank):
+            if skill_id not in seen:
+                seen.add(skill_id)
+                results.append(skills[skill_id])
+                if len(results) == limit:
+                    break
+        return results
+
+    def fuzzy_search(
+        self,
+        query: str,
+        limit: int = 10,
+        min_similarity: float = FUZZY_MIN_SIMILARITY,
+        whole_name: bool = False,
+    ) -> List[Tuple[dict, float]]:
+        """
+        Typo-tolerant lookup: trigram overlap picks a bounded candidate set,
+        then candidates are ranked by edit similarity to the whole name or to
+        any trailing words of it ("lerning" vs "machine learning"). With
+        whole_name only the full name counts, as a duplicate check needs
+        ("science" is not a near-duplicate of "data science").
+        """
+        text = normalize(query)
+        if not text or limit <= 0:
+            return []
+
+        # Candidates are picked under the lock; the costly scoring runs outside it
+        with self._lock:
+            grams = self._snapshot.grams
+            postings = sorted(
+                (grams[g] for g in trigrams(text) if g in grams),
+                key=len,
+            )
+            shared: Dict[int, int] = {}
+            budget = FUZZY_MAX_POSTINGS
+            for ids in postings:
+                if budget <= 0:
+                    break
+                for skill_id in islice(ids, budget):
+                    shared[skill_id] = shared.get(skill_id, 0) + 1
+                budget -= len(ids)
+            skills = {
+                skill_id: self._snapshot.skills[skill_id]
+                for skill_id in sorted(shared, key=lambda skill_id: -shared[skill_id])[:FUZZY_MAX_CANDIDATES]
+            }
+
+        scored = []
+        for skill_id in skills:
+            name = normalize(skills[skill_id]["name"])
+            if whole_name:
+                score = similarity(text, name)
+            else:
+                words = name.split(" ")
+                score = max(similarity(text, " ".join(words[pos:])) for pos in range(len(words)))
+            if score >= min_similarity:
+                scored.append((score, skill_id))
+
+        scored.sort(key=lambda item: (-item[0], -skills[item[1]]["popularity"], skills[item[1]]["name"]))
+        return [(skills[skill_id], score) for score, skill_id in scored[:limit]]
+
+    @staticmethod
+    def _scan_names(keys: List[Tuple[str, int, int]], prefix: str, rank) -> List[int]:
+        best: Dict[int, int] = {}
+        i = bisect_left(keys, (prefix,))
+        while i < len(keys) and keys[i][0].startswith(prefix):
+            _, kind, skill_id = keys[i]
+            if kind < best.get(skill_id, WORD_MATCH + 1):
+                best[skill_id] = kind
+            i += 1
+        return sorted(best, key=lambda skill_id: (best[skill_id],) + rank(skill_id))
+
+    @staticmethod
+    def _matching(categories: List[str], prefix: str) -> List[str]:
+        matches = []
+        i = bisect_left(categories, prefix)
+        while i < len(categories) and categories[i].startswith(prefix):
+            matches.append(categories[i])
+            i += 1
+        return matches
+
+    def _reindex(self, skills: Dict[int, dict]):
+        name_keys = []
+        members: Dict[str, List[int]] = {}
+        for entry in skills.values():
+            name_keys.extend(_name_keys(entry))
+            if entry["category"]:
+                members.setdefault(normalize(entry["category"]), []).append(entry["id"])
+        name_keys.sort()
+
+        def rank(skill_id):
+            return _rank(skills, skill_id)
+
+        short: Dict[str, List[Tuple]] = {}
+        for key, kind, skill_id in name_keys:
+            for length in range(1, min(len(key), SHORT_PREFIX_LEN) + 1):
+                short.setdefault(key[:length], []).append((kind,) + rank(skill_id))
+        for items in short.values():
+            items.sort()
+        for ids in members.values():
+            ids.sort(key=rank)
+
+        grams: Dict[str, set] = {}
+        for entry in skills.values():
+            for gram in trigrams(normalize(entry["name"])):
+                grams.setdefault(gram, set()).add(entry["id"])
+
+        # One reference swap, so concurrent readers never see a half-built index
+        self._snapshot = _Snapshot(skills, short, name_keys, sorted(members), members, grams)
+
+    def _index(self, entry: dict):
+        """Insert one skill into every structure in place; the caller holds the lock."""
+        skills, short, name_keys, categories, members, grams = self._snapshot
+        skills[entry["id"]] = entry
+        rank = _rank(skills, entry["id"])
+        for key in _name_keys(entry):
+            insort(name_keys, key)
+            for length in range(1, min(len(key[0]), SHORT_PREFIX_LEN) + 1):
+                insort(short.setdefault(key[0][:length], []), (key[1],) + rank)
+        if entry["category"]:
+            category = normalize(entry["category"])
+            if category not in members:
+                insort(categories, category)
+            insort(members.setdefault(category, []), entry["id"], key=lambda skill_id: _rank(skills, skill_id))
+        for gram in trigrams(normalize(entry["name"])):
+            grams.setdefault(gram, set()).add(entry["id"])
+
+    def _unindex(self, skill_id: int):
+        """Take one skill out of every structure in place; the caller holds the lock."""
+        skills, short, name_keys, categories, members, grams = self._snapshot
+        entry = skills[skill_id]
+        rank = _rank(skills, skill_id)
+        for key in _name_keys(entry):
+            del name_keys[bisect_left(name_keys, key)]
+            for length in range(1, min(len(key[0]), SHORT_PREFIX_LEN) + 1):
+                items = short[key[0][:length]]
+                del items[bisect_left(items, (key[1],) + rank)]
+                if not items:
+                    del short[key[0][:length]]
+        if entry["category"]:
+            category = normalize(entry["category"])
+            members[category].remove(skill_id)
+            if not members[category]:
+                del members[category]
+                categories.remove(category)
+        for gram in trigrams(normalize(entry["name"])):
+            grams[gram].discard(skill_id)
+            if not grams[gram]:
+                del grams[gram]
+        del skills[skill_id]
+
+    @staticmethod
+    def _entry(row, popularity: int) -> dict:
+        return {
+            "id": row.id,
+            "name": row.name,
+            "category": row.category,
+            "description": row.description,
+            "created_at": row.created_at,
+            "popularity": popularity,
+        }
+
+
+skill_index = SkillAutocompleteIndex()
@@ -0,0 +1,109 @@
+from typing import Dict, Tuple
+
+from sqlalchemy import func, update, bindparam
+from sqlalchemy.orm import Session
+
+from src.models.skill import Skill
+from src.models.skill_follow import SkillFollow
+from src.models.skill_stats import SkillStats
+from src.models.user_skill import UserSkill
+from src.schemas.user_skill import SkillRole
+
+
+def adjust_skill_stats(db: Session, skill_id: int, followers: int = 0, teachers: int = 0, learners: int = 0):
+    """
+    Apply counter deltas in the caller's transaction (no commit).
+    A single UPDATE with relative increments, so concurrent writers don't lose counts.
+    """
+    delta = followers + teachers + learners
+    updated = (
+        db.query(SkillStats)
+        .filter(SkillStats.skill_id == skill_id)
+        .update(
+            {
+                SkillStats.followers_count: SkillStats.followers_count + followers,
+                SkillStats.teachers_count: SkillStats.teachers_count + teachers,
+                SkillStats.learners_count: SkillStats.learners_count + learners,
+                SkillStats.popularity: SkillStats.popularity + delta,
+            },
+            synchronize_session=False,
+        )
+    )
+    if not updated:
+        db.add(SkillStats(
+            skill_id=skill_id,
+            followers_count=max(followers, 0),
+            teachers_count=max(teachers, 0),
+            learners_count=max(learners, 0),
+            popularity=max(delta, 0),
+        ))
+        db.flush()
+
+
+def adjust_for_role(db: Session, skill_id: int, role: str, step: int):
+    if role == SkillRole.teach:
+        adjust_skill_stats(db, skill_id, teachers=step)
+    else:
+        adjust_skill_stats(db, skill_id, learners=step)
+
+
+def adjust_role_counts_many(db: Session, deltas: Dict[int, Tuple[int, int]]):
+    """
+    Apply {skill_id: (teachers_delta, learners_delta)} as one executemany UPDATE
+    in the caller's transaction. Missing stats rows are created first.
+    """
+    deltas = {skill_id: d for skill_id, d in deltas.items() if d != (0, 0)}
+    if not deltas:
+        return
+
+    have = {
+        skill_id for (skill_id,) in
+        db.query(SkillStats.skill_id).filter(SkillStats.skill_id.in_(list(deltas)))
+    }
+    if len(have) < len(deltas):
+        db.bulk_insert_mappings(SkillStats, [
+            {"skill_id": skill_id, "followers_count": 0, "teachers_count": 0, "learners_count": 0, "popularity": 0}
+            for skill_id in deltas if skill_id not in have
+        ])
+
+    table = SkillStats.__table__
+    stmt = (
+        update(table)
+        .where(table.c.skill_id == bindparam("b_skill_id"))
+        .values(
+            teachers_count=table.c.teachers_count + bindparam("b_teachers"),
+            learners_count=table.c.learners_count + bindparam("b_learners"),
+            popularity=table.c.popularity + bindparam("b_total"),
+        )
+    )
+    db.execute(stmt, [
+        {"b_skill_id": skill_id, "b_teachers": teachers, "b_learners": learners, "b_total": teachers + learners}
+        for skill_id, (teachers, learners) in deltas.items()
+    ])
+
+
+def rebuild_skill_stats(db: Session):
+    """Recompute every row from skill_follows and user_skills (backfill / repair)."""
+    stats = {
+        skill_id: {"followers_count": 0, "teachers_count": 0, "learners_count": 0}
+        for (skill_id,) in db.query(Skill.id)
+    }
+
+    follows = db.query(SkillFollow.skill_id, func.count(SkillFollow.id)).group_by(SkillFollow.skill_id)
+    for skill_id, count in follows:
+        stats[skill_id]["followers_count"] = count
+
+    holders = db.query(UserSkill.skill_id, UserSkill.role, func.count(UserSkill.id)).group_by(
+        UserSkill.skill_id, UserSkill.role
+    )
+    for skill_id, role, count in holders:
+        key = "teachers_count" if role == SkillRole.teach else "learners_count"
+        stats[skill_id][key] += count
+
+    db.query(SkillStats).delete(synchronize_session=False)
+    db.bulk_insert_mappings(SkillStats, [
+        {"skill_id": skill_id, "popularity": sum(counts.values()), **counts}
+        for skill_id, counts in stats.items()
+    ])
+    db.commit()
+    return len(stats)
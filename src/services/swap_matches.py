@@ -0,0 +1,157 @@
+import heapq
+import os
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from src.models.user import User
+from src.models.user_skill import UserSkill
+from src.schemas.user_skill import SkillRole
+
+SWAP_INDEX_TTL_SECONDS = int(os.getenv("SWAP_INDEX_TTL_SECONDS", 300))
+
+
+def _role(role) -> str:
+    return SkillRole(role).value
+
+
+class SwapMatchIndex:
+    """
+    Per-worker sparse teach (T) and learn (L) matrices over active users,
+    stored both ways: user -> skills and skill -> users.
+
+    For user u the reciprocal score needs two sparse products:
+      get  = L[u] . T^T  (how many of my learn skills each user teaches)
+      give = T[u] . L^T  (how many of my teach skills each user wants)
+    Both are accumulated over posting lists, so cost follows the size of
+    u's postings, not the number of users. A TTL rebuild reconciles changes
+    made by other workers.
+
+    Postings are sets that writers update in place under the lock, so an
+    edit costs O(1) however popular the skill. A reader holds the lock
+    while it tallies the postings it needs (Counter.update, in C), then
+    scores and ranks without it, and takes it again briefly for the details
+    of the page.
+    """
+
+    def __init__(self, ttl_seconds: int = SWAP_INDEX_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._user_skills: Dict[str, Dict[int, Set[int]]] = {"teach": {}, "learn": {}}
+        self._skill_users: Dict[str, Dict[int, Set[int]]] = {"teach": {}, "learn": {}}
+        self._built_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def ensure_fresh(self, db: Session):
+        if self._built_at is None or time.monotonic() - self._built_at > self.ttl_seconds:
+            self.rebuild(db)
+
+    def rebuild(self, db: Session):
+        rows = (
+            db.query(UserSkill.user_id, UserSkill.skill_id, UserSkill.role)
+            .join(User, UserSkill.user_id == User.id)
+            .filter(User.is_active == True)
+        )
+        user_skills = {"teach": {}, "learn": {}}
+        skill_users = {"teach": {}, "learn": {}}
+        for user_id, skill_id, role in rows:
+            role = _role(role)
+            user_skills[role].setdefault(user_id, set()).add(skill_id)
+            skill_users[role].setdefault(skill_id, set()).add(user_id)
+
+        with self._lock:
+            self._user_skills = user_skills
+            self._skill_users = skill_users
+            self._built_at = time.monotonic()
+
+    def add(self, user_id: int, skill_id: int, role):
+        if self._built_at is None:
+            return
+        role = _role(role)
+        with self._lock:
+            self._post(role, user_id, skill_id)
+
+    def remove(self, user_id: int, skill_id: int, role):
+        if self._built_at is None:
+            return
+        role = _role(role)
+        with self._lock:
+            self._unpost(role, user_id, skill_id)
+
+    def set_user(self, user_id: int, pairs: Iterable[Tuple[int, str]]):
+        """Replace a user's whole (skill_id, role) set, e.g. after PUT /users/me/skills."""
+        if self._built_at is None:
+            return
+        pairs = list(pairs)
+        with self._lock:
+            self._drop(user_id)
+            for skill_id, role in pairs:
+                self._post(_role(role), user_id, skill_id)
+
+    def drop_user(self, user_id: int):
+        if self._built_at is None:
+            return
+        with self._lock:
+            self._drop(user_id)
+
+    def matches(self, user_id: int, skip: int = 0, limit: int = 20) -> Tuple[int, List[dict]]:
+        """(total, page) of a user's reciprocal matches, best first."""
+        # Postings change in place, so they are only read under the lock
+        with self._lock:
+            teaches = set(self._user_skills["teach"].get(user_id, ()))
+            learns = set(self._user_skills["learn"].get(user_id, ()))
+            if not teaches or not learns:
+                return 0, []
+            they_teach: Counter = Counter()
+            for skill_id in learns:
+                they_teach.update(self._skill_users["teach"].get(skill_id, ()))
+            they_learn: Counter = Counter()
+            for skill_id in teaches:
+                they_learn.update(self._skill_users["learn"].get(skill_id, ()))
+
+        small, large = sorted((they_teach, they_learn), key=len)
+        scored = []
+        for other in small:
+            if other == user_id or other not in large:
+                continue
+            get, give = they_teach[other], they_learn[other]
+            # Harmonic mean: a swap is only as good as its weaker direction; ties go to the wider overlap
+            scored.append((round(2 * get * give / (get + give), 4), get + give, -other))
+
+        page = heapq.nlargest(skip + limit, scored)[skip:]
+        results = []
+        with self._lock:
+            for score, _, other in page:
+                other = -other
+                results.append({
+                    "user_id": other,
+                    "score": score,
+                    "you_teach": sorted(teaches & self._user_skills["learn"].get(other, set())),
+                    "they_teach": sorted(learns & self._user_skills["teach"].get(other, set())),
+                })
+        return len(scored), results
+
+    def _post(self, role: str, user_id: int, skill_id: int):
+        self._user_skills[role].setdefault(user_id, set()).add(skill_id)
+        self._skill_users[role].setdefault(skill_id, set()).add(user_id)
+
+    def _unpost(self, role: str, user_id: int, skill_id: int):
+        for postings, key, member in (
+            (self._user_skills[role], user_id, skill_id),
+            (self._skill_users[role], skill_id, user_id),
+        ):
+            members = postings.get(key)
+            if members is not None:
+                members.discard(member)
+                if not members:
+                    del postings[key]
+
+    def _drop(self, user_id: int):
+        for role in ("teach", "learn"):
+            for skill_id in self._user_skills[role].pop(user_id, set()):
+                self._unpost(role, user_id, skill_id)
+
+
+swap_index = SwapMatchIndex()
@@ -7,6 +7,8 @@ import requests
 import random
 import json
 import base64
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
 
 BASE_URL = "http://localhost:8000"
@@ -141,6 +143,15 @@ class Tester:
             return r.json().get("access_token")
         return None
 
+    def make_user(self) -> Optional[Dict]:
+        """Register and log in a throwaway user, for checks that need a clean slate."""
+        ud = self.random_user_data()
+        r = requests.post(f"{BASE_URL}/auth/register", json=ud, headers=HEADERS)
+        if r.status_code != 201:
+            return None
+        tok = self.do_login(ud["email"], ud["password"])
+        return {"data": ud, "response": r.json(), "token": tok} if tok else None
+
     # ═══════════════════════════════════════════════════════════════════════════
     # 1. AUTH
     # ═══════════════════════════════════════════════════════════════════════════
@@ -359,6 +370,21 @@ class Tester:
                 else:
                     self.fail(f"POST /skills/ '{name}'", r.text)
 
+        # Near-duplicate check compares whole names: a typo is caught, a shared last word is not
+        r = requests.post(f"{BASE_URL}/skills/", json={"name": "machne learning", "category": "programming", "description": "typo"},
+                          headers=self.superauth())
+        if r.status_code == 409:
+            self.ok("POST /skills/ 'machne learning' → 409 (similar to 'machine learning')")
+        else:
+            self.fail(f"POST /skills/ 'machne learning' → {r.status_code} (Expected 409)", r.text)
+
+        r = requests.post(f"{BASE_URL}/skills/", json={"name": "learning", "category": "programming", "description": "learning"},
+                          headers=self.superauth())
+        if r.status_code in (201, 400):
+            self.ok(f"POST /skills/ 'learning' → {r.status_code} (not a near-duplicate of 'machine learning')")
+        else:
+            self.fail(f"POST /skills/ 'learning' → {r.status_code}", r.text)
+
         # GET /skills/
         r = requests.get(f"{BASE_URL}/skills/")
         if r.status_code == 200:
@@ -743,6 +769,78 @@ class Tester:
             else:
                 self.fail(f"DELETE /connections/{conn_12['id']}", r.text)
 
+    def test_connection_bulk(self):
+        self.section("CONNECTIONS BULK  ·  PUT /connections/bulk")
+
+        owner = self.make_user()
+        senders = [self.make_user() for _ in range(6)]
+        if not owner or not all(senders):
+            self.fail("Could not register users — skipping")
+            return
+
+        ids = []
+        for sender in senders:
+            r = requests.post(f"{BASE_URL}/connections/",
+                              json={"recipient_id": owner["response"]["id"]}, headers=self.auth(sender))
+            if r.status_code == 201:
+                ids.append(r.json()["id"])
+        if len(ids) != len(senders):
+            self.fail("POST /connections/ — could not create pending requests")
+            return
+
+        # Basic report: updated / not_found / not_pending
+        r = requests.put(f"{BASE_URL}/connections/bulk",
+                         json={"ids": ids[:1] + [999999999], "status": "accepted"}, headers=self.auth(owner))
+        report = r.json() if r.status_code == 200 else {}
+        results = {x["id"]: x["result"] for x in report.get("results", [])}
+        if report.get("updated") == 1 and results == {ids[0]: "updated", 999999999: "not_found"}:
+            self.ok("PUT /connections/bulk → updated + not_found reported per id")
+        else:
+            self.fail("PUT /connections/bulk report", r.text)
+
+        r = requests.put(f"{BASE_URL}/connections/bulk",
+                         json={"ids": ids[:1], "status": "rejected"}, headers=self.auth(owner))
+        if r.status_code == 200 and r.json()["results"][0]["result"] == "not_pending":
+            self.ok("PUT /connections/bulk → already answered request reported not_pending")
+        else:
+            self.fail("PUT /connections/bulk not_pending", r.text)
+
+        # Race: accept and reject the same pending ids at once; each id must be claimed by exactly one call
+        racing = ids[1:]
+        def bulk(status):
+            return requests.put(f"{BASE_URL}/connections/bulk",
+                                json={"ids": racing, "status": status}, headers=self.auth(owner)).json()
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            accepted, rejected = pool.map(bulk, ["accepted", "rejected"])
+        won = {}
+        for status, report in (("accepted", accepted), ("rejected", rejected)):
+            for x in report.get("results", []):
+                if x["result"] == "updated":
+                    won.setdefault(x["id"], []).append(status)
+        claimed_once = sorted(won) == sorted(racing) and all(len(v) == 1 for v in won.values())
+        counts_match = accepted.get("updated", 0) + rejected.get("updated", 0) == len(racing)
+        r = requests.get(f"{BASE_URL}/connections/requests", headers=self.auth(owner))
+        still_pending = [c["id"] for c in r.json()] if r.status_code == 200 else racing
+        if claimed_once and counts_match and not set(still_pending) & set(racing):
+            self.ok(f"PUT /connections/bulk race → each of {len(racing)} ids updated by exactly one call")
+        else:
+            self.fail("PUT /connections/bulk race", f"accepted={accepted} rejected={rejected}")
+
+        # Only the requests that ended up accepted notify their sender (delivered by the outbox worker)
+        time.sleep(2)
+        accepted_ids = {i for i, v in won.items() if v == ["accepted"]}
+        notified = set()
+        for sender, connection_id in zip(senders[1:], racing):
+            r = requests.get(f"{BASE_URL}/notifications/", headers=self.auth(sender))
+            if r.status_code == 200 and any(
+                n["type"] == "connection_accepted" and n.get("related_entity_id") == connection_id for n in r.json()
+            ):
+                notified.add(connection_id)
+        if notified <= accepted_ids:
+            self.ok(f"PUT /connections/bulk race → no accept notification for rejected requests")
+        else:
+            self.fail("PUT /connections/bulk race notifications", f"notified={notified} accepted={accepted_ids}")
+
     # ═══════════════════════════════════════════════════════════════════════════
     # 7. REVIEWS
     # ═══════════════════════════════════════════════════════════════════════════
@@ -951,6 +1049,128 @@ class Tester:
         else:
             self.fail("POST /sessions/ (past date)", r.text)
 
+    def test_booking(self):
+        self.section("BOOKING  ·  POST /sessions/ conflicts for both participants")
+
+        if not self.skills:
+            self.fail("Need skills — skipping")
+            return
+        provider, alice, bob = self.make_user(), self.make_user(), self.make_user()
+        racers = [self.make_user() for _ in range(6)]
+        if not provider or not alice or not bob or not all(racers):
+            self.fail("Could not register users — skipping")
+            return
+
+        def book(requester, provider_user, start, end):
+            return requests.post(f"{BASE_URL}/sessions/", json={
+                "provider_id": provider_user["response"]["id"],
+                "skill_id": self.skills[0]["id"],
+                "start_time": f"2031-03-03T{start}:00",
+                "end_time": f"2031-03-03T{end}:00",
+            }, headers=self.auth(requester))
+
+        r = book(alice, provider, "10:00", "11:00")
+        if r.status_code != 201:
+            self.fail("POST /sessions/", r.text)
+            return
+        first = r.json()
+        self.ok(f"POST /sessions/ → booked id={first['id']} (10:00–11:00)")
+
+        cases = [
+            ("provider already booked", book(bob, provider, "10:30", "11:30"), 400),
+            ("requester already booked as someone's provider", book(provider, bob, "10:30", "11:30"), 400),
+            ("requester already booked as a requester", book(alice, bob, "09:30", "10:30"), 400),
+            ("back-to-back with the existing session", book(bob, provider, "11:00", "12:00"), 201),
+        ]
+        for label, r, expected in cases:
+            if r.status_code == expected:
+                self.ok(f"POST /sessions/ {label} → {expected}")
+            else:
+                self.fail(f"POST /sessions/ {label} → {r.status_code} (Expected {expected})", r.text)
+
+        requests.put(f"{BASE_URL}/sessions/{first['id']}/cancel", headers=self.auth(alice))
+        r = book(bob, provider, "10:00", "10:30")
+        if r.status_code == 201:
+            self.ok("Cancelling a session frees its time for both calendars")
+        else:
+            self.fail("POST /sessions/ into a cancelled session's time", r.text)
+
+        # Atomicity: everyone books the same free hour at once; exactly one may win
+        with ThreadPoolExecutor(max_workers=len(racers)) as pool:
+            codes = list(pool.map(lambda u: book(u, provider, "14:00", "15:00").status_code, racers))
+        if codes.count(201) == 1 and codes.count(400) == len(racers) - 1:
+            self.ok(f"{len(racers)} concurrent bookings of one slot → exactly one booked")
+        else:
+            self.fail(f"Concurrent bookings of one slot → {codes}")
+
+    def test_free_slots(self):
+        self.section("FREE SLOTS  ·  GET /sessions/providers/{id}/free-slots")
+
+        if not self.skills:
+            self.fail("Need skills — skipping")
+            return
+        provider, requester, other = self.make_user(), self.make_user(), self.make_user()
+        if not provider or not requester or not other:
+            self.fail("Could not register users — skipping")
+            return
+
+        # Sunday night runs past midnight into Monday, across the week boundary
+        r = requests.put(f"{BASE_URL}/users/me/availability", json={"availability": {
+            "Monday": ["09:00-12:00"], "Sunday": ["23:00-01:00"],
+        }}, headers=self.auth(provider))
+        if r.status_code != 200:
+            self.fail("PUT /users/me/availability", r.text)
+            return
+
+        def slots() -> Optional[List[tuple]]:
+            # Sunday 2031-03-09 to Tuesday 2031-03-11
+            r = requests.get(f"{BASE_URL}/sessions/providers/{provider['response']['id']}/free-slots",
+                             params={"from": "2031-03-09T00:00:00", "to": "2031-03-11T00:00:00", "duration": 60},
+                             headers=self.auth(requester))
+            if r.status_code != 200:
+                return None
+            return [(s["start_time"][5:16], s["end_time"][11:16]) for s in r.json()["slots"]]
+
+        got = slots()
+        expected = [("03-09T23:00", "00:00"), ("03-10T00:00", "01:00"),
+                    ("03-10T09:00", "10:00"), ("03-10T10:00", "11:00"), ("03-10T11:00", "12:00")]
+        if got == expected:
+            self.ok("Weekly availability expands over the range, Sunday 23:00 wrapping into Monday")
+        else:
+            self.fail("free-slots expansion", f"{got} != {expected}")
+
+        # A booking with the provider, and one where the provider is the requester, both take time out
+        for requester_user, provider_user, start, end in [
+            (requester, provider, "2031-03-10T10:00:00", "2031-03-10T10:30:00"),
+            (provider, other, "2031-03-10T00:30:00", "2031-03-10T01:00:00"),
+        ]:
+            r = requests.post(f"{BASE_URL}/sessions/", json={
+                "provider_id": provider_user["response"]["id"], "skill_id": self.skills[0]["id"],
+                "start_time": start, "end_time": end,
+            }, headers=self.auth(requester_user))
+            if r.status_code != 201:
+                self.fail("POST /sessions/", r.text)
+                return
+
+        got = slots()
+        expected = [("03-09T23:00", "00:00"), ("03-10T09:00", "10:00"), ("03-10T10:30", "11:30")]
+        if got == expected:
+            self.ok("Booked sessions on either side of the provider's calendar are subtracted")
+        else:
+            self.fail("free-slots subtraction", f"{got} != {expected}")
+
+        # The 09:00 UTC slot booked back with a +02:00 offset lands on the same instant
+        r = requests.post(f"{BASE_URL}/sessions/", json={
+            "provider_id": provider["response"]["id"], "skill_id": self.skills[0]["id"],
+            "start_time": "2031-03-10T11:00:00+02:00", "end_time": "2031-03-10T12:00:00+02:00",
+        }, headers=self.auth(requester))
+        got = slots()
+        if r.status_code == 201 and r.json()["start_time"].startswith("2031-03-10T09:00:00") \
+                and got == [("03-09T23:00", "00:00"), ("03-10T10:30", "11:30")]:
+            self.ok("A slot booked with a UTC offset is stored in UTC and leaves free-slots")
+        else:
+            self.fail("POST /sessions/ with a UTC offset", f"{r.status_code} {r.text[:80]} slots={got}")
+
     # ═══════════════════════════════════════════════════════════════════════════
     # 9. MESSAGING
     # ═══════════════════════════════════════════════════════════════════════════
@@ -1072,6 +1292,163 @@ class Tester:
         else:
             self.fail(f"Final unread count check failed: {r.text}")
 
+    def test_read_watermarks(self):
+        self.section("READ WATERMARKS  ·  is_read derived from each reader's watermark")
+
+        u1, u2 = self.make_user(), self.make_user()
+        if not u1 or not u2:
+            self.fail("Could not create watermark test users — skipping")
+            return
+
+        r = requests.post(f"{BASE_URL}/messaging/conversations",
+                          json={"recipient_id": u2["response"]["id"]}, headers=self.auth(u1))
+        if r.status_code not in (200, 201):
+            self.fail("POST /messaging/conversations", r.text)
+            return
+        conv_id = r.json()["id"]
+
+        sent = []
+        for sender, text in [(u1, "first"), (u1, "second"), (u2, "reply"), (u1, "third")]:
+            r = requests.post(f"{BASE_URL}/messaging/messages",
+                              json={"conversation_id": conv_id, "content": text}, headers=self.auth(sender))
+            if r.status_code != 201:
+                self.fail("POST /messaging/messages", r.text)
+                return
+            sent.append(r.json()["id"])
+        first, second, reply, third = sent
+
+        def read_flags(user) -> Dict[int, bool]:
+            r = requests.get(f"{BASE_URL}/messaging/conversations/{conv_id}/messages", headers=self.auth(user))
+            return {m["id"]: m["is_read"] for m in r.json()} if r.status_code == 200 else {}
+
+        def unread(user) -> Optional[int]:
+            r = requests.get(f"{BASE_URL}/messaging/unread-count", headers=self.auth(user))
+            return r.json()["unread_count"] if r.status_code == 200 else None
+
+        # Reading "second" reads everything of u1's up to it, and nothing after
+        requests.put(f"{BASE_URL}/messaging/messages/{second}/read", headers=self.auth(u2))
+        flags = read_flags(u1)
+        expected = {first: True, second: True, reply: False, third: False}
+        if flags == expected:
+            self.ok("Reading a message marks everything before it read, and nothing after")
+        else:
+            self.fail(f"is_read after reading message {second}", f"{flags} != {expected}")
+
+        # Reading an older message never moves the watermark back
+        requests.put(f"{BASE_URL}/messaging/messages/{first}/read", headers=self.auth(u2))
+        flags = read_flags(u2)
+        if flags.get(second) is True and flags.get(third) is False and unread(u2) == 1:
+            self.ok("Reading an older message keeps the watermark (1 unread left)")
+        else:
+            self.fail("Watermark moved backwards", f"{flags}, unread={unread(u2)}")
+
+        r = requests.put(f"{BASE_URL}/messaging/messages/{reply}/read", headers=self.auth(u2))
+        if r.status_code == 400:
+            self.ok("Marking my own message read → 400")
+        else:
+            self.fail(f"Own message read → {r.status_code} (Expected 400)", r.text)
+
+        # Each side's watermark is its own: u1 reading the conversation only flips u2's reply
+        requests.put(f"{BASE_URL}/messaging/conversations/{conv_id}/read", headers=self.auth(u1))
+        flags = read_flags(u1)
+        expected = {first: True, second: True, reply: True, third: False}
+        if flags == expected and unread(u1) == 0:
+            self.ok("Conversation read by one side leaves the other side's messages as they were")
+        else:
+            self.fail("is_read after conversation read", f"{flags} != {expected}")
+
+    def test_message_archive(self):
+        self.section("MESSAGE ARCHIVE  ·  history paging across the hot/cold boundary")
+
+        # Archiving runs in-process against the server's database (same .env)
+        try:
+            import src.models  # noqa: F401  Register all models
+            from src.config.database import SessionLocal
+            from src.models.conversation import Conversation
+            from src.models.message import Message
+            from src.services.message_archive import archive_conversation
+        except Exception as e:
+            self.warn(f"No local database access ({e}) — skipping")
+            return
+
+        u1, u2 = self.make_user(), self.make_user()
+        if not u1 or not u2:
+            self.fail("Could not create archive test users — skipping")
+            return
+        r = requests.post(f"{BASE_URL}/messaging/conversations",
+                          json={"recipient_id": u2["response"]["id"]}, headers=self.auth(u1))
+        if r.status_code not in (200, 201):
+            self.fail("POST /messaging/conversations", r.text)
+            return
+        conv_id = r.json()["id"]
+
+        ids = []
+        for i in range(7):
+            r = requests.post(f"{BASE_URL}/messaging/messages",
+                              json={"conversation_id": conv_id, "content": f"archived history {i}"},
+                              headers=self.auth(u1))
+            if r.status_code != 201:
+                self.fail("POST /messaging/messages", r.text)
+                return
+            ids.append(r.json()["id"])
+
+        # Archive everything sent before the 5th message, in segments of two: ids[0..3] go cold
+        db = SessionLocal()
+        try:
+            cutoff = db.query(Message.sent_at).filter(Message.id == ids[4]).scalar()
+            moved = archive_conversation(db, db.get(Conversation, conv_id), cutoff, segment_size=2)
+        finally:
+            db.close()
+        if moved == 4:
+            self.ok("Archived the 4 oldest messages into 2 segments")
+        else:
+            self.fail(f"Archived {moved} messages (Expected 4)")
+            return
+
+        def page(**params):
+            r = requests.get(f"{BASE_URL}/messaging/conversations/{conv_id}/messages",
+                             params=params, headers=self.auth(u2))
+            if r.status_code != 200:
+                return None, None, None
+            return [m["id"] for m in r.json()], r.headers.get("X-Before-Cursor"), r.headers.get("X-After-Cursor")
+
+        got, before, _ = page(limit=3)
+        if got == ids[4:] and before == str(ids[4]):
+            self.ok("Latest page is all hot, with a cursor into the archive")
+        else:
+            self.fail("Latest page", f"{got}, X-Before-Cursor={before}")
+
+        got, before, _ = page(before=ids[4], limit=3)
+        if got == ids[1:4] and before == str(ids[1]):
+            self.ok("Paging back reads the archive segments in order")
+        else:
+            self.fail("before= page into the archive", f"{got} != {ids[1:4]}, X-Before-Cursor={before}")
+
+        got, before, _ = page(before=ids[1], limit=3)
+        if got == ids[:1] and before is None:
+            self.ok("Oldest archived page ends the history (no X-Before-Cursor)")
+        else:
+            self.fail("Last archived page", f"{got}, X-Before-Cursor={before}")
+
+        got, _, after = page(after=ids[1], limit=4)
+        if got == ids[2:6] and after == str(ids[5]):
+            self.ok("after= crosses from the archive back into the hot table")
+        else:
+            self.fail("after= page across the boundary", f"{got} != {ids[2:6]}, X-After-Cursor={after}")
+
+        r = requests.put(f"{BASE_URL}/messaging/messages/{ids[2]}/read",
+                         params={"conversation_id": conv_id}, headers=self.auth(u2))
+        if r.status_code == 200 and r.json()["id"] == ids[2] and r.json()["is_read"]:
+            self.ok(f"PUT /messaging/messages/{ids[2]}/read finds the archived message")
+        else:
+            self.fail(f"PUT /messaging/messages/{ids[2]}/read (archived)", r.text)
+
+        r = requests.put(f"{BASE_URL}/messaging/messages/{ids[1]}/read", headers=self.auth(self.make_user() or u1))
+        if r.status_code in (403, 404):
+            self.ok(f"Archived message read by an outsider → {r.status_code}")
+        else:
+            self.fail(f"Archived message read by an outsider → {r.status_code}", r.text)
+
     # ═══════════════════════════════════════════════════════════════════════════
     # 10. NOTIFICATIONS
     # ═══════════════════════════════════════════════════════════════════════════
@@ -1206,9 +1583,14 @@ class Tester:
         self.test_user_skills()
         self.test_portfolio()
         self.test_connections()
+        self.test_connection_bulk()
         self.test_reviews()
         self.test_sessions()
+        self.test_booking()
+        self.test_free_slots()
         self.test_messaging()
+        self.test_read_watermarks()
+        self.test_message_archive()
         self.test_notifications()
         self.test_reports()
         self.test_uploads()